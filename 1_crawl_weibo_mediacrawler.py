@@ -11,13 +11,17 @@
 
 import json
 import logging
-import time
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict
 
 from media_crawler.weibo import WeiboCrawler
 import config
+import politeness
+from crawl_frontier import CrawlFrontier
+from crawl_state import CrawlState
+from post_records import RawPost
+from raw_shards import ShardedPosts
 
 # ============================================================================
 # 日志设置
@@ -50,7 +54,11 @@ class WeiboOpinionCrawler:
     
     def __init__(self):
         self.crawler = WeiboCrawler()
-        self.all_posts = []
+        self.all_posts = ShardedPosts("weibo")  # 流式写入 data/raw/weibo/*.jsonl.gz
+        self.budget = None  # 由 crawl_scheduler 并发调度时传入
+        self.state = CrawlState()  # 增量采集：每个关键词的高水位
+        self.frontier = CrawlFrontier("weibo")  # 跨关键词/跨运行的帖子去重
+        self.pacer = politeness.get_controller("weibo")  # 自适应请求间隔（AIMD）
         self.start_date = config.DATE_RANGE["start"]
         self.end_date = config.DATE_RANGE["end"]
         self.target_count = config.TARGET_VOLUMES["weibo"]
@@ -59,8 +67,12 @@ class WeiboOpinionCrawler:
         logger.info(f"目标：采集 {self.target_count} 条数据")
         logger.info(f"时间范围：{self.start_date} 至 {self.end_date}")
     
-    def crawl(self):
-        """执行爬取"""
+    def crawl(self, budget=None):
+        """执行爬取
+
+        budget: crawl_scheduler.PlatformBudget，并发调度时控制全局采集量
+        """
+        self.budget = budget
         logger.info(f"开始微博爬取，总共 {len(config.FLAT_KEYWORDS)} 个关键词")
         
         # 微博：分批爬取不同关键词
@@ -72,21 +84,27 @@ class WeiboOpinionCrawler:
             logger.info(f"关键词：{keywords_group}")
             
             for keyword in keywords_group:
-                if len(self.all_posts) >= self.target_count * 1.1:  # 预留10%
+                if self._reached_target():
                     logger.info(f"✅ 已达到目标数量 {len(self.all_posts)}")
                     break
                 
-                self._crawl_keyword(keyword)
+                # 请求间隔随响应情况自适应（正常时缩短，限流/验证码时退避）
+                self.pacer.wait()
                 
-                # 延迟避免被限流
-                time.sleep(config.CRAWL_CONFIG["weibo"]["delay_min"])
+                self._crawl_keyword(keyword)
             
-            if len(self.all_posts) >= self.target_count * 1.1:
+            if self._reached_target():
                 break
         
         logger.info(f"\n【爬取完成】总共采集 {len(self.all_posts)} 条原始数据")
         return self.all_posts
     
+    def _reached_target(self) -> bool:
+        """是否已达到采集目标（并发调度时由全局预算决定）"""
+        if self.budget:
+            return self.budget.exhausted()
+        return len(self.all_posts) >= self.target_count * 1.1  # 预留10%
+    
     def _group_keywords(self) -> List[List[str]]:
         """
         分组关键词，保证多样性
@@ -117,21 +135,40 @@ class WeiboOpinionCrawler:
             
             posts = self.crawler.search(
                 keywords=keyword,
-                start_date=self.start_date.replace("-", ""),
+                start_date=self.state.since("weibo", keyword, self.start_date).replace("-", ""),
                 end_date=self.end_date.replace("-", ""),
                 max_pages=config.CRAWL_CONFIG["weibo"]["max_pages"]
             )
             
+            # 反馈给请求间隔控制器：空结果页视为可能被限流
+            self.pacer.record(politeness.classify(items=len(posts or [])))
+            
             # 数据验证和清洁
             valid_posts = self._validate_posts(posts, keyword)
             
+            # 增量采集：去掉上次已采集过的内容
+            valid_posts, hit_seen = self.state.filter_new("weibo", keyword, valid_posts)
+            if hit_seen:
+                logger.info(f"    已到上次采集位置，只保留 {len(valid_posts)} 条新内容")
+            
+            # 其他关键词已采集过的帖子
+            valid_posts = self.frontier.select_new(valid_posts)
+            
+            if self.budget:
+                valid_posts = self.budget.accept(valid_posts)
+            # 只登记真正写出的帖子：被预算截掉的下次仍会采集
+            self.frontier.mark(valid_posts)
+            self.state.observe("weibo", keyword, valid_posts)
+            
             self.all_posts.extend(valid_posts)
+            self.all_posts.flush()
             
             logger.info(f"    ✓ 获得 {len(valid_posts)} 条有效数据 "
                        f"（总计 {len(self.all_posts)}/{self.target_count}）")
             
         except Exception as e:
             logger.warning(f"    ✗ 爬取失败：{e}")
+            self.pacer.record(politeness.classify_error(e))
     
     def _validate_posts(self, posts: List[Dict], keyword: str) -> List[Dict]:
         """
@@ -155,18 +192,18 @@ class WeiboOpinionCrawler:
                     content = content[:config.CLEAN_CONFIG["max_length"]]
                 
                 # 构建标准数据格式
-                clean_post = {
-                    "platform": "weibo",
-                    "keyword": keyword,
-                    "content": content,
-                    "author": post.get("author", "unknown"),
-                    "likes": post.get("likes", 0),
-                    "comments": post.get("comments", 0),
-                    "reposts": post.get("reposts", 0),
-                    "publish_time": post.get("publish_time", ""),
-                    "source_url": post.get("url", ""),
-                    "crawl_time": datetime.now().isoformat()
-                }
+                clean_post = RawPost(
+                    platform="weibo",
+                    keyword=keyword,
+                    content=content,
+                    author=post.get("author", "unknown"),
+                    likes=post.get("likes", 0),
+                    comments=post.get("comments", 0),
+                    reposts=post.get("reposts", 0),
+                    publish_time=post.get("publish_time", ""),
+                    source_url=post.get("url", ""),
+                    crawl_time=datetime.now().isoformat(),
+                )
                 
                 valid_posts.append(clean_post)
                 
@@ -177,15 +214,18 @@ class WeiboOpinionCrawler:
         return valid_posts
     
     def save_results(self):
-        """保存爬取结果"""
-        output_file = config.WEIBO_RAW_DIR / f"weibo_raw_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
+        """保存爬取结果（帖子已在采集过程中流式写入分片，这里关闭分片并保存采集状态）"""
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(self.all_posts, f, ensure_ascii=False, indent=2)
+            shard_paths = self.all_posts.close()
+            
+            self.state.save()
+            self.frontier.save()
+            politeness.save_state()
             
-            logger.info(f"✅ 数据已保存到 {output_file}")
+            logger.info(f"✅ 数据已保存到 {len(shard_paths)} 个分片：{self.all_posts.writer.out_dir}")
             logger.info(f"   总条数：{len(self.all_posts)}")
+            logger.info(f"   {self.frontier.report()}")
+            logger.info(f"   {self.pacer.report()}")
             
             # 统计
             self._print_statistics()
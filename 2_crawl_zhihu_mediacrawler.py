@@ -16,13 +16,17 @@
 
 import json
 import logging
-import time
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict
 
 from media_crawler.zhihu import ZhihuCrawler
 import config
+import politeness
+from crawl_frontier import CrawlFrontier
+from crawl_state import CrawlState
+from post_records import RawPost
+from raw_shards import ShardedPosts
 
 # ============================================================================
 # 日志设置
@@ -55,7 +59,11 @@ class ZhihuOpinionCrawler:
     
     def __init__(self):
         self.crawler = ZhihuCrawler()
-        self.all_posts = []
+        self.all_posts = ShardedPosts("zhihu")  # 流式写入 data/raw/zhihu/*.jsonl.gz
+        self.budget = None  # 由 crawl_scheduler 并发调度时传入
+        self.state = CrawlState()  # 增量采集：每个关键词的高水位
+        self.frontier = CrawlFrontier("zhihu")  # 跨关键词/跨运行的帖子去重
+        self.pacer = politeness.get_controller("zhihu")  # 自适应请求间隔（AIMD）
         self.start_date = config.DATE_RANGE["start"]
         self.end_date = config.DATE_RANGE["end"]
         self.target_count = config.TARGET_VOLUMES["zhihu"]
@@ -64,8 +72,12 @@ class ZhihuOpinionCrawler:
         logger.info(f"目标：采集 {self.target_count} 条数据")
         logger.info(f"时间范围：{self.start_date} 至 {self.end_date}")
     
-    def crawl(self):
-        """执行爬取"""
+    def crawl(self, budget=None):
+        """执行爬取
+
+        budget: crawl_scheduler.PlatformBudget，并发调度时控制全局采集量
+        """
+        self.budget = budget
         logger.info(f"开始知乎爬取")
         
         # 知乎：优先选择实战模式相关的关键词
@@ -73,22 +85,26 @@ class ZhihuOpinionCrawler:
         logger.info(f"选中 {len(keywords)} 个关键词")
         
         for idx, keyword in enumerate(keywords, 1):
-            if len(self.all_posts) >= self.target_count:
+            if self._reached_target():
                 logger.info(f"✅ 已达到目标数量 {len(self.all_posts)}")
                 break
             
             logger.info(f"[{idx}/{len(keywords)}] 爬取关键词：{keyword}")
             
-            self._crawl_keyword(keyword)
+            # 知乎反爬虫严格，起始延迟更长；之后随响应情况自适应（限流/验证码时退避）
+            self.pacer.wait()
             
-            # 知乎反爬虫严格，延迟更长
-            delay = config.CRAWL_CONFIG["zhihu"]["delay_min"]
-            logger.debug(f"  延迟 {delay} 秒...")
-            time.sleep(delay)
+            self._crawl_keyword(keyword)
         
         logger.info(f"\n【爬取完成】总共采集 {len(self.all_posts)} 条原始数据")
         return self.all_posts
     
+    def _reached_target(self) -> bool:
+        """是否已达到采集目标（并发调度时由全局预算决定）"""
+        if self.budget:
+            return self.budget.exhausted()
+        return len(self.all_posts) >= self.target_count
+    
     def _select_keywords(self) -> List[str]:
         """
         选择适合知乎的关键词
@@ -114,16 +130,35 @@ class ZhihuOpinionCrawler:
                 max_pages=config.CRAWL_CONFIG["zhihu"]["max_pages"]
             )
             
+            # 反馈给请求间隔控制器：空结果页视为可能被限流
+            self.pacer.record(politeness.classify(items=len(answers or [])))
+            
             # 验证和清洁
             valid_posts = self._validate_posts(answers, keyword)
             
+            # 增量采集：去掉上次已采集过的内容
+            valid_posts, hit_seen = self.state.filter_new("zhihu", keyword, valid_posts)
+            if hit_seen:
+                logger.info(f"    已到上次采集位置，只保留 {len(valid_posts)} 条新内容")
+            
+            # 其他关键词已采集过的帖子
+            valid_posts = self.frontier.select_new(valid_posts)
+            
+            if self.budget:
+                valid_posts = self.budget.accept(valid_posts)
+            # 只登记真正写出的帖子：被预算截掉的下次仍会采集
+            self.frontier.mark(valid_posts)
+            self.state.observe("zhihu", keyword, valid_posts)
+            
             self.all_posts.extend(valid_posts)
+            self.all_posts.flush()
             
             logger.info(f"  ✓ 获得 {len(valid_posts)} 条有效答案 "
                        f"（总计 {len(self.all_posts)}/{self.target_count}）")
             
         except Exception as e:
             logger.warning(f"  ✗ 爬取失败：{e}")
+            self.pacer.record(politeness.classify_error(e))
     
     def _validate_posts(self, answers: List[Dict], keyword: str) -> List[Dict]:
         """
@@ -145,24 +180,24 @@ class ZhihuOpinionCrawler:
                     content = content[:config.CLEAN_CONFIG["max_length"]]
                 
                 # 标准格式
-                clean_post = {
-                    "platform": "zhihu",
-                    "keyword": keyword,
-                    "content": content,
+                clean_post = RawPost(
+                    platform="zhihu",
+                    keyword=keyword,
+                    content=content,
                     
                     # 知乎特有字段
-                    "question": answer.get("question_title", ""),
-                    "answer_author": answer.get("author", "unknown"),
-                    "likes": answer.get("likes", 0),
-                    "comments": answer.get("comments", 0),
-                    "shares": answer.get("shares", 0),
-                    "views": answer.get("views", 0),
+                    question=answer.get("question_title", ""),
+                    answer_author=answer.get("author", "unknown"),
+                    likes=answer.get("likes", 0),
+                    comments=answer.get("comments", 0),
+                    shares=answer.get("shares", 0),
+                    views=answer.get("views", 0),
                     
                     # 其他
-                    "publish_time": answer.get("publish_time", ""),
-                    "source_url": answer.get("url", ""),
-                    "crawl_time": datetime.now().isoformat()
-                }
+                    publish_time=answer.get("publish_time", ""),
+                    source_url=answer.get("url", ""),
+                    crawl_time=datetime.now().isoformat(),
+                )
                 
                 valid_posts.append(clean_post)
                 
@@ -173,15 +208,18 @@ class ZhihuOpinionCrawler:
         return valid_posts
     
     def save_results(self):
-        """保存爬取结果"""
-        output_file = config.ZHIHU_RAW_DIR / f"zhihu_raw_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
+        """保存爬取结果（帖子已在采集过程中流式写入分片，这里关闭分片并保存采集状态）"""
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(self.all_posts, f, ensure_ascii=False, indent=2)
+            shard_paths = self.all_posts.close()
+            
+            self.state.save()
+            self.frontier.save()
+            politeness.save_state()
             
-            logger.info(f"✅ 数据已保存到 {output_file}")
+            logger.info(f"✅ 数据已保存到 {len(shard_paths)} 个分片：{self.all_posts.writer.out_dir}")
             logger.info(f"   总条数：{len(self.all_posts)}")
+            logger.info(f"   {self.frontier.report()}")
+            logger.info(f"   {self.pacer.report()}")
             
             # 统计
             self._print_statistics()
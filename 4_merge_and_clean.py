@@ -3,26 +3,35 @@
 将所有平台的原始数据合并、去重、清洁
 
 使用方法：
-    python 4_merge_and_clean.py
+    python 4_merge_and_clean.py                # 增量：只清洁新增/变化的原始文件，追加到输出
+    python 4_merge_and_clean.py --full         # 全量重建
+    python 4_merge_and_clean.py --workers 8    # 进程数（默认 CLEAN_CONFIG["workers"]，0 = CPU核数）
 
 输入：
-    data/raw/weibo/*.json
-    data/raw/zhihu/*.json
-    data/raw/xiaohongshu/*.json
+    data/raw/weibo/*.json, *.jsonl[.gz]
+    data/raw/zhihu/*.json, *.jsonl[.gz]
+    data/raw/xiaohongshu/*.json, *.jsonl[.gz]
+    （*.jsonl[.gz] 为爬虫流式写入的分片，见 raw_shards.py）
 
 输出：
     data/clean/opinions_clean_5000.txt
     data/clean/opinions_clean_5000.json
+    data/clean/opinions_clean_5000.xlsx（仅全量）
+    （三种输出在清洁时逐条流式写出，见 streaming_exporters.py）
+    data/clean/.clean_manifest.json 等（增量清单和去重状态，见 clean_manifest.py）
 """
 
-import json
+import argparse
 import logging
-import hashlib
-from pathlib import Path
-from typing import List, Dict, Set
-from collections import defaultdict
+from itertools import islice
+from typing import Dict, Iterator, List
 
 import config
+from cleaning_engine import PROFILES, CleaningEngine
+from clean_manifest import CleanManifest, changed_inputs_hint, rel_path, rules_fingerprint
+from post_records import CleanPost
+from raw_shards import shard_files
+from streaming_exporters import ExportSet, JsonWriter, TxtWriter, XlsxWriter
 
 # ============================================================================
 # 日志设置
@@ -43,251 +52,125 @@ logger = logging.getLogger(__name__)
 # ============================================================================
 
 class DataCleaner:
-    """数据清洁和去重"""
+    """数据清洁和去重（规则和流程见 cleaning_engine.py 的 "merge" 配置）
+
+    记录从原始文件流过 去重 → 长度过滤 → 广告过滤 → 规范化，每个文件/分片一个分区，
+    内存中只保留去重哈希，不再把全部原始数据装进内存。
+    workers > 1 时各文件的无状态步骤在进程池中执行，主进程按文件顺序合并并去重，
+    结果与单进程完全一致。
+    """
+    
+    def __init__(self, workers=None):
+        if workers is None:
+            workers = config.CLEAN_CONFIG.get("workers", 1)
+        rules = PROFILES["merge"]._replace(
+            min_length=config.CLEAN_CONFIG["min_length"],
+            max_length=config.CLEAN_CONFIG["max_length"],
+            normalize="strict" if config.CLEAN_CONFIG.get("remove_urls", True) else "keep",
+            remove_emojis=config.CLEAN_CONFIG.get("remove_emojis", True),
+        )
+        # semantic 模式：完全相同之外，再去掉相似度 ≥ dedup_threshold 的近似重复
+        near_threshold = None
+        if config.CLEAN_CONFIG.get("dedup_method") == "semantic":
+            near_threshold = config.CLEAN_CONFIG["dedup_threshold"]
+        self.engine = CleaningEngine(rules, workers, near_threshold)
+        self.workers = self.engine.workers
+        self.near_index = self.engine.near_index
+        self._state_start = (0, 0)
     
-    def __init__(self):
-        self.all_data = []
-        self.dedup_hashes = set()
-        self.stats = {
-            "total_raw": 0,
-            "after_dedup": 0,
-            "after_filter_length": 0,
-            "after_filter_ads": 0,
-            "final": 0
+    @property
+    def stats(self) -> Dict:
+        """各步骤之后剩余的条数"""
+        engine_stats = self.engine.stats
+        rejected = engine_stats["rejected"]
+        after_dedup = engine_stats["total"] - rejected["empty"] - engine_stats["duplicates"]
+        after_length = after_dedup - rejected["length"]
+        return {
+            "total_raw": engine_stats["total"],
+            "after_dedup": after_dedup,
+            "after_filter_length": after_length,
+            "after_filter_ads": after_length - rejected["ads"],
+            "final": engine_stats["final"]
         }
     
-    def load_raw_data(self) -> List[Dict]:
-        """从所有平台加载原始数据"""
-        logger.info("【第1步】加载原始数据")
+    def load_dedup_state(self, manifest: CleanManifest):
+        """加载历史去重状态：与已清洁内容重复（或近似重复）的新记录会被去掉"""
+        self.engine.seen = manifest.load_hashes()
+        if self.near_index is not None:
+            self.near_index.add_signatures(manifest.load_signatures())
+        self._state_start = (len(self.engine.seen), self.near_index.count if self.near_index is not None else 0)
+    
+    def save_dedup_state(self, manifest: CleanManifest):
+        """只追加保存本次新收录的摘要和签名"""
+        hashes_start, docs_start = self._state_start
+        new_signatures = self.near_index.signatures_from(docs_start) if self.near_index is not None else None
+        manifest.append_dedup_state(islice(self.engine.seen, hashes_start, None), new_signatures)
+    
+    def find_raw_files(self):
+        """列出所有平台的原始JSON文件和JSONL分片"""
+        platform_dirs = [config.WEIBO_RAW_DIR, config.ZHIHU_RAW_DIR, config.XIAOHONGSHU_RAW_DIR]
+        # 小红书分片总是写在 data/raw/xiaohongshu，历史JSON目录可能在别处
+        if config.RAW_DATA_DIR / "xiaohongshu" != config.XIAOHONGSHU_RAW_DIR:
+            platform_dirs.append(config.RAW_DATA_DIR / "xiaohongshu")
         
         all_files = []
-        for platform_dir in [config.WEIBO_RAW_DIR, config.ZHIHU_RAW_DIR, config.XIAOHONGSHU_RAW_DIR]:
+        all_shards = []
+        for platform_dir in platform_dirs:
             json_files = list(platform_dir.glob("*.json"))
+            shards = shard_files(platform_dir)
             all_files.extend(json_files)
-            logger.info(f"  {platform_dir.name}: {len(json_files)} 个文件")
-        
-        if not all_files:
-            logger.error("❌ 未找到任何原始数据文件！")
-            logger.error(f"   检查是否运行了爬虫脚本 (1_crawl_weibo...)")
-            return []
-        
-        # 加载所有JSON文件
-        for json_file in all_files:
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    # 处理不同的JSON格式
-                    if isinstance(data, list):
-                        self.all_data.extend(data)
-                    else:
-                        # 字典格式：尝试提取data字段或根字段
-                        if isinstance(data, dict):
-                            if "data" in data:
-                                items = data["data"]
-                                if isinstance(items, list):
-                                    self.all_data.extend(items)
-                                else:
-                                    self.all_data.append(items)
-                            else:
-                                # 直接作为单个item
-                                self.all_data.append(data)
-                
-                logger.info(f"  ✓ 已加载 {json_file.name} ({len(self.all_data)} 条数据)")
-            except Exception as e:
-                logger.warning(f"  ✗ 加载失败 {json_file.name}: {e}")
+            all_shards.extend(shards)
+            logger.info(f"  {platform_dir.name}: {len(json_files)} 个文件, {len(shards)} 个分片")
         
-        self.stats["total_raw"] = len(self.all_data)
-        logger.info(f"✅ 总共加载 {len(self.all_data)} 条原始数据\n")
-        
-        return self.all_data
-    
-    def deduplicate(self) -> List[Dict]:
-        """去重"""
-        logger.info("【第2步】去重处理")
-        
-        unique_data = []
-        dedup_hashes = set()
-        
-        for item in self.all_data:
-            # 获取内容文本
-            content = item.get("content", "")
-            if not content:
-                content = item.get("text", "")
-            
-            # 计算哈希
-            content_hash = self._hash_content(content)
-            
-            # 检查重复
-            if content_hash not in dedup_hashes:
-                unique_data.append(item)
-                dedup_hashes.add(content_hash)
-        
-        removed = len(self.all_data) - len(unique_data)
-        self.stats["after_dedup"] = len(unique_data)
-        
-        logger.info(f"  去重前：{len(self.all_data)} 条")
-        logger.info(f"  去重后：{len(unique_data)} 条")
-        logger.info(f"  删除：{removed} 条重复 ({100*removed/len(self.all_data):.1f}%)\n")
-        
-        return unique_data
+        return all_files, all_shards
     
-    def filter_by_length(self, data: List[Dict]) -> List[Dict]:
-        """按长度过滤"""
-        logger.info("【第3步】长度过滤")
-        
-        min_len = config.CLEAN_CONFIG["min_length"]
-        max_len = config.CLEAN_CONFIG["max_length"]
-        
-        filtered = []
-        
-        for item in data:
-            content = item.get("content", "")
-            if not content:
-                content = item.get("text", "")
-            
-            # 长度检查
-            if len(content) < min_len:
-                continue
-            
-            # 截断
-            if len(content) > max_len:
-                content = content[:max_len]
-                item["content"] = content
-            
-            filtered.append(item)
-        
-        removed = len(data) - len(filtered)
-        self.stats["after_filter_length"] = len(filtered)
-        
-        logger.info(f"  长度范围：{min_len}-{max_len} 字符")
-        logger.info(f"  过滤后：{len(filtered)} 条")
-        logger.info(f"  删除：{removed} 条\n")
-        
-        return filtered
-    
-    def filter_ads_and_spam(self, data: List[Dict]) -> List[Dict]:
-        """过滤广告和垃圾信息"""
-        logger.info("【第4步】广告和垃圾过滤")
-        
-        # 广告特征词
-        ad_keywords = [
-            "购买", "点击这里", "扫码", "联系我", "微信号",
-            "可以赚钱", "日赚", "月入", "包邮", "限时",
-            "点一下", "长按识别", "点击链接", "领优惠",
-            "代理", "加盟", "投资", "返利"
-        ]
-        
-        filtered = []
-        
-        for item in data:
-            content = item.get("content", "")
-            if not content:
-                content = item.get("text", "")
-            
-            # 检查广告特征
-            is_ad = False
-            for ad_kw in ad_keywords:
-                if ad_kw in content:
-                    # 过于明显的广告
-                    if content.count(ad_kw) > 1 or len(content) < 20:
-                        is_ad = True
-                        break
-            
-            if not is_ad:
-                filtered.append(item)
-        
-        removed = len(data) - len(filtered)
-        self.stats["after_filter_ads"] = len(filtered)
-        
-        logger.info(f"  过滤前：{len(data)} 条")
-        logger.info(f"  过滤后：{len(filtered)} 条")
-        logger.info(f"  删除：{removed} 条广告\n")
-        
-        return filtered
+    @staticmethod
+    def _log_file(path, count, error):
+        if error is not None:
+            logger.warning(f"  ✗ 加载失败 {path.name}: {error}")
+        elif path.suffix == ".json":
+            logger.info(f"  ✓ 已加载 {path.name} ({count} 条数据)")
     
-    def normalize_content(self, data: List[Dict]) -> List[Dict]:
-        """规范化内容"""
-        logger.info("【第5步】内容规范化")
-        
-        import re
-        normalized = []
-        
-        for item in data:
-            # 获取内容（支持多种字段名）
-            content = item.get("content", "")
-            if not content:
-                content = item.get("text", "")
-            if not content:
-                content = item.get("desc", "")  # 小红书的description字段
-            if not content:
-                content = item.get("title", "")  # 小红书的title字段
-            
-            # 跳过空内容
-            if not content:
-                continue
-            
-            # 移除URL（如需要）
-            if config.CLEAN_CONFIG.get("remove_urls", True):
-                content = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', content)
-            
-            # 移除emoji和特殊符号
-            if config.CLEAN_CONFIG.get("remove_emojis", True):
-                # 移除emoji
-                content = re.sub(r'[\U0001F300-\U0001F9FF]|[\u2600-\u27BF]', '', content)
-                # 移除[xxx]形式的标签
-                content = re.sub(r'\[.*?\]', '', content)
-            
-            # 移除多余空格
-            content = ' '.join(content.split())
-            
-            # 标准化字段
-            clean_item = {
-                "platform": item.get("platform", "xiaohongshu"),  # 默认小红书
-                "content": content,
-                "keywords": item.get("keyword", "") or item.get("tag_list", "") or item.get("source_keyword", ""),
-                "source_url": item.get("source_url", "") or item.get("note_url", ""),
-                "crawl_time": item.get("crawl_time", "") or item.get("time", "")
-            }
-            
-            normalized.append(clean_item)
-        
-        logger.info(f"✅ 规范化完成：{len(normalized)} 条\n")
-        
-        return normalized
+    def clean(self, manifest: CleanManifest = None, hint=None) -> List[CleanPost]:
+        """执行完整的清洁流程，返回全部清洁后的记录（导出时用 iter_clean 流式处理）"""
+        return list(self.iter_clean(manifest, hint))
     
-    def clean(self) -> List[Dict]:
-        """执行完整的清洁流程"""
+    def iter_clean(self, manifest: CleanManifest = None, hint=None) -> Iterator[CleanPost]:
+        """执行完整的清洁流程，按顺序逐条产出清洁后的记录
+
+        给出 manifest 时只清洁其中没有登记、或内容已变化的原始文件；
+        hint 为编排器传入的变化文件集合（PIPELINE_CHANGED_INPUTS）。
+        """
         logger.info("\n" + "=" * 70)
         logger.info("【数据清洁流程】")
         logger.info("=" * 70 + "\n")
         
-        # 1. 加载
-        self.load_raw_data()
+        logger.info("【加载原始数据】")
+        json_files, shards = self.find_raw_files()
         
-        if not self.all_data:
+        if not json_files and not shards:
+            logger.error("❌ 未找到任何原始数据文件！")
+            logger.error(f"   检查是否运行了爬虫脚本 (1_crawl_weibo...)")
             logger.error("❌ 无原始数据，无法继续")
-            return []
-        
-        # 2. 去重
-        data = self.deduplicate()
-        
-        # 3. 长度过滤
-        data = self.filter_by_length(data)
-        
-        # 4. 广告过滤
-        data = self.filter_ads_and_spam(data)
-        
-        # 5. 规范化
-        data = self.normalize_content(data)
-        
-        self.stats["final"] = len(data)
-        
-        return data
-    
-    def _hash_content(self, content: str) -> str:
-        """计算内容哈希"""
-        return hashlib.md5(content.encode()).hexdigest()
+            return
+        
+        if manifest is not None:
+            total_files = len(json_files) + len(shards)
+            json_files = manifest.changed(json_files, hint)
+            shards = manifest.changed(shards, hint)
+            logger.info(f"  新增/变化的文件：{len(json_files) + len(shards)} 个（共 {total_files} 个）")
+            if not json_files and not shards:
+                logger.info("✅ 没有新的原始数据\n")
+                return
+        
+        mode = f"{self.workers} 个进程并行" if self.workers > 1 else "单遍流式处理"
+        logger.info(f"【去重 → 长度过滤 → 广告过滤 → 规范化】（{mode}）")
+        yield from self.engine.clean_files(json_files + shards, on_file=self._log_file)
+        
+        if self.near_index is not None:
+            logger.info(f"  近似去重（阈值 {self.near_index.threshold}）：删除 "
+                        f"{self.near_index.stats['duplicates']} 条，候选比较 {self.near_index.stats['candidates']} 次")
+        logger.info(f"✅ 原始数据 {self.engine.stats['total']} 条，清洁后 {self.engine.stats['final']} 条\n")
     
     def print_statistics(self):
         """打印统计信息"""
@@ -316,96 +199,80 @@ class DataCleaner:
 # 输出处理
 # ============================================================================
 
-class DataExporter:
-    """数据导出"""
-    
-    @staticmethod
-    def export_txt(data: List[Dict], output_file: Path):
-        """导出为TXT格式（每行一条）"""
-        logger.info(f"\n【导出为TXT】{output_file}")
-        
-        try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                for item in data:
-                    content = item.get("content", "")
-                    f.write(content + "\n")
-            
-            logger.info(f"✅ 已保存 {len(data)} 条到 {output_file.name}")
-            
-        except Exception as e:
-            logger.error(f"❌ 导出失败：{e}")
-    
-    @staticmethod
-    def export_json(data: List[Dict], output_file: Path):
-        """导出为JSON格式"""
-        logger.info(f"\n【导出为JSON】{output_file}")
-        
-        try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "total": len(data),
-                    "data": data
-                }, f, ensure_ascii=False, indent=2)
-            
-            logger.info(f"✅ 已保存 {len(data)} 条到 {output_file.name}")
-            
-        except Exception as e:
-            logger.error(f"❌ 导出失败：{e}")
-    
-    @staticmethod
-    def export_excel(data: List[Dict], output_file: Path):
-        """导出为Excel格式（用于后续分析）"""
-        logger.info(f"\n【导出为Excel】{output_file}")
-        
-        try:
-            import pandas as pd
-            
-            df = pd.DataFrame(data)
-            df.to_excel(output_file, index=False)
-            
-            logger.info(f"✅ 已保存 {len(data)} 条到 {output_file.name}")
-            
-        except ImportError:
-            logger.warning("⚠️  未安装pandas，跳过Excel导出")
-        except Exception as e:
-            logger.error(f"❌ 导出失败：{e}")
+def open_exporters(incremental: bool) -> ExportSet:
+    """清洁数据的输出（逐条流式写出，见 streaming_exporters.py）
+
+    全量：TXT（用于LLM分析）+ JSON（备份）+ Excel（用于后续分析），写完后原子替换；
+    增量：追加到已有 TXT / JSON 末尾，Excel 不更新（需要时用 --full 重新生成）。
+    """
+    txt_file = config.OUTPUT_CONFIG["clean_opinions_file"]
+    json_file = config.OUTPUT_CONFIG["clean_json_file"]
+    if incremental:
+        return ExportSet([TxtWriter(txt_file, append=True), JsonWriter(json_file, append=True)])
+    return ExportSet([
+        TxtWriter(txt_file),
+        JsonWriter(json_file),
+        XlsxWriter(config.OUTPUT_CONFIG["clean_excel_file"], CleanPost.FIELDS),
+    ])
 
 
 # ============================================================================
 # 主函数
 # ============================================================================
 
-def main():
+def main(workers=None, full=False):
     """主函数"""
     logger.info("\n" + "=" * 70)
     logger.info("【跨境电商税收舆论 - 数据清洁】")
     logger.info("=" * 70)
     
-    # 1. 清洁数据
-    cleaner = DataCleaner()
-    clean_data = cleaner.clean()
+    txt_file = config.OUTPUT_CONFIG["clean_opinions_file"]
+    json_file = config.OUTPUT_CONFIG["clean_json_file"]
     
-    if not clean_data:
-        logger.error("❌ 清洁失败，无有效数据")
-        return False
+    # 1. 增量还是全量
+    manifest = CleanManifest()
+    fingerprint = rules_fingerprint()
+    hint = changed_inputs_hint()
+    reason = "--full" if full else manifest.incremental_reason(fingerprint, [txt_file, json_file])
+    if reason is None and hint is not None and rel_path(__file__) in hint:
+        reason = "清洁脚本已修改"
+    incremental = reason is None
     
-    # 2. 统计
-    cleaner.print_statistics()
+    cleaner = DataCleaner(workers)
+    if incremental:
+        logger.info(f"【增量清洁】已登记 {len(manifest.files)} 个原始文件，已清洁 {manifest.records} 条")
+        cleaner.load_dedup_state(manifest)
+    else:
+        logger.info(f"【全量清洁】{reason}")
+        manifest.reset()
     
-    # 3. 导出
-    exporter = DataExporter()
+    # 2. 清洁数据（只处理新增/变化的原始文件），逐条写入输出
+    exporter = open_exporters(incremental)
+    logger.info(f"【导出】{', '.join(w.path.name for w in exporter.writers)}"
+                f"（{'追加' if incremental else '全量写出'}）")
+    try:
+        exporter.write_many(cleaner.iter_clean(manifest, hint if incremental else None))
+    except BaseException:
+        exporter.abort()
+        raise
     
-    # 导出为TXT（用于LLM分析）
-    exporter.export_txt(clean_data, config.OUTPUT_CONFIG["clean_opinions_file"])
+    if not exporter.count and not incremental:
+        exporter.abort()
+        logger.error("❌ 清洁失败，无有效数据")
+        return False
     
-    # 导出为JSON（备份）
-    exporter.export_json(clean_data, config.OUTPUT_CONFIG["clean_json_file"])
+    exporter.close()
+    for writer in exporter.writers:
+        logger.info(f"✅ 已{'追加' if incremental else '保存'} {writer.count} 条到 {writer.path.name}")
+    if incremental and exporter.count:
+        logger.info("ℹ️  增量模式不更新Excel（需要时用 --full 重新生成）")
     
-    # 尝试导出Excel
-    try:
-        exporter.export_excel(clean_data, config.OUTPUT_CONFIG["clean_excel_file"])
-    except:
-        pass
+    # 3. 统计
+    cleaner.print_statistics()
+    
+    # 4. 输出写完后再登记：中途失败时下次会重新处理这些文件
+    cleaner.save_dedup_state(manifest)
+    manifest.commit(fingerprint, exporter.count)
     
     logger.info("\n" + "=" * 70)
     logger.info("【清洁完成】")
@@ -419,5 +286,10 @@ def main():
 
 
 if __name__ == "__main__":
-    success = main()
+    parser = argparse.ArgumentParser(description="数据合并与清洁")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="进程数（默认 CLEAN_CONFIG['workers']，0 = CPU核数，1 = 单进程）")
+    parser.add_argument("--full", action="store_true", help="忽略增量清单，全量重建输出")
+    args = parser.parse_args()
+    success = main(args.workers, args.full)
     exit(0 if success else 1)
@@ -13,12 +13,15 @@ import glob
 import os
 from pathlib import Path
 
+from raw_shards import shard_files, iter_shard
+from cleaning_engine import PROFILES, CleaningEngine
+from post_records import compact
+
 class DataCleaner:
     """数据清洁类"""
     
     def __init__(self):
-        self.all_texts = set()  # 用set做去重
-        self.all_posts = []
+        self.all_posts = []  # RawPost（post_records），比每条一个 dict 省内存
     
     def load_json_files(self, pattern='*_raw_data.json'):
         """加载所有JSON文件"""
@@ -34,13 +37,25 @@ class DataCleaner:
                 with open(file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     if isinstance(data, list):
-                        self.all_posts.extend(data)
+                        self.all_posts.extend(map(compact, data))
                         print(f"   ✓ {file}: {len(data)} 条")
                     else:
                         print(f"   ⚠️  {file} 格式非列表，跳过")
             except Exception as e:
                 print(f"   ❌ {file}: {str(e)}")
     
+    def load_shard_files(self, platforms=('weibo', 'zhihu'), raw_dir='data/raw'):
+        """加载爬虫流式写入的 JSONL 分片（data/raw/<平台>/*.jsonl[.gz]）"""
+        print("📂 正在加载原始数据分片...")
+        
+        for platform in platforms:
+            for file in shard_files(Path(raw_dir) / platform):
+                count = 0
+                for post in iter_shard(file, compact=True):
+                    self.all_posts.append(post)
+                    count += 1
+                print(f"   ✓ {file.name}: {count} 条")
+    
     def load_csv_files(self, pattern='*_raw_data.csv'):
         """加载所有CSV文件"""
         print("📂 正在加载CSV文件...")
@@ -55,83 +70,20 @@ class DataCleaner:
                 df = pd.read_csv(file, encoding='utf-8')
                 # 转为字典列表
                 posts = df.to_dict('records')
-                self.all_posts.extend(posts)
+                self.all_posts.extend(map(compact, posts))
                 print(f"   ✓ {file}: {len(df)} 条")
             except Exception as e:
                 print(f"   ❌ {file}: {str(e)}")
     
-    def clean_text(self, text):
-        """清洁单条文本"""
-        if not isinstance(text, str):
-            return ""
-        
-        # 去除多余空格
-        text = ' '.join(text.split())
-        
-        # 去除特殊字符和控制符
-        text = ''.join(c for c in text if c.isprintable())
+    def clean_and_deduplicate(self, workers=None):
+        """清洁和去重（规则见 cleaning_engine.PROFILES["step1"]：预清洁、长度10-500、
+        中文占比 ≥ 0.4、无垃圾词；按批分给多个进程，去重在主进程按原顺序进行）"""
+        engine = CleaningEngine(PROFILES["step1"], workers)
+        print(f"\n🧹 正在清洁数据（{engine.workers} 个进程）...")
         
-        # 截断到500字（舆论通常不太长）
-        text = text[:500].strip()
-        
-        return text
-    
-    def is_valid_post(self, text):
-        """判断是否为有效的舆论"""
-        if not text:
-            return False
-        
-        # 长度检查
-        if len(text) < 10 or len(text) > 500:
-            return False
-        
-        # 中文内容检查（至少50%中文）
-        chinese_count = sum(1 for c in text if '\u4e00' <= c <= '\u9fff')
-        if chinese_count < len(text) * 0.4:
-            return False
-        
-        # 垃圾内容过滤
-        spam_keywords = [
-            '推广', '广告', '点击', '关注', '转发', '分享',
-            '购买', '链接', '扫码', '下载', '安装',
-            'http', 'www', '.com', '.cn',  # URL
-            '🌟', '💎', '🔥', '💰',  # 过多emoji
-        ]
-        if any(kw in text for kw in spam_keywords):
-            return False
-        
-        return True
-    
-    def clean_and_deduplicate(self):
-        """清洁和去重"""
-        print("\n🧹 正在清洁数据...")
-        
-        cleaned_texts = []
-        duplicates = 0
-        invalid = 0
-        
-        for post in self.all_posts:
-            # 提取文本
-            if isinstance(post, dict):
-                text = post.get('text', '')
-            else:
-                text = str(post)
-            
-            # 清洁
-            text = self.clean_text(text)
-            
-            # 有效性检查
-            if not self.is_valid_post(text):
-                invalid += 1
-                continue
-            
-            # 去重
-            if text in self.all_texts:
-                duplicates += 1
-                continue
-            
-            self.all_texts.add(text)
-            cleaned_texts.append(text)
+        cleaned_texts = list(engine.clean(self.all_posts))
+        duplicates = engine.stats["duplicates"]
+        invalid = sum(engine.stats["rejected"].values())
         
         print(f"   ✓ 原始条数：{len(self.all_posts)}")
         print(f"   ✓ 已清洁：{len(cleaned_texts)}")
@@ -207,6 +159,7 @@ class DataCleaner:
         
         # 加载数据
         self.load_json_files()
+        self.load_shard_files()
         self.load_csv_files()
         
         if not self.all_posts:
@@ -5,19 +5,22 @@
 时间：2025年6月-12月
 """
 
-import requests
-import json
-import time
 import random
 from datetime import datetime
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse
 import csv
 
+from async_fetcher import AsyncFetcher, HostPolicy, keyword_page_requests, run_fetch
+import politeness
+from html_extractors import get_extractor, parse_count
+from post_records import RawPost
+from raw_shards import ShardedPosts
+
 class WeiboSpider:
     """微博爬虫 - 采集跨境电商税收相关舆论"""
     
     def __init__(self):
-        self.posts = []
+        self.posts = ShardedPosts('weibo')  # 流式写入 data/raw/weibo/ 分片
         self.keywords = [
             '0110香港公司',
             '9610备案',
@@ -29,10 +32,13 @@ class WeiboSpider:
             '跨境电商税收',
             '跨境电商补税',
         ]
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': self._random_user_agent()
-        })
+        self.search_url = "https://s.weibo.com/weibo"
+        # 同一主机最多2个并发请求，相邻请求间隔从2-5秒起步，按响应情况自适应
+        self.fetcher = AsyncFetcher(
+            {urlparse(self.search_url).netloc: HostPolicy(concurrency=2, delay_min=2, delay_max=5)},
+            headers={'User-Agent': self._random_user_agent(), 'Referer': 'https://s.weibo.com/'}
+        )
+        self.extractor = get_extractor()
     
     def _random_user_agent(self):
         """随机User-Agent，避免反爬"""
@@ -43,99 +49,71 @@ class WeiboSpider:
         ]
         return random.choice(agents)
     
+    def _parse_page(self, html, keyword, url, page):
+        """解析一页搜索结果，返回本页采集条数"""
+        # 选择器（含微博网页结构变化时的备选）见 html_extractors.SPECS["weibo"]
+        items = self.extractor.extract('weibo', html)
+        
+        if not items:
+            print(f"   ⚠️  {keyword} 第{page}页未找到帖子，可能需要更新选择器")
+            return 0
+        
+        count_this_page = 0
+        for item in items:
+            text = item['text']
+            
+            # 过滤：太短的内容
+            if len(text) < 20:
+                continue
+            
+            # 过滤：广告或无关内容
+            spam_keywords = ['推广', '广告', '购买', '链接', '扫码']
+            if any(kw in text for kw in spam_keywords):
+                continue
+            
+            # 保存
+            self.posts.append(RawPost(
+                platform='weibo',
+                keyword=keyword,
+                text=text[:500],  # 截断到500字
+                likes=parse_count(item['likes']),
+                collected_at=datetime.now().isoformat(),
+                source_url=url,
+            ))
+            count_this_page += 1
+        
+        return count_this_page
+    
     def search_weibo(self, keyword, num_pages=3):
         """
         搜索微博（使用网页版爬取）
         注意：微博网页结构经常变化，此方法可能需要调整
         """
         print(f"\n📱 开始采集微博：{keyword}")
+        self.search_all([keyword], num_pages)
+    
+    def search_all(self, keywords, num_pages=3):
+        """所有关键词 × 页码并发抓取（同一主机内限流、保持礼貌延迟）"""
+        requests = keyword_page_requests(self.search_url, keywords, num_pages,
+                                         lambda k, p: {'q': k, 'typeall': 1, 'suball': 1, 'page': p})
         
-        for page in range(1, num_pages + 1):
-            try:
-                # 微博搜索URL
-                url = f"https://s.weibo.com/weibo?q={keyword}&typeall=1&suball=1&page={page}"
-                
-                self.session.headers['Referer'] = 'https://s.weibo.com/'
-                response = self.session.get(url, timeout=10)
-                response.encoding = 'utf-8'
-                
-                if response.status_code != 200:
-                    print(f"   ❌ 第{page}页请求失败 (状态码: {response.status_code})")
-                    continue
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # 尝试多种选择器（因为微博网页结构经常变）
-                posts = soup.find_all('div', class_='mbrank')
-                
-                if not posts:
-                    posts = soup.find_all('div', attrs={'class': lambda x: x and 'feed-item' in x})
-                
-                if not posts:
-                    print(f"   ⚠️  第{page}页未找到帖子，可能需要更新选择器")
-                    continue
-                
-                count_this_page = 0
-                for post in posts:
-                    try:
-                        # 提取文本
-                        text_elem = post.find('p', class_='txt')
-                        if not text_elem:
-                            text_elem = post.find('p')
-                        
-                        if not text_elem:
-                            continue
-                        
-                        text = text_elem.get_text(strip=True)
-                        
-                        # 过滤：太短的内容
-                        if len(text) < 20:
-                            continue
-                        
-                        # 过滤：广告或无关内容
-                        spam_keywords = ['推广', '广告', '购买', '链接', '扫码']
-                        if any(kw in text for kw in spam_keywords):
-                            continue
-                        
-                        # 提取点赞数（可选）
-                        like_elem = post.find('span', attrs={'class': lambda x: x and 'like' in x})
-                        like_count = 0
-                        if like_elem:
-                            try:
-                                like_count = int(like_elem.get_text())
-                            except:
-                                pass
-                        
-                        # 保存
-                        self.posts.append({
-                            'platform': 'weibo',
-                            'keyword': keyword,
-                            'text': text[:500],  # 截断到500字
-                            'likes': like_count,
-                            'collected_at': datetime.now().isoformat(),
-                            'source_url': url
-                        })
-                        count_this_page += 1
-                        
-                    except Exception as e:
-                        continue
-                
-                print(f"   ✓ 第{page}页：采集 {count_this_page} 条")
-                
-                # 反爬虫延迟
-                time.sleep(random.uniform(2, 5))
-                
-            except Exception as e:
-                print(f"   ❌ 出错：{str(e)}")
-                time.sleep(random.uniform(3, 7))
+        for result in run_fetch(self.fetcher, requests):
+            keyword, page = result.meta
+            if not result.ok:
+                print(f"   ❌ {keyword} 第{page}页请求失败 ({result.error})")
                 continue
+            count_this_page = self._parse_page(result.text, keyword, result.url, page)
+            self.posts.flush()
+            if not count_this_page:
+                self.fetcher.feedback(result.url, politeness.EMPTY)
+            print(f"   ✓ {keyword} 第{page}页：采集 {count_this_page} 条")
     
-    def save_to_json(self, filename='weibo_raw_data.json'):
-        """保存为JSON"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.posts, f, ensure_ascii=False, indent=2)
-        print(f"\n✅ 已保存 {len(self.posts)} 条数据到 {filename}")
-        return filename
+    def save_shards(self):
+        """关闭原始数据分片（采集过程中已逐页写盘），返回分片路径"""
+        paths = self.posts.close()
+        politeness.save_state()
+        print(f"\n✅ 已保存 {len(self.posts)} 条数据到 {len(paths)} 个分片：{self.posts.writer.out_dir}")
+        return paths
     
     def save_to_csv(self, filename='weibo_raw_data.csv'):
         """保存为CSV"""
@@ -156,13 +134,12 @@ class WeiboSpider:
         print("🚀 开始采集跨境电商税收舆论（微博版）")
         print("=" * 60)
         
-        for keyword in self.keywords:
-            self.search_weibo(keyword, num_pages=3)
-            print(f"   目前已采集：{len(self.posts)} 条")
+        self.search_all(self.keywords, num_pages=3)
+        print(f"   目前已采集：{len(self.posts)} 条")
         
         # 保存结果
         if self.posts:
-            self.save_to_json()
+            self.save_shards()
             self.save_to_csv()
             print("\n" + "=" * 60)
             print(f"📊 采集完成：共 {len(self.posts)} 条微博")
@@ -6,18 +6,20 @@
 """
 
 import requests
-import json
-import time
 import random
 from datetime import datetime
-from bs4 import BeautifulSoup
 import csv
 
+import politeness
+from html_extractors import get_extractor, parse_count
+from post_records import RawPost
+from raw_shards import ShardedPosts
+
 class ZhihuSpider:
     """知乎爬虫 - 采集跨境电商税收讨论"""
     
     def __init__(self):
-        self.posts = []
+        self.posts = ShardedPosts('zhihu')  # 流式写入 data/raw/zhihu/ 分片
         # 知乎关键词：问题关键词
         self.keywords = [
             '跨境电商增值税',
@@ -33,6 +35,9 @@ class ZhihuSpider:
         self.session.headers.update({
             'User-Agent': self._random_user_agent()
         })
+        self.extractor = get_extractor()
+        # 请求间隔从2-4秒起步，正常时缩短，非200/验证码/空页时退避
+        self.pacer = politeness.get_controller("www.zhihu.com", delay_min=2, delay_max=4)
     
     def _random_user_agent(self):
         """随机User-Agent"""
@@ -53,85 +58,55 @@ class ZhihuSpider:
                 # 知乎搜索URL
                 url = f"https://www.zhihu.com/search?type=content&q={keyword}&page={page}"
                 
+                self.pacer.wait()
                 response = self.session.get(url, timeout=10)
                 response.encoding = 'utf-8'
                 
                 if response.status_code != 200:
+                    self.pacer.record(politeness.ERROR)
                     print(f"   ❌ 第{page}页请求失败")
                     continue
                 
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # 知乎搜索结果选择器（可能需要调整）
-                items = soup.find_all('div', attrs={'class': lambda x: x and 'SearchResult' in (x or '')})
-                
-                if not items:
-                    # 尝试其他选择器
-                    items = soup.find_all('article', attrs={'class': lambda x: x and 'search' in (x or '').lower()})
+                # 知乎搜索结果选择器（含备选）见 html_extractors.SPECS["zhihu"]
+                items = self.extractor.extract('zhihu', response.text)
+                self.pacer.record(politeness.classify(response.status_code, response.text, len(items)))
                 
                 count_this_page = 0
                 for item in items:
-                    try:
-                        # 提取标题和内容
-                        title_elem = item.find('h2')
-                        if not title_elem:
-                            title_elem = item.find('a', attrs={'class': lambda x: x and 'title' in (x or '').lower()})
-                        
-                        content_elem = item.find('p', attrs={'class': lambda x: x and 'content' in (x or '').lower()})
-                        if not content_elem:
-                            content_elem = item.find('p')
-                        
-                        title = title_elem.get_text(strip=True) if title_elem else ""
-                        content = content_elem.get_text(strip=True) if content_elem else ""
-                        
-                        # 组合文本
-                        text = f"{title} {content}".strip()
-                        
-                        if len(text) < 20:
-                            continue
-                        
-                        # 过滤广告
-                        spam_keywords = ['推广', '广告', '购买', '链接']
-                        if any(kw in text for kw in spam_keywords):
-                            continue
-                        
-                        # 提取点赞数
-                        vote_elem = item.find('button', attrs={'class': lambda x: x and 'vote' in (x or '').lower()})
-                        votes = 0
-                        if vote_elem:
-                            try:
-                                votes = int(vote_elem.get_text())
-                            except:
-                                pass
-                        
-                        self.posts.append({
-                            'platform': 'zhihu',
-                            'keyword': keyword,
-                            'text': text[:500],
-                            'votes': votes,
-                            'collected_at': datetime.now().isoformat(),
-                            'source_url': url
-                        })
-                        count_this_page += 1
-                        
-                    except Exception as e:
+                    # 组合文本
+                    text = item['text']
+                    
+                    if len(text) < 20:
+                        continue
+                    
+                    # 过滤广告
+                    spam_keywords = ['推广', '广告', '购买', '链接']
+                    if any(kw in text for kw in spam_keywords):
                         continue
+                    
+                    self.posts.append(RawPost(
+                        platform='zhihu',
+                        keyword=keyword,
+                        text=text[:500],
+                        votes=parse_count(item['votes']),
+                        collected_at=datetime.now().isoformat(),
+                        source_url=url,
+                    ))
+                    count_this_page += 1
                 
+                self.posts.flush()
                 print(f"   ✓ 第{page}页：采集 {count_this_page} 条")
                 
-                # 延迟
-                time.sleep(random.uniform(2, 4))
-                
             except Exception as e:
                 print(f"   ❌ 出错：{str(e)}")
-                time.sleep(random.uniform(3, 7))
+                self.pacer.record(politeness.classify_error(e))
     
-    def save_to_json(self, filename='zhihu_raw_data.json'):
-        """保存为JSON"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.posts, f, ensure_ascii=False, indent=2)
-        print(f"✅ 已保存 {len(self.posts)} 条数据到 {filename}")
-        return filename
+    def save_shards(self):
+        """关闭原始数据分片（采集过程中已逐页写盘），返回分片路径"""
+        paths = self.posts.close()
+        politeness.save_state()
+        print(f"✅ 已保存 {len(self.posts)} 条数据到 {len(paths)} 个分片：{self.posts.writer.out_dir}")
+        return paths
     
     def save_to_csv(self, filename='zhihu_raw_data.csv'):
         """保存为CSV"""
@@ -157,7 +132,7 @@ class ZhihuSpider:
             print(f"   目前已采集：{len(self.posts)} 条")
         
         if self.posts:
-            self.save_to_json()
+            self.save_shards()
             self.save_to_csv()
             print("\n" + "=" * 60)
             print(f"📊 采集完成：共 {len(self.posts)} 条知乎内容")
@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+主动学习 - 把LLM标注蒸馏到本地批量分类器
+
+每一轮：
+1. 用 analysis_results.json 中的LLM标注训练本地多输出分类器
+   （字符n-gram 哈希/TF-IDF 特征 + 每个维度一个线性模型）
+2. 留出一部分LLM标注，报告本地分类器与LLM的一致率
+3. 向量化批量给未标注舆论打分（每秒数千条）
+4. 只把最不确定、或与风险词典判断不一致的舆论放进LLM队列
+5. 其余舆论中本地预测足够有把握的（min_local_confidence）写成本地标注，
+   auto_analyze.py 在 ACTIVE_LEARNING=1 时合并进 analysis_results.json，不再为它们调用LLM
+
+使用方法：
+    python active_learning.py
+
+输出（config.ACTIVE_LEARNING_CONFIG["output_dir"]）：
+    local_classifier.pkl      本地分类器
+    round_XXX.json            本轮准确率报告
+    llm_queue.json            需要送给LLM的舆论（auto_analyze.py 在 ACTIVE_LEARNING=1 时读取）
+    local_predictions.json    有把握的本地标注（与 analysis_results.json 记录格式相同，label_source="local_classifier"）
+"""
+
+import json
+import pickle
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import config
+from priority_scheduler import HIGH_RISK_LEVELS, lexicon_risk
+
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+AL_CONFIG = config.ACTIVE_LEARNING_CONFIG
+OUTPUT_DIR = Path(AL_CONFIG["output_dir"])
+MODEL_FILE = OUTPUT_DIR / "local_classifier.pkl"
+QUEUE_FILE = OUTPUT_DIR / "llm_queue.json"
+PREDICTIONS_FILE = OUTPUT_DIR / "local_predictions.json"
+
+ANALYSIS_FILE = config.ANALYSIS_DATA_DIR / "analysis_results.json"
+CLEAN_FILE = config.OUTPUT_CONFIG["clean_json_file"]
+
+# 本地标注的 label_source；训练和“已分析”判断只用LLM标注
+LOCAL_SOURCE = "local_classifier"
+
+# 维度 -> 置信度字段
+DIMENSIONS = {
+    "sentiment": "sentiment_confidence",
+    "topic": "topic_confidence",
+    "pattern": "pattern_confidence",
+    "risk_level": "risk_confidence",
+    "actor": "actor_confidence",
+}
+
+
+def primary_label(value):
+    """复合标签（如 'tax_policy|price_impact'）取第一个作为训练目标"""
+    return str(value).split('|')[0].strip() if value else "unknown"
+
+
+# ============================================================================
+# 本地分类器
+# ============================================================================
+
+class LocalOpinionClassifier:
+    """多输出本地分类器：共享字符n-gram特征，每个维度一个线性模型"""
+
+    def __init__(self, features=None, ngram_range=None, n_features=None):
+        self.features = features or AL_CONFIG["features"]
+        self.ngram_range = tuple(ngram_range or AL_CONFIG["ngram_range"])
+        self.n_features = n_features or AL_CONFIG["n_features"]
+        self.vectorizer = None
+        self.heads = {}      # 维度 -> 线性模型
+        self.constant = {}   # 只有一个类别的维度直接返回常数
+
+    def _make_vectorizer(self):
+        from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+
+        if self.features == "tfidf":
+            return TfidfVectorizer(analyzer='char_wb', ngram_range=self.ngram_range,
+                                   min_df=2, sublinear_tf=True)
+        return HashingVectorizer(analyzer='char_wb', ngram_range=self.ngram_range,
+                                 n_features=self.n_features, alternate_sign=False, norm='l2')
+
+    def fit(self, texts, labels):
+        """labels: dict 维度 -> 标签列表（与texts等长）"""
+        from sklearn.linear_model import LogisticRegression
+
+        self.vectorizer = self._make_vectorizer()
+        X = self.vectorizer.fit_transform(texts)
+
+        self.heads = {}
+        self.constant = {}
+        for dim, y in labels.items():
+            classes = set(y)
+            if len(classes) < 2:
+                self.constant[dim] = next(iter(classes)) if classes else "unknown"
+                continue
+            head = LogisticRegression(max_iter=1000, class_weight='balanced')
+            head.fit(X, y)
+            self.heads[dim] = head
+        return self
+
+    def predict_proba(self, texts, batch_size=None):
+        """批量打分
+
+        返回 dict 维度 -> (预测标签列表, 最大概率numpy数组, 概率矩阵或None)
+        """
+        import numpy as np
+
+        batch_size = batch_size or AL_CONFIG["batch_size"]
+        out = {dim: ([], [], []) for dim in DIMENSIONS}
+
+        for start in range(0, len(texts), batch_size):
+            X = self.vectorizer.transform(texts[start:start + batch_size])
+            n = X.shape[0]
+            for dim in DIMENSIONS:
+                labels, conf, probas = out[dim]
+                if dim in self.heads:
+                    head = self.heads[dim]
+                    proba = head.predict_proba(X)
+                    best = proba.argmax(axis=1)
+                    labels.extend(head.classes_[best].tolist())
+                    conf.append(proba.max(axis=1))
+                    probas.append(proba)
+                else:
+                    labels.extend([self.constant.get(dim, "unknown")] * n)
+                    conf.append(np.ones(n))
+
+        result = {}
+        for dim, (labels, conf, probas) in out.items():
+            conf = np.concatenate(conf) if conf else np.zeros(0)
+            probas = np.vstack(probas) if probas else None
+            result[dim] = (labels, conf, probas)
+        return result
+
+    def risk_probability(self, text):
+        """单条舆论的高风险概率（可作为 priority_scheduler 的预分类器）"""
+        head = self.heads.get("risk_level")
+        if head is None:
+            return 1.0 if self.constant.get("risk_level") in HIGH_RISK_LEVELS else 0.0
+        proba = head.predict_proba(self.vectorizer.transform([text]))[0]
+        return float(sum(p for c, p in zip(head.classes_, proba) if c in HIGH_RISK_LEVELS))
+
+    def save(self, path=MODEL_FILE):
+        # 只保存状态dict，避免脚本方式运行时类被记录为 __main__.LocalOpinionClassifier
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump({
+                "features": self.features,
+                "ngram_range": self.ngram_range,
+                "n_features": self.n_features,
+                "vectorizer": self.vectorizer,
+                "heads": self.heads,
+                "constant": self.constant,
+            }, f)
+
+    @classmethod
+    def load(cls, path=MODEL_FILE):
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        model = cls(state["features"], state["ngram_range"], state["n_features"])
+        model.vectorizer = state["vectorizer"]
+        model.heads = state["heads"]
+        model.constant = state["constant"]
+        return model
+
+
+# ============================================================================
+# 数据
+# ============================================================================
+
+def is_local(record):
+    """是否为本地分类器的标注"""
+    return record.get('label_source') == LOCAL_SOURCE
+
+
+def load_local_predictions():
+    """最近一轮的本地标注（没有时返回空列表）"""
+    if not PREDICTIONS_FILE.exists():
+        return []
+    with open(PREDICTIONS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f).get('data', [])
+
+
+def load_labeled():
+    """加载LLM标注：返回 (texts, labels_by_dim)（不含合并进来的本地标注）"""
+    with open(ANALYSIS_FILE, 'r', encoding='utf-8') as f:
+        records = json.load(f).get('data', [])
+    records = [r for r in records if r.get('source_text') and not is_local(r)]
+    texts = [r['source_text'] for r in records]
+    labels = {dim: [primary_label(r.get(dim)) for r in records] for dim in DIMENSIONS}
+    return texts, labels
+
+
+def load_unlabeled(labeled_texts):
+    """加载尚未被LLM标注的清洁舆论"""
+    with open(CLEAN_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    opinions = data if isinstance(data, list) else data.get('data', [])
+
+    seen = set(labeled_texts)
+    unlabeled = []
+    for op in opinions:
+        content = op.get('content') if isinstance(op, dict) else op
+        if content and content not in seen:
+            seen.add(content)
+            unlabeled.append(op if isinstance(op, dict) else {"content": op})
+    return unlabeled
+
+
+def _split(texts, labels, ratio, seed):
+    idx = list(range(len(texts)))
+    random.Random(seed).shuffle(idx)
+    n_test = int(len(idx) * ratio)
+    test, train = idx[:n_test], idx[n_test:]
+
+    def pick(ids):
+        return [texts[i] for i in ids], {d: [y[i] for i in ids] for d, y in labels.items()}
+
+    return pick(train), pick(test)
+
+
+# ============================================================================
+# 一轮主动学习
+# ============================================================================
+
+def evaluate(model, texts, labels):
+    """本地分类器与LLM标注的一致率"""
+    pred = model.predict_proba(texts)
+    report = {}
+    for dim in DIMENSIONS:
+        y_pred = pred[dim][0]
+        y_true = labels[dim]
+        correct = sum(1 for a, b in zip(y_pred, y_true) if a == b)
+        report[dim] = round(correct / len(y_true), 4) if y_true else None
+    all_correct = sum(
+        1 for i in range(len(texts))
+        if all(pred[d][0][i] == labels[d][i] for d in DIMENSIONS)
+    )
+    report["all_dimensions"] = round(all_correct / len(texts), 4) if texts else None
+    return report
+
+
+def select_queries(model, texts, query_size=None, disagreement_weight=None):
+    """给未标注舆论打分，返回 (查询下标列表, 预测结果, 吞吐量条/秒)
+
+    查询分 = 各维度平均不确定度(1-最大概率) + 权重 × 风险判断不一致程度
+    其中风险不一致 = |本地模型高风险概率 - 风险词典概率|
+    """
+    import numpy as np
+
+    query_size = query_size if query_size is not None else AL_CONFIG["query_size"]
+    disagreement_weight = (disagreement_weight if disagreement_weight is not None
+                           else AL_CONFIG["disagreement_weight"])
+
+    start = time.time()
+    pred = model.predict_proba(texts)
+    elapsed = time.time() - start
+    throughput = len(texts) / elapsed if elapsed > 0 else float('inf')
+
+    uncertainty = np.mean([1 - pred[d][1] for d in DIMENSIONS], axis=0)
+
+    risk_labels, _, risk_proba = pred["risk_level"]
+    head = model.heads.get("risk_level")
+    if head is not None:
+        high_cols = [i for i, c in enumerate(head.classes_) if c in HIGH_RISK_LEVELS]
+        model_risk = risk_proba[:, high_cols].sum(axis=1) if high_cols else np.zeros(len(texts))
+    else:
+        model_risk = np.array([1.0 if l in HIGH_RISK_LEVELS else 0.0 for l in risk_labels])
+    lexicon = np.array([lexicon_risk(t) for t in texts])
+    disagreement = np.abs(model_risk - lexicon)
+
+    query_score = uncertainty + disagreement_weight * disagreement
+    order = np.argsort(-query_score, kind='stable')
+    return order[:query_size].tolist(), pred, throughput
+
+
+def _next_round_number():
+    existing = sorted(OUTPUT_DIR.glob("round_*.json"))
+    if not existing:
+        return 1
+    return int(existing[-1].stem.split('_')[1]) + 1
+
+
+def run_round():
+    """执行一轮：训练 → 评估 → 打分 → 选样 → 写报告"""
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    round_no = _next_round_number()
+
+    print("=" * 70)
+    print(f"[START] Active learning round {round_no}")
+    print("=" * 70)
+
+    # 1. LLM标注
+    texts, labels = load_labeled()
+    print(f"[STEP1] LLM-labeled opinions: {len(texts)}")
+    if len(texts) < 20:
+        print("[ERR] Too few labeled opinions to train")
+        return None
+
+    # 2. 留出评估
+    (train_texts, train_labels), (test_texts, test_labels) = _split(
+        texts, labels, AL_CONFIG["holdout_ratio"], AL_CONFIG["random_state"])
+    t0 = time.time()
+    model = LocalOpinionClassifier().fit(train_texts, train_labels)
+    train_time = time.time() - t0
+    accuracy = evaluate(model, test_texts, test_labels)
+    print(f"[STEP2] Holdout accuracy vs LLM ({len(test_texts)} items):")
+    for dim, acc in accuracy.items():
+        print(f"  {dim:15s}: {acc:.1%}" if acc is not None else f"  {dim:15s}: n/a")
+
+    # 用全部标注重新训练
+    model = LocalOpinionClassifier().fit(texts, labels)
+    model.save()
+
+    # 3. 未标注舆论打分
+    unlabeled = load_unlabeled(texts)
+    unlabeled_texts = [op.get('content', '') for op in unlabeled]
+    print(f"[STEP3] Unlabeled opinions: {len(unlabeled_texts)}")
+
+    queries, pred, throughput = ([], None, 0.0)
+    if unlabeled_texts:
+        queries, pred, throughput = select_queries(model, unlabeled_texts)
+        print(f"  Scored at {throughput:,.0f} opinions/sec")
+
+    # 4. LLM队列 + 本地标注
+    query_set = set(queries)
+    with open(QUEUE_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            "round": round_no,
+            "created_at": datetime.now().isoformat(),
+            "total": len(queries),
+            "data": [unlabeled[i] for i in queries],
+        }, f, ensure_ascii=False, indent=2)
+
+    # 没把握的本地预测不写出：留给之后的轮次或LLM
+    min_confidence = AL_CONFIG["min_local_confidence"]
+    local_records = []
+    if pred is not None:
+        for i, text in enumerate(unlabeled_texts):
+            if i in query_set or min(float(pred[dim][1][i]) for dim in DIMENSIONS) < min_confidence:
+                continue
+            record = {}
+            for dim, conf_field in DIMENSIONS.items():
+                record[dim] = pred[dim][0][i]
+                record[conf_field] = round(float(pred[dim][1][i]), 2)
+            record["source_text"] = text
+            record["label_source"] = LOCAL_SOURCE
+            local_records.append(record)
+    with open(PREDICTIONS_FILE, 'w', encoding='utf-8') as f:
+        json.dump({"round": round_no, "total": len(local_records), "data": local_records},
+                  f, ensure_ascii=False, indent=2)
+    print(f"[STEP4] Queued {len(queries)} for LLM, {len(local_records)} labeled locally "
+          f"(min confidence {min_confidence})")
+
+    # 5. 报告
+    report = {
+        "round": round_no,
+        "created_at": datetime.now().isoformat(),
+        "features": model.features,
+        "n_labeled": len(texts),
+        "n_holdout": len(test_texts),
+        "holdout_accuracy": accuracy,
+        "train_seconds": round(train_time, 2),
+        "n_unlabeled": len(unlabeled_texts),
+        "n_queried": len(queries),
+        "n_local": len(local_records),
+        "throughput_per_sec": round(throughput, 1),
+    }
+    report_file = OUTPUT_DIR / f"round_{round_no:03d}.json"
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[OK] Report: {report_file}")
+
+    return report
+
+
+if __name__ == "__main__":
+    try:
+        import sklearn  # noqa: F401
+    except ImportError:
+        print("[ERR] scikit-learn not installed. Run: pip install scikit-learn")
+        sys.exit(1)
+
+    sys.exit(0 if run_round() else 1)
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+异步抓取引擎 - 关键词 × 页码并发抓取
+
+原来的采集器用阻塞的 requests.Session 逐页请求、每页之后 sleep 2-4 秒，
+完整跑一遍关键词需要几个小时。这里的引擎：
+- 每个主机单独限制并发数（HostPolicy.concurrency）
+- 礼貌延迟按主机计算：同一主机相邻两次请求的开始时间间隔由 politeness 的 AIMD
+  控制器决定（从 delay_min~delay_max 起步，响应正常时缩短，非200/验证码时退避），
+  不同主机互不影响
+- 关键词/页码一次性展开为请求列表，并发执行，结果按请求顺序返回
+
+有 aiohttp 时使用 aiohttp；没有时退回标准库 urllib（在线程池中执行），接口相同。
+设置 HTTP_CACHE=record/replay 时读写 http_cache 磁盘缓存（replay 完全不联网）。
+
+使用方法：
+    from async_fetcher import AsyncFetcher, HostPolicy, run_fetch
+
+    fetcher = AsyncFetcher({"s.weibo.com": HostPolicy(concurrency=2, delay_min=2, delay_max=4)})
+    results = run_fetch(fetcher, [(url, params), ...])
+    for r in results:
+        if r.ok:
+            parse(r.text)
+
+    # 增量采集：同一关键词按页顺序抓取，on_page 返回 False 时停止翻页
+    run_paginated(fetcher, url, keywords, num_pages, params_fn, on_page)
+"""
+
+import asyncio
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from urllib.parse import urlencode, urlparse
+
+import http_cache
+import politeness
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
+
+# 抓取结果：status 为 None 表示网络错误（error 中有原因）
+FetchResult = namedtuple("FetchResult", ["url", "status", "text", "elapsed", "error", "meta"])
+FetchResult.ok = property(lambda self: self.status == 200 and self.error is None)
+# 被采集边界（crawl_frontier）判定为已访问、未发出请求
+SKIPPED = "skipped (already visited)"
+FetchResult.skipped = property(lambda self: self.error == SKIPPED)
+
+
+class HostPolicy:
+    """单个主机的抓取策略"""
+
+    def __init__(self, concurrency=2, delay_min=2.0, delay_max=4.0, timeout=10, retry_times=3):
+        self.concurrency = concurrency
+        self.delay_min = delay_min
+        self.delay_max = delay_max
+        self.timeout = timeout
+        self.retry_times = retry_times
+
+    @classmethod
+    def from_crawl_config(cls, platform_config, concurrency=2):
+        """由 config.CRAWL_CONFIG[平台] 构造"""
+        return cls(
+            concurrency=concurrency,
+            delay_min=platform_config.get("delay_min", 2.0),
+            delay_max=platform_config.get("delay_max", 4.0),
+            timeout=platform_config.get("timeout", 10),
+            retry_times=platform_config.get("retry_times", 3),
+        )
+
+
+class _HostSlot:
+    """单个主机的并发信号量、自适应延迟和下一次允许请求的时间"""
+
+    def __init__(self, policy, pacer):
+        self.policy = policy
+        self.pacer = pacer
+        self.next_start = 0.0
+        self.bind()
+
+    def bind(self):
+        """新建信号量和锁：它们绑定在首次使用的事件循环上，每次 asyncio.run 都要重建"""
+        self.semaphore = asyncio.Semaphore(self.policy.concurrency)
+        self.lock = asyncio.Lock()
+
+    async def wait_turn(self):
+        """按礼貌延迟排队，返回后即可发出请求"""
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_start > now:
+                await asyncio.sleep(self.next_start - now)
+                now = self.next_start
+            self.next_start = now + self.pacer.next_delay()
+
+
+def build_url(url, params=None):
+    """拼接查询参数"""
+    if not params:
+        return url
+    sep = '&' if urlparse(url).query else '?'
+    return f"{url}{sep}{urlencode(params)}"
+
+
+class AsyncFetcher:
+    """按主机限流的异步抓取器"""
+
+    def __init__(self, policies=None, default_policy=None, headers=None, cache=None,
+                 frontier=None, persistent_urls=False):
+        self.policies = dict(policies or {})
+        self.default_policy = default_policy or HostPolicy()
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self.cache = cache if cache is not None else http_cache.from_env()
+        # 采集边界：已访问的URL不再抓取（persistent_urls=False 时只在本次运行内去重）
+        self.frontier = frontier
+        self.persistent_urls = persistent_urls
+        self._slots = {}
+        self.stats = {"requests": 0, "errors": 0, "retries": 0, "cache_hits": 0}
+
+    def _slot(self, host):
+        if host not in self._slots:
+            policy = self.policies.get(host, self.default_policy)
+            pacer = politeness.get_controller(host, policy.delay_min, policy.delay_max)
+            self._slots[host] = _HostSlot(policy, pacer)
+        return self._slots[host]
+
+    def _new_loop(self):
+        """每次 run_fetch/run_paginated 都在新的事件循环里运行：
+        重建各主机的信号量和锁，延迟控制器和下一次允许请求的时间保留"""
+        for slot in self._slots.values():
+            slot.bind()
+
+    def _visited(self, url):
+        """抓取成功后才登记到采集边界，失败的页面之后还能重试"""
+        if self.frontier is not None:
+            self.frontier.mark_visited(url, self.persistent_urls)
+
+    def feedback(self, url, outcome):
+        """调用方解析后发现异常（如空结果页）时反馈给该主机的延迟控制器"""
+        self._slot(urlparse(url).netloc).pacer.record(outcome)
+
+    # ------------------------------------------------------------------
+    # 传输层
+    # ------------------------------------------------------------------
+
+    def _urllib_get(self, url, timeout):
+        request = urllib.request.Request(url, headers=self.headers)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as resp:
+                return resp.status, resp.read().decode('utf-8', errors='replace')
+        except urllib.error.HTTPError as e:
+            return e.code, ""
+
+    async def _get(self, session, url, timeout):
+        if session is not None:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                return resp.status, await resp.text(encoding='utf-8', errors='replace')
+        return await asyncio.to_thread(self._urllib_get, url, timeout)
+
+    # ------------------------------------------------------------------
+    # 抓取
+    # ------------------------------------------------------------------
+
+    async def fetch(self, session, url, params=None, meta=None):
+        """抓取单个URL（遵守所在主机的并发和礼貌延迟，失败按策略重试）"""
+        full_url = build_url(url, params)
+
+        if self.frontier is not None and self.frontier.is_visited(full_url, self.persistent_urls):
+            return FetchResult(full_url, None, "", 0.0, SKIPPED, meta)
+
+        # 磁盘缓存：命中时不占用主机配额、不等待礼貌延迟
+        if self.cache is not None:
+            cached = self.cache.get(full_url)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                status, text = cached
+                self._visited(full_url)
+                return FetchResult(full_url, status, text, 0.0, None, meta)
+            if self.cache.replay:
+                return FetchResult(full_url, None, "", 0.0, "cache miss (replay)", meta)
+
+        slot = self._slot(urlparse(full_url).netloc)
+        policy = slot.policy
+        error = None
+        status = None
+
+        for attempt in range(policy.retry_times):
+            async with slot.semaphore:
+                await slot.wait_turn()
+                start = time.monotonic()
+                self.stats["requests"] += 1
+                try:
+                    status, text = await self._get(session, full_url, policy.timeout)
+                    outcome = politeness.classify(status, text)
+                    slot.pacer.record(outcome)
+                    if outcome == politeness.OK:
+                        if self.cache is not None:
+                            self.cache.put(full_url, status, text)
+                        self._visited(full_url)
+                        return FetchResult(full_url, status, text, time.monotonic() - start, None, meta)
+                    error = "captcha" if outcome == politeness.CAPTCHA else f"HTTP {status}"
+                except Exception as e:
+                    slot.pacer.record(politeness.ERROR)
+                    status, error = None, str(e)
+            if attempt + 1 < policy.retry_times:
+                self.stats["retries"] += 1
+
+        self.stats["errors"] += 1
+        return FetchResult(full_url, status, "", 0.0, error, meta)
+
+    async def _paginate(self, session, base_url, keyword, num_pages, params_fn, on_page):
+        for page in range(1, num_pages + 1):
+            result = await self.fetch(session, base_url, params_fn(keyword, page), (keyword, page))
+            if on_page(result) is False:
+                break
+
+    async def fetch_paginated(self, base_url, keywords, num_pages, params_fn, on_page):
+        """关键词之间并发、同一关键词内按页顺序抓取
+
+        每页抓完调用 on_page(result)，返回 False 时停止该关键词的翻页
+        （增量采集碰到已见内容时使用）。
+        """
+        self._new_loop()
+        jobs = lambda session: [self._paginate(session, base_url, k, num_pages, params_fn, on_page)
+                                for k in keywords]
+        if HAS_AIOHTTP:
+            async with aiohttp.ClientSession(headers=self.headers) as session:
+                await asyncio.gather(*jobs(session))
+        else:
+            await asyncio.gather(*jobs(None))
+
+    async def fetch_all(self, requests):
+        """并发抓取 [(url, params, meta), ...]，结果按请求顺序返回"""
+        self._new_loop()
+        requests = [r if len(r) == 3 else (r[0], r[1], None) for r in requests]
+        if HAS_AIOHTTP:
+            async with aiohttp.ClientSession(headers=self.headers) as session:
+                return await asyncio.gather(*(self.fetch(session, u, p, m) for u, p, m in requests))
+        return await asyncio.gather(*(self.fetch(None, u, p, m) for u, p, m in requests))
+
+
+def keyword_page_requests(base_url, keywords, num_pages, params_fn):
+    """关键词 × 页码展开为请求列表
+
+    params_fn(keyword, page) 返回查询参数dict；meta 为 (keyword, page)
+    """
+    return [
+        (base_url, params_fn(keyword, page), (keyword, page))
+        for keyword in keywords
+        for page in range(1, num_pages + 1)
+    ]
+
+
+def run_fetch(fetcher, requests):
+    """同步入口：在新的事件循环里执行 fetch_all"""
+    return asyncio.run(fetcher.fetch_all(requests))
+
+
+def run_paginated(fetcher, base_url, keywords, num_pages, params_fn, on_page):
+    """同步入口：在新的事件循环里执行 fetch_paginated"""
+    asyncio.run(fetcher.fetch_paginated(base_url, keywords, num_pages, params_fn, on_page))
@@ -17,10 +17,15 @@ import json
 import os
 import subprocess
 import time
+from collections import defaultdict
 from pathlib import Path
 from datetime import datetime
 import sys
 
+import config
+from compact_protocol import COMPACT_SYSTEM_PROMPT, CompactDecodeError, decode_compact_response
+from priority_scheduler import PriorityWorkQueue, RiskCoverageTracker
+
 # 配置
 PROJECT_ROOT = Path(__file__).parent
 DATA_DIR = PROJECT_ROOT / "data"
@@ -28,6 +33,21 @@ CLEAN_DATA_FILE = DATA_DIR / "clean" / "opinions_clean_5000.json"
 ANALYSIS_FILE = DATA_DIR / "analysis" / "analysis_results.json"
 ZHIPU_API_KEY = os.getenv("ZHIPU_API_KEY")  # 从环境变量读取
 
+# 主动学习模式（设置环境变量 ACTIVE_LEARNING=1 启用）：
+# 只把 active_learning.py 选出的不确定舆论送给LLM，并用本地分类器做风险预排序；
+# 本地分类器有把握的预测（local_predictions.json）直接合并，不再调用LLM
+ACTIVE_LEARNING_MODE = os.getenv("ACTIVE_LEARNING", "0") == "1"
+
+# 分层抽样模式（config.SAMPLING_CONFIG["enabled"] 或环境变量 SAMPLING=1）：
+# 在预算内抽取分层样本标注，仪表盘显示外推估计和置信区间
+SAMPLING_MODE = config.SAMPLING_CONFIG["enabled"] or os.getenv("SAMPLING", "0") == "1"
+
+# 紧凑响应协议（设置环境变量 COMPACT_PROTOCOL=1 启用）
+COMPACT_MODE = os.getenv("COMPACT_PROTOCOL", "0") == "1"
+
+# 由 pipeline_orchestrator.py 调度时设置 SKIP_GIT_PUSH=1，推送交给 publish 阶段
+SKIP_GIT_PUSH = os.getenv("SKIP_GIT_PUSH", "0") == "1"
+
 def load_clean_opinions():
     """加载已清理的原始意见"""
     print("📥 加载原始意见数据...")
@@ -54,8 +74,9 @@ def find_new_opinions(clean_opinions, analyzed_results):
     """找出未分析的意见"""
     print("🔍 检查未分析的意见...")
     
-    # 已分析的source_text集合
-    analyzed_texts = {r.get('source_text') for r in analyzed_results if r.get('source_text')}
+    # 已由LLM分析的source_text集合（本地分类器的标注不算，之后仍可送LLM）
+    analyzed_texts = {r.get('source_text') for r in analyzed_results
+                      if r.get('source_text') and r.get('label_source') != 'local_classifier'}
     
     # 找出未分析的意见
     # clean_opinions中的每条是字典，包含'content'字段
@@ -66,7 +87,10 @@ def find_new_opinions(clean_opinions, analyzed_results):
         if content and content not in analyzed_texts:
             new_opinions.append(op)
     
-    analyzed_count = len(analyzed_results)
+    if ACTIVE_LEARNING_MODE:
+        new_opinions = restrict_to_active_learning_queue(new_opinions)
+    
+    analyzed_count = sum(1 for r in analyzed_results if r.get('label_source') != 'local_classifier')
     new_count = len(new_opinions)
     total_count = len(clean_opinions)
     
@@ -77,6 +101,27 @@ def find_new_opinions(clean_opinions, analyzed_results):
     
     return new_opinions
 
+def restrict_to_active_learning_queue(new_opinions):
+    """主动学习模式：只保留本轮LLM队列中的意见"""
+    from active_learning import QUEUE_FILE, MODEL_FILE, LocalOpinionClassifier
+    from priority_scheduler import set_risk_classifier
+    
+    if not QUEUE_FILE.exists():
+        print("   ⚠️  未找到主动学习队列，请先运行: python active_learning.py")
+        return new_opinions
+    
+    with open(QUEUE_FILE, 'r', encoding='utf-8') as f:
+        queue = json.load(f).get('data', [])
+    queued_texts = {op.get('content') if isinstance(op, dict) else op for op in queue}
+    
+    if MODEL_FILE.exists():
+        set_risk_classifier(LocalOpinionClassifier.load().risk_probability)
+    
+    selected = [op for op in new_opinions
+                if (op.get('content') if isinstance(op, dict) else op) in queued_texts]
+    print(f"   主动学习队列: {len(selected)}/{len(new_opinions)} 条送LLM，其余由本地分类器标注")
+    return selected
+
 def call_zhipu_api_single(opinion_text, api_key):
     """调用单条Zhipu API"""
     try:
@@ -102,7 +147,7 @@ def call_zhipu_api_single(opinion_text, api_key):
         response = client.chat.completions.create(
             model="glm-4-flash",
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": COMPACT_SYSTEM_PROMPT if COMPACT_MODE else system_prompt},
                 {"role": "user", "content": f"分析这条舆论：{opinion_text}"}
             ],
             temperature=0.3,
@@ -111,6 +156,13 @@ def call_zhipu_api_single(opinion_text, api_key):
         
         result_text = response.choices[0].message.content
         
+        if COMPACT_MODE:
+            try:
+                return decode_compact_response(result_text)
+            except CompactDecodeError as e:
+                print(f"   ⚠️  紧凑响应解析失败: {e}")
+                return None
+        
         # 提取JSON (可能被markdown代码块包装)
         if "```" in result_text:
             start = result_text.find('\n') + 1
@@ -142,15 +194,25 @@ def analyze_with_zhipu(opinions_batch):
     analyzed = []
     cost = 0  # 简化处理，不计算精确成本
     
-    for idx, opinion in enumerate(opinions_batch, 1):
+    # 按优先级派发：关键词/长度/平台/风险词典打分，高风险可能性大的先分析
+    tracker = RiskCoverageTracker()
+    queue = PriorityWorkQueue(opinions_batch)
+    
+    for idx, (pos, opinion, _) in enumerate(queue.drain(), 1):
         # 从opinion中提取content（如果是字典）
         opinion_text = opinion.get('content') if isinstance(opinion, dict) else opinion
         
         result = call_zhipu_api_single(opinion_text, api_key)
+        tracker.record(result)
         
         if result:
             result['source_text'] = opinion_text
-            analyzed.append(result)
+            # 抽样模式下保留分层信息，用于外推估计
+            if isinstance(opinion, dict):
+                for key in ('stratum', 'stratum_population'):
+                    if key in opinion:
+                        result[key] = opinion[key]
+            analyzed.append((pos, result))
             status = "✓"
         else:
             status = "✗"
@@ -163,18 +225,38 @@ def analyze_with_zhipu(opinions_batch):
         if idx % 50 == 0:
             time.sleep(3)
     
+    # 优先级只决定派发顺序，合并进结果文件时仍按原始顺序
+    analyzed = [result for _, result in sorted(analyzed, key=lambda x: x[0])]
     print(f"   ✓ 完成 {len(analyzed)}/{len(opinions_batch)}")
+    coverage = tracker.summary()
+    if coverage['time_to_first_critical'] is not None:
+        print(f"   ⏱️  首条严重风险舆论标注耗时: {coverage['time_to_first_critical']:.1f}s")
+    if coverage['time_to_first_high_risk'] is not None:
+        print(f"   ⏱️  首条高风险舆论标注耗时: {coverage['time_to_first_high_risk']:.1f}s")
     return analyzed, cost
 
 def merge_results(old_results, new_analyzed):
-    """合并旧结果和新分析结果"""
+    """合并旧结果和新分析结果
+    
+    LLM标注取代同一条意见的本地标注；主动学习模式下换上最近一轮的本地标注。
+    """
     print("\n📊 合并分析结果...")
-    merged = old_results + new_analyzed
-    print(f"   ✓ 总共 {len(merged)} 条分析结果")
+    llm_results = [r for r in old_results if r.get('label_source') != 'local_classifier'] + new_analyzed
+    llm_texts = {r.get('source_text') for r in llm_results}
+    
+    if ACTIVE_LEARNING_MODE:
+        from active_learning import load_local_predictions
+        local = load_local_predictions()
+    else:
+        local = [r for r in old_results if r.get('label_source') == 'local_classifier']
+    local = [r for r in local if r.get('source_text') not in llm_texts]
+    
+    merged = llm_results + local
+    print(f"   ✓ 总共 {len(merged)} 条分析结果（其中本地分类器标注 {len(local)} 条）")
     return merged
 
-def save_results(results):
-    """保存结果到JSON"""
+def save_results(results, sampling=None):
+    """保存结果到JSON（抽样模式下附带抽样说明）"""
     print("💾 保存结果到文件...")
     
     # 确保目录存在
@@ -187,6 +269,8 @@ def save_results(results):
         'last_updated': datetime.now().isoformat(),
         'data': results
     }
+    if sampling:
+        output_data['sampling'] = sampling
     
     with open(ANALYSIS_FILE, 'w', encoding='utf-8') as f:
         json.dump(output_data, f, ensure_ascii=False, indent=2)
@@ -195,6 +279,9 @@ def save_results(results):
 
 def git_commit_and_push():
     """自动提交和推送到GitHub"""
+    if SKIP_GIT_PUSH:
+        print("\n📤 跳过推送（由管道编排器负责）")
+        return True
     print("\n📤 推送到GitHub...")
     
     try:
@@ -234,6 +321,48 @@ def print_summary(analyzed_count, total_cost):
     print("\n✨ 数据已更新！")
     print("访问网站查看最新分析：https://tax-opinion-dashboard-atbvxazynv7jcjpsjhdvzh.streamlit.app/")
 
+def run_sampled_labeling(clean_opinions, analyzed_results):
+    """抽样标注模式：只标注分层样本，已有标注直接复用
+    
+    已有的全部标注都保留在 analysis_results.json 中，只给本次样本对应的记录打上
+    stratum / stratum_population（旧的分层标记先清掉），仪表盘只用带标记的记录做外推。
+    
+    返回 (本次新分析条数, 成本)
+    """
+    from stratified_sampling import draw_stratified_sample, sampling_metadata
+    
+    print("\n🎯 分层抽样标注模式")
+    sample = draw_stratified_sample(clean_opinions)
+    print(f"   语料 {len(clean_opinions)} 条，预算 {config.SAMPLING_CONFIG['budget']}，"
+          f"抽样 {len(sample)} 条（{len({s['stratum'] for s in sample})} 层）")
+    
+    pending = defaultdict(list)
+    for item in sample:
+        pending[item.get('content')].append(item)
+    
+    results = []
+    reused = 0
+    for old in analyzed_results:
+        record = {k: v for k, v in old.items() if k not in ('stratum', 'stratum_population')}
+        # 本地分类器的标注不能充当样本标注
+        items = pending.get(record.get('source_text')) if record.get('label_source') != 'local_classifier' else None
+        if items:
+            item = items.pop()
+            record['stratum'] = item['stratum']
+            record['stratum_population'] = item['stratum_population']
+            reused += 1
+        results.append(record)
+    to_label = [item for items in pending.values() for item in items]
+    print(f"   复用已有标注 {reused} 条，需调用LLM {len(to_label)} 条")
+    
+    new_analyzed, cost = analyze_with_zhipu(to_label) if to_label else ([], 0)
+    new_texts = {r.get('source_text') for r in new_analyzed}
+    results = [r for r in results
+               if r.get('label_source') != 'local_classifier' or r.get('source_text') not in new_texts]
+    
+    save_results(results + new_analyzed, sampling=sampling_metadata(sample, len(clean_opinions)))
+    return len(new_analyzed), cost
+
 def main():
     """主流程"""
     print("\n" + "="*60)
@@ -245,6 +374,12 @@ def main():
         clean_opinions = load_clean_opinions()
         analyzed_results = load_analyzed_results()
         
+        if SAMPLING_MODE:
+            new_count, cost = run_sampled_labeling(clean_opinions, analyzed_results)
+            git_commit_and_push()
+            print_summary(new_count, cost)
+            return
+        
         # 2. 检查未分析意见
         new_opinions = find_new_opinions(clean_opinions, analyzed_results)
         
@@ -277,7 +412,7 @@ def main():
         
         if git_success:
             print("\n💡 下次更新提示：")
-            print("   • 每周一次：cron "0 10 * * 1 python auto_analyze.py"（Linux/Mac）")
+            print('   • 每周一次：cron "0 10 * * 1 python auto_analyze.py"（Linux/Mac）')
             print("   • Windows任务计划：见 SCHEDULE_TASKS.md")
         
     except Exception as e:
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+清洁引擎基准测试 - 每条规则、每个配置的吞吐量（条/秒）
+
+语料：data/clean/opinions_clean_5000.json（没有时用示例文本），可用 --copies 放大；
+每条随机加上空白、控制字符、URL、emoji 或垃圾词，让每条规则都有命中。
+
+对比：
+    rules     每条规则：改造前的逐条实现 vs cleaning_engine 的整批实现
+    profiles  每个配置（merge / simple / step1 / pipeline）端到端，单进程
+
+每条规则两种实现的结果逐条比对，必须完全一致。
+
+使用方法：
+    python benchmark_cleaning_engine.py
+    python benchmark_cleaning_engine.py --copies 20 --repeat 5
+"""
+
+import argparse
+import random
+import re
+import time
+
+from benchmark_crawler import load_texts
+from cleaning_engine import (PROFILES, CleaningEngine, ads_free, chinese_ratio_ok, keywords_free,
+                             length_ok, normalize_batch, preclean_batch)
+from text_normalizer import AD_KEYWORDS, SPAM_KEYWORDS, SPAM_MATCHER, AD_MATCHER, URL_RE
+
+NOISE = ["", "", " \t ", "\x00\u200b", " http://t.cn/abc 😀", " [哈哈]", " 扫码领优惠，扫码", " 🔥转发"]
+
+
+# ============================================================================
+# 改造前的逐条实现（照搬自各清洁脚本）
+# ============================================================================
+
+def before_preclean(text):
+    text = ' '.join(text.split())
+    text = ''.join(c for c in text if c.isprintable())
+    return text[:500].strip()
+
+
+def before_length(text):
+    return 10 <= len(text) <= 500
+
+
+def before_chinese(text):
+    chinese_count = sum(1 for c in text if '\u4e00' <= c <= '\u9fff')
+    return chinese_count >= len(text) * 0.3
+
+
+def before_spam(text):
+    return not any(kw in text for kw in SPAM_KEYWORDS)
+
+
+def before_ads(text):
+    for ad_kw in AD_KEYWORDS:
+        if ad_kw in text:
+            if text.count(ad_kw) > 1 or len(text) < 20:
+                return False
+    return True
+
+
+def before_normalize(text):
+    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+    text = re.sub(r'[\U0001F300-\U0001F9FF]|[\u2600-\u27BF]', '', text)
+    text = re.sub(r'\[.*?\]', '', text)
+    return ' '.join(text.split())
+
+
+RULE_CASES = [
+    ("preclean", before_preclean, lambda t: preclean_batch(t, 500)),
+    ("length", before_length, lambda t: length_ok(t, 10, 500)),
+    ("chinese", before_chinese, lambda t: chinese_ratio_ok(t, 0.3)),
+    ("spam", before_spam, lambda t: keywords_free(t, SPAM_MATCHER)),
+    ("ads", before_ads, lambda t: ads_free(t, AD_MATCHER)),
+    ("normalize", before_normalize, lambda t: normalize_batch(t, URL_RE)),
+]
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def make_corpus(copies, seed=42):
+    rng = random.Random(seed)
+    return [t + rng.choice(NOISE) for t in load_texts() * copies]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="清洁引擎基准测试")
+    parser.add_argument("--copies", type=int, default=10, help="语料重复次数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最快一次）")
+    args = parser.parse_args()
+
+    texts = make_corpus(args.copies)
+    print(f"[INFO] {len(texts)} documents, avg {sum(map(len, texts)) / len(texts):.0f} chars")
+
+    identical = True
+    print(f"\n{'rule':12s} {'before docs/s':>14} {'after docs/s':>14} {'speedup':>8}")
+    for name, before_fn, after_fn in RULE_CASES:
+        before, before_result = best_of(args.repeat, lambda: [before_fn(t) for t in texts])
+        after, after_result = best_of(args.repeat, lambda: after_fn(texts))
+        if before_result != after_result:
+            print(f"[WARN] {name}: results differ")
+            identical = False
+        print(f"{name:12s} {len(texts) / before:>14,.0f} {len(texts) / after:>14,.0f} {before / after:>7.1f}x")
+
+    posts = [{"text": t, "content": t, "platform": "weibo"} for t in texts]
+    print(f"\n{'profile':12s} {'docs/s':>14} {'kept':>8}")
+    for name, rules in PROFILES.items():
+        elapsed, kept = best_of(args.repeat, lambda: list(CleaningEngine(rules).clean(posts)))
+        print(f"{name:12s} {len(posts) / elapsed:>14,.0f} {len(kept):>8,}")
+
+    if identical:
+        print("[OK] Batched rules match the per-record implementations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+抓取引擎基准测试 - 本地HTTP夹具服务器
+
+在本机启动两个HTTP服务器（模拟 s.weibo.com 和 www.zhihu.com 两个主机），
+返回搜索结果页（默认用 data/clean 里的舆论生成微博/知乎结构的页面，
+也可以用 --fixtures 指定录制好的 HTML 目录），每个请求人为加上网络延迟。
+
+对比：
+    sequential  原采集器的方式：逐页阻塞请求，每页后等待礼貌延迟
+    async       async_fetcher：关键词×页码并发，按主机限流和礼貌延迟（同时录制到临时缓存）
+    replay      从 http_cache 回放刚录制的页面，不联网
+
+使用方法：
+    python benchmark_crawler.py
+    python benchmark_crawler.py --keywords 9 --pages 5 --latency 0.2 --delay 0.1 --concurrency 4
+    python benchmark_crawler.py --fixtures path/to/recorded_html/
+"""
+
+import argparse
+import html
+import json
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from async_fetcher import AsyncFetcher, HostPolicy, build_url, keyword_page_requests, run_fetch
+from http_cache import HttpCache
+
+CLEAN_JSON = Path(__file__).parent / "data" / "clean" / "opinions_clean_5000.json"
+POSTS_PER_PAGE = 10
+
+
+# ============================================================================
+# 夹具页面
+# ============================================================================
+
+def load_texts():
+    if CLEAN_JSON.exists():
+        with open(CLEAN_JSON, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        items = data if isinstance(data, list) else data.get("data", [])
+        texts = [i.get("content", "") if isinstance(i, dict) else str(i) for i in items]
+        if texts:
+            return texts
+    return [f"跨境电商税收政策讨论示例文本第{i}条，9610备案和增值税补缴问题" for i in range(200)]
+
+
+def weibo_page(texts):
+    body = "".join(f'<div class="card-wrap"><div class="mbrank"><p class="txt">{html.escape(t)}</p>'
+                   f'<span class="like">{i}</span></div></div>' for i, t in enumerate(texts))
+    return f"<html><body>{body}</body></html>"
+
+
+def zhihu_page(texts):
+    body = "".join(f'<div class="SearchResult-Card"><h2>{html.escape(t[:20])}</h2><p>{html.escape(t)}</p></div>'
+                   for t in texts)
+    return f"<html><body>{body}</body></html>"
+
+
+class FixtureStore:
+    """按 (关键词, 页码) 返回固定页面"""
+
+    def __init__(self, fixtures_dir=None):
+        self.recorded = sorted(Path(fixtures_dir).glob("*.html")) if fixtures_dir else []
+        self.texts = load_texts()
+
+    def page(self, kind, keyword, page):
+        if self.recorded:
+            path = self.recorded[(hash(keyword) + page) % len(self.recorded)]
+            return path.read_text(encoding='utf-8')
+        start = (abs(hash(keyword)) * 7 + page * POSTS_PER_PAGE) % max(1, len(self.texts) - POSTS_PER_PAGE)
+        chunk = self.texts[start:start + POSTS_PER_PAGE]
+        return weibo_page(chunk) if kind == "weibo" else zhihu_page(chunk)
+
+
+def start_server(kind, store, latency):
+    """启动夹具服务器，返回 (server, base_url)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            keyword = query.get("q", [""])[0]
+            page = int(query.get("page", ["1"])[0])
+            time.sleep(latency)
+            body = store.page(kind, keyword, page).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    path = "/weibo" if kind == "weibo" else "/search"
+    return server, f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+# ============================================================================
+# 两种抓取方式
+# ============================================================================
+
+def build_requests(weibo_url, zhihu_url, keywords, pages):
+    return (keyword_page_requests(weibo_url, keywords, pages,
+                                  lambda k, p: {'q': k, 'typeall': 1, 'suball': 1, 'page': p})
+            + keyword_page_requests(zhihu_url, keywords, pages,
+                                    lambda k, p: {'type': 'content', 'q': k, 'page': p}))
+
+
+def run_sequential(requests, delay):
+    """原实现：逐页阻塞请求 + 每页后固定等待"""
+    total_bytes = 0
+    for url, params, _ in requests:
+        with urllib.request.urlopen(build_url(url, params), timeout=10) as resp:
+            total_bytes += len(resp.read())
+        time.sleep(delay)
+    return len(requests), total_bytes
+
+
+def run_async(requests, delay, concurrency, cache):
+    hosts = {urlparse(u).netloc for u, _, _ in requests}
+    policy = HostPolicy(concurrency=concurrency, delay_min=delay, delay_max=delay, retry_times=1)
+    fetcher = AsyncFetcher({h: policy for h in hosts}, cache=cache)
+    results = run_fetch(fetcher, requests)
+    ok = [r for r in results if r.ok]
+    return len(ok), sum(len(r.text.encode('utf-8')) for r in ok)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抓取引擎基准测试")
+    parser.add_argument("--keywords", type=int, default=9, help="关键词数")
+    parser.add_argument("--pages", type=int, default=3, help="每个关键词的页数")
+    parser.add_argument("--latency", type=float, default=0.2, help="夹具服务器每个请求的延迟（秒）")
+    parser.add_argument("--delay", type=float, default=0.05, help="礼貌延迟（秒，原实现为2-4秒，这里等比例缩小）")
+    parser.add_argument("--concurrency", type=int, default=4, help="每个主机的并发数")
+    parser.add_argument("--fixtures", help="录制好的HTML页面目录")
+    args = parser.parse_args()
+
+    store = FixtureStore(args.fixtures)
+    weibo_server, weibo_url = start_server("weibo", store, args.latency)
+    zhihu_server, zhihu_url = start_server("zhihu", store, args.latency)
+    keywords = [f"关键词{i}" for i in range(args.keywords)]
+    requests = build_requests(weibo_url, zhihu_url, keywords, args.pages)
+
+    print(f"[INFO] {len(requests)} pages across 2 hosts, latency={args.latency}s, "
+          f"delay={args.delay}s, concurrency/host={args.concurrency}")
+    print(f"{'engine':12s} {'pages':>6} {'seconds':>8} {'pages/s':>8} {'KB':>8}")
+
+    cache_dir = tempfile.TemporaryDirectory()
+    rows = {}
+    for name, fn in [("sequential", lambda: run_sequential(requests, args.delay)),
+                     ("async", lambda: run_async(requests, args.delay, args.concurrency,
+                                                 HttpCache(cache_dir.name, "record"))),
+                     ("replay", lambda: run_async(requests, args.delay, args.concurrency,
+                                                  HttpCache(cache_dir.name, "replay")))]:
+        start = time.perf_counter()
+        pages, size = fn()
+        elapsed = time.perf_counter() - start
+        rows[name] = elapsed
+        print(f"{name:12s} {pages:>6} {elapsed:>8.2f} {pages / elapsed:>8.1f} {size / 1024:>8.0f}")
+
+    print(f"[OK] Speedup: {rows['sequential'] / rows['async']:.1f}x")
+    weibo_server.shutdown()
+    zhihu_server.shutdown()
+    cache_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+看板数据函数基准测试 - streamlit_app/utils/data_loader.py 各公开函数在 10k/100k/1M 行上的耗时和内存
+
+data_loader 里的统计函数只在 2,297 行的真实数据上跑过。这里脱离 Streamlit 运行：
+    - 数据：generate_synthetic_corpus.SyntheticCorpus 生成的分析结果（标签分布、组合标签、
+      正文长度与真实数据一致），每个规模流式写成 analysis_results.json，
+      再用 load_analysis_data 读入（与看板相同的加载路径，load_analysis_data 本身也计入结果）
+    - 函数：自动列出 data_loader 的全部公开函数，按 CALLS 里的参数调用；
+      没有调用方式的新函数会提示补上，不会被悄悄漏掉
+    - @st.cache_data 函数通过 __wrapped__ 调用原函数，测的是缓存未命中时的计算本身
+    - 耗时：取 --repeat 次中最快的一次（单次超过 1 秒的只跑一次）；峰值内存用 tracemalloc 另测一遍
+    - 输出扩展表：每个规模的耗时和峰值内存，以及最小到最大规模的增长指数
+      （1.0 为线性，超过 SUPERLINEAR 的标 !）
+    - --save 保存结果，--baseline 与之前保存的结果对比，最大规模下变慢超过 REGRESSION 的标 !
+
+需要 pandas 和 streamlit（与看板相同的依赖）。load_analysis_data 整体 json.load，
+1M 行时峰值约 5GB（tracemalloc 还要额外开销），内存不够时用 --memory-max-rows 只在小规模上测内存。
+
+使用方法：
+    python benchmark_data_loader.py
+    python benchmark_data_loader.py --sizes 10000 100000 --only get_topic_statistics search_by_keyword
+    python benchmark_data_loader.py --memory-max-rows 100000
+    python benchmark_data_loader.py --save bench_data_loader.json
+    python benchmark_data_loader.py --baseline bench_data_loader.json
+"""
+
+import argparse
+import inspect
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+from types import SimpleNamespace
+
+import streamlit.logger
+
+# 脱离 Streamlit 运行时 @st.cache_data 会对每个函数警告 "No runtime found"
+streamlit.logger.set_log_level("error")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'streamlit_app'))
+
+from utils import data_loader  # noqa: E402
+
+from generate_synthetic_corpus import CorpusProfile, SyntheticCorpus, analysis_json_writer  # noqa: E402
+
+SIZES = [10_000, 100_000, 1_000_000]
+SUPERLINEAR = 1.15      # 增长指数超过它视为超线性
+REGRESSION = 1.2        # 比基线慢 20% 以上视为退化
+SLOW_CALL = 1.0         # 单次超过 1 秒的函数不重复跑
+MIN_SECONDS = 0.05      # 最大规模下快于它的函数不判断超线性 / 退化（计时噪声）
+
+# 函数名 -> 由测试数据得到调用参数（在计时之外准备）
+CALLS = {
+    "get_sentiment_distribution": lambda fx: (fx.df,),
+    "get_topic_distribution": lambda fx: (fx.df,),
+    "get_risk_distribution": lambda fx: (fx.df,),
+    "get_actor_distribution": lambda fx: (fx.df,),
+    "get_pattern_distribution": lambda fx: (fx.df,),
+    "get_confidence_stats": lambda fx: (fx.df,),
+    "filter_by_sentiment": lambda fx: (fx.df, "negative"),
+    "filter_by_risk": lambda fx: (fx.df, "high"),
+    "search_by_keyword": lambda fx: (fx.df, "增值税"),
+    "get_sample_opinions": lambda fx: (fx.df, "negative", "high"),
+    "get_all_distributions": lambda fx: (fx.df,),
+    "get_cross_analysis": lambda fx: (fx.df, "risk_level", "sentiment"),
+    "get_high_risk_subset": lambda fx: (fx.df,),
+    "get_top_n_by_count": lambda fx: (fx.df["topic"],),
+    "get_actors_split_statistics": lambda fx: (fx.df,),
+    "get_actors_sentiment_cross": lambda fx: (fx.df,),
+    "get_actors_risk_cross": lambda fx: (fx.df,),
+    "get_actors_topic_cross": lambda fx: (fx.df,),
+    "get_high_risk_analysis": lambda fx: (fx.df,),
+    "get_topic_statistics": lambda fx: (fx.df,),
+    "get_quick_stats": lambda fx: (fx.df,),
+    "get_topic_comparison_data": lambda fx: (fx.df, ["tax_policy", "business_risk", "compliance"]),
+    "get_actor_statistics_summary": lambda fx: (fx.df,),
+    "get_actor_segment_analysis": lambda fx: (fx.df, ["enterprise", "cross_border_seller"]),
+    "get_policy_analysis": lambda fx: (fx.df,),
+    "get_risk_segment_analysis": lambda fx: (fx.df,),
+    "get_stratified_sample": lambda fx: (fx.sampled,),
+    "is_sampled_data": lambda fx: (fx.sampled,),
+    "get_population_size": lambda fx: (fx.sampled,),
+    "get_extrapolated_distribution": lambda fx: (fx.sampled, "sentiment"),
+    "get_extrapolated_share": lambda fx: (fx.sampled, "risk_level", ["critical", "high"]),
+}
+
+LOADER = "load_analysis_data"   # 读入生成的 JSON，得到其余函数使用的 DataFrame
+
+# 单值翻译函数，与数据规模无关
+SKIP = ("translate_risk", "translate_topic", "translate_actor", "translate_sentiment")
+
+
+def public_functions():
+    """data_loader 中定义的公开函数（含 @st.cache_data 包装的）"""
+    functions = {}
+    for name, obj in vars(data_loader).items():
+        func = getattr(obj, "__wrapped__", obj)
+        if name.startswith("_") or not inspect.isfunction(func) or func.__module__ != data_loader.__name__:
+            continue
+        functions[name] = func
+    return functions
+
+
+def generate_json(profile, size, path, seed=42):
+    """流式写出 size 条合成分析结果（analysis_results.json 格式）；同一 seed 下小规模是大规模的前缀"""
+    corpus = SyntheticCorpus(profile, seed=seed)
+    with analysis_json_writer(path, seed) as writer:
+        writer.write_many(result for _, result in corpus.generate(size))
+
+
+def sampled_frame(df):
+    """分层抽样模式的数据：按 情感×风险 分层，每层假设抽样比例 5%
+
+    外推函数只用到标签列，不复制正文列。
+    """
+    sampled = df[["sentiment", "topic", "risk_level", "actor", "pattern"]].copy()
+    sampled["stratum"] = sampled["sentiment"].astype(str) + "/" + sampled["risk_level"].astype(str)
+    sampled["stratum_population"] = sampled.groupby("stratum")["stratum"].transform("size") * 20
+    return sampled
+
+
+def timed(func, args, repeat):
+    """最快一次的耗时和最后一次的返回值"""
+    best = math.inf
+    result = None
+    for _ in range(repeat):
+        result = None  # 释放上一次的结果，重复调用时内存不叠加
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+        if best > SLOW_CALL:
+            break
+    return best, result
+
+
+def peak_memory(func, args):
+    """tracemalloc 统计的峰值（字节）"""
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def measure(func, args, repeat, memory):
+    """先测峰值内存（结果随即释放），再计时；返回 ({秒, 峰值 MB}, 返回值)"""
+    peak = peak_memory(func, args) / 2**20 if memory else None
+    seconds, result = timed(func, args, repeat)
+    return {"seconds": seconds, "peak_mb": peak}, result
+
+
+def exponent(results, sizes):
+    """最小到最大规模的耗时增长指数：t ∝ n^k"""
+    small, large = results.get(str(sizes[0])), results.get(str(sizes[-1]))
+    if not small or not large or len(sizes) < 2 or small["seconds"] <= 0:
+        return None
+    return math.log(large["seconds"] / small["seconds"]) / math.log(sizes[-1] / sizes[0])
+
+
+def superlinear(results, sizes):
+    k = exponent(results, sizes)
+    return k is not None and k > SUPERLINEAR and results[str(sizes[-1])]["seconds"] >= MIN_SECONDS
+
+
+def report(results, sizes, baseline=None):
+    print(f"\n{'function':32s}" + "".join(f" {f'{n:,} s':>12}" for n in sizes)
+          + "".join(f" {f'{n:,} MB':>12}" for n in sizes) + f" {'scaling':>8}"
+          + (f" {'vs base':>8}" if baseline else ""))
+    for name, by_size in results.items():
+        line = f"{name:32s}"
+        line += "".join(f" {by_size[str(n)]['seconds']:>12.4f}" if str(n) in by_size else f" {'-':>12}" for n in sizes)
+        line += "".join(f" {by_size[str(n)]['peak_mb']:>12,.1f}" if by_size.get(str(n), {}).get("peak_mb") is not None
+                        else f" {'-':>12}" for n in sizes)
+        k = exponent(by_size, sizes)
+        line += f" {'-':>8}" if k is None else f" {k:>7.2f}{'!' if superlinear(by_size, sizes) else ' '}"
+        if baseline:
+            old = baseline.get(name, {}).get(str(sizes[-1]))
+            new = by_size.get(str(sizes[-1]))
+            if old and new and old["seconds"] > 0:
+                ratio = new["seconds"] / old["seconds"]
+                slower = ratio > REGRESSION and new["seconds"] >= MIN_SECONDS
+                line += f" {ratio:>7.2f}{'!' if slower else ' '}"
+            else:
+                line += f" {'-':>8}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="看板数据函数基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="数据行数")
+    parser.add_argument("--only", nargs="+", default=None, help="只测这些函数")
+    parser.add_argument("--repeat", type=int, default=3, help="每个函数重复次数（取最快）")
+    parser.add_argument("--no-memory", action="store_true", help="不测峰值内存（省时间）")
+    parser.add_argument("--memory-max-rows", type=int, default=None, help="只在不超过这个行数的规模上测峰值内存")
+    parser.add_argument("--save", default=None, help="把结果保存为 JSON")
+    parser.add_argument("--baseline", default=None, help="与之前 --save 的结果对比")
+    args = parser.parse_args()
+    # data_loader 的正则含分组时 pandas 每次调用都会警告
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    sizes = sorted(args.sizes)
+    functions = public_functions()
+    missing = [name for name in functions if name not in CALLS and name not in SKIP and name != LOADER]
+    if missing:
+        print(f"[WARN] No call spec in CALLS for: {', '.join(missing)}")
+    names = [name for name in functions if name in CALLS and (not args.only or name in args.only)]
+
+    profile = CorpusProfile.measure()
+    results = {name: {} for name in [LOADER] + names}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = Path(tmp) / f"analysis_{size}.json"
+            start = time.perf_counter()
+            generate_json(profile, size, path)
+            print(f"[INFO] {size:,} rows: generated {path.stat().st_size / 2**20:,.0f} MB JSON "
+                  f"in {time.perf_counter() - start:.1f}s")
+
+            memory = not args.no_memory and (args.memory_max_rows is None or size <= args.memory_max_rows)
+            # 其余函数用的 DataFrame 就是 load_analysis_data 读入的结果（与看板相同的路径）
+            results[LOADER][str(size)], df = measure(functions[LOADER], (str(path),), args.repeat, memory)
+            path.unlink()
+            fx = SimpleNamespace(df=df, sampled=sampled_frame(df))
+
+            for name in names:
+                try:
+                    results[name][str(size)], _ = measure(functions[name], CALLS[name](fx), args.repeat, memory)
+                except Exception as e:
+                    print(f"[WARN] {name} failed at {size:,} rows: {e}")
+            fx = df = None
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+    report(results, sizes, baseline)
+
+    flagged = [name for name, by_size in results.items() if superlinear(by_size, sizes)]
+    if flagged:
+        print(f"\n[WARN] Super-linear (scaling > {SUPERLINEAR}): {', '.join(flagged)}")
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({"sizes": sizes, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"[OK] Saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
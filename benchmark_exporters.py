@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+导出基准测试 - 整体导出 vs streaming_exporters 逐条导出的耗时和峰值内存
+
+语料：用 data/clean 里的舆论生成 --records 条清洁记录（CleanPost），由生成器逐条产出，
+模拟 4_merge_and_clean.py 的清洁结果：
+    before  先收集成列表，再 TXT 逐行写 + json.dump(indent=2) + pandas DataFrame.to_excel
+    after   ExportSet([TxtWriter, JsonWriter, XlsxWriter]) 单遍逐条写出
+没有安装 pandas/openpyxl 时两边都不写 Excel，另加一行 +xlsx（after 加上 XlsxWriter）。
+两次运行的 TXT / JSON 输出逐字节比对，必须完全一致。
+峰值内存用 tracemalloc 单独测一遍（tracemalloc 会拖慢运行，耗时取不开 tracemalloc 的一遍）。
+
+使用方法：
+    python benchmark_exporters.py
+    python benchmark_exporters.py --records 1000000
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmark_crawler import load_texts
+from post_records import CleanPost, json_default
+from streaming_exporters import ExportSet, JsonWriter, TxtWriter, XlsxWriter
+
+try:
+    import pandas as pd
+    import openpyxl  # noqa: F401  (DataFrame.to_excel 的引擎)
+    HAS_EXCEL = True
+except ImportError:
+    HAS_EXCEL = False
+
+
+def generate(size, seed=42):
+    rng = random.Random(seed)
+    texts = load_texts()
+    for i in range(size):
+        yield CleanPost(
+            platform=rng.choice(("weibo", "zhihu", "xiaohongshu")),
+            content=f"{rng.choice(texts)} #{i}",
+            keywords="跨境电商",
+            source_url=f"https://example.com/{i}",
+            crawl_time="2025-06-01T12:00:00",
+        )
+
+
+def export_before(records, out_dir):
+    """改造前：4_merge_and_clean.DataExporter 的做法"""
+    data = list(records)
+    with open(out_dir / "before.txt", 'w', encoding='utf-8') as f:
+        for item in data:
+            f.write(item.get("content", "") + "\n")
+    with open(out_dir / "before.json", 'w', encoding='utf-8') as f:
+        json.dump({"data": data, "total": len(data)}, f, ensure_ascii=False, indent=2, default=json_default)
+    if HAS_EXCEL:
+        pd.DataFrame([dict(item) for item in data]).to_excel(out_dir / "before.xlsx", index=False)
+
+
+def export_after(records, out_dir, xlsx=HAS_EXCEL):
+    writers = [TxtWriter(out_dir / "after.txt"), JsonWriter(out_dir / "after.json")]
+    if xlsx:
+        writers.append(XlsxWriter(out_dir / "after.xlsx", CleanPost.FIELDS))
+    with ExportSet(writers) as out:
+        out.write_many(records)
+
+
+def export_after_xlsx(records, out_dir):
+    export_after(records, out_dir, xlsx=True)
+
+
+def timed(fn, size, out_dir):
+    start = time.perf_counter()
+    fn(generate(size), out_dir)
+    return time.perf_counter() - start
+
+
+def peak_memory(fn, size, out_dir):
+    tracemalloc.start()
+    fn(generate(size), out_dir)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出基准测试")
+    parser.add_argument("--records", type=int, default=200000, help="记录条数")
+    parser.add_argument("--no-memory", action="store_true", help="不测峰值内存（省时间）")
+    args = parser.parse_args()
+
+    print(f"[INFO] {args.records} records, Excel before: {'pandas' if HAS_EXCEL else 'skipped (no pandas/openpyxl)'}")
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        print(f"\n{'exporter':8s} {'seconds':>8} {'records/s':>10} {'peak MB':>8}")
+        cases = [("before", export_before), ("after", export_after)]
+        if not HAS_EXCEL:
+            # 改造前没法写 Excel 时，"after" 也不写，另测一行带 XLSX 的
+            cases.append(("+xlsx", export_after_xlsx))
+        for name, fn in cases:
+            elapsed = timed(fn, args.records, out_dir)
+            peak = "-" if args.no_memory else f"{peak_memory(fn, args.records, out_dir) / 2**20:,.0f}"
+            print(f"{name:8s} {elapsed:>8.1f} {args.records / elapsed:>10,.0f} {peak:>8}")
+
+        identical = all((out_dir / f"before{ext}").read_bytes() == (out_dir / f"after{ext}").read_bytes()
+                        for ext in (".txt", ".json"))
+        sizes = ", ".join(f"{p.name} {p.stat().st_size / 2**20:,.1f} MB" for p in sorted(out_dir.glob("after.*")))
+        print(f"\n[INFO] {sizes}")
+        if identical:
+            print("[OK] TXT / JSON output is byte-identical")
+        else:
+            print("[WARN] TXT / JSON output differs")
+
+
+if __name__ == "__main__":
+    main()
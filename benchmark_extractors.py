@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+HTML 抽取后端基准测试 - 每秒解析页数
+
+页面来源：
+    1. http_cache 中录制的页面（HTTP_CACHE=record 运行过采集器之后）
+    2. 没有缓存时，用 data/clean 里的舆论生成微博/知乎结构的夹具页面，
+       并加上导航、脚本等噪声，使页面大小接近真实搜索页
+
+对每个可用后端（selectolax / lxml / bs4 / htmlparser）统计每秒解析页数，
+并检查抽取结果与第一个后端是否一致。
+
+使用方法：
+    python benchmark_extractors.py
+    python benchmark_extractors.py --pages 500 --repeat 3
+"""
+
+import argparse
+import time
+
+from benchmark_crawler import load_texts, weibo_page, zhihu_page
+from html_extractors import BACKENDS, available_backends, get_extractor
+from http_cache import HttpCache
+
+HOSTS = {"weibo": "s.weibo.com", "zhihu": "www.zhihu.com"}
+POSTS_PER_PAGE = 20
+
+NOISE = ("<div class=\"nav\">" + "".join(f"<a href=\"/n{i}\" class=\"nav-item\">导航{i}</a>" for i in range(60))
+         + "</div><script>" + "var config = {};" * 400 + "</script>"
+         + "<div class=\"side\">" + "".join(f"<div class=\"hot\"><span>热搜{i}</span></div>" for i in range(50))
+         + "</div>")
+
+
+def fixture_pages(platform, count):
+    texts = load_texts()
+    pages = []
+    for i in range(count):
+        start = (i * POSTS_PER_PAGE) % max(1, len(texts) - POSTS_PER_PAGE)
+        chunk = texts[start:start + POSTS_PER_PAGE]
+        page = weibo_page(chunk) if platform == "weibo" else zhihu_page(chunk)
+        if platform == "weibo":
+            page = page.replace('<div class="card-wrap">', f'<div class="card-wrap" mid="{i}">')
+        pages.append(page.replace("<body>", "<body>" + NOISE))
+    return pages
+
+
+def load_pages(platform, count):
+    cached = [html for _, html in HttpCache().iter_pages(HOSTS[platform])][:count]
+    if cached:
+        return cached, "http_cache"
+    return fixture_pages(platform, count), "generated fixtures"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML 抽取后端基准测试")
+    parser.add_argument("--pages", type=int, default=200, help="每个平台的页数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最快一次）")
+    args = parser.parse_args()
+
+    backends = available_backends()
+    missing = [name for name in BACKENDS if name not in backends]
+    print(f"[INFO] Backends: {', '.join(backends)}" + (f" (not installed: {', '.join(missing)})" if missing else ""))
+
+    for platform in HOSTS:
+        pages, source = load_pages(platform, args.pages)
+        size_kb = sum(len(p.encode('utf-8')) for p in pages) / len(pages) / 1024
+        print(f"\n[{platform}] {len(pages)} pages from {source}, avg {size_kb:.0f} KB")
+        print(f"{'backend':12s} {'pages/s':>9} {'items':>7} {'agree':>7}")
+
+        reference = None
+        for name in backends:
+            extractor = get_extractor(name)
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = [extractor.extract(platform, page) for page in pages]
+                best = min(best, time.perf_counter() - start)
+
+            texts = [[item["text"] for item in r] for r in results]
+            if reference is None:
+                reference = texts
+            agree = sum(a == b for a, b in zip(texts, reference)) / len(pages)
+            items = sum(len(r) for r in results)
+            print(f"{name:12s} {len(pages) / best:>9.0f} {items:>7} {agree:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+近似去重基准测试 - MinHash LSH 从 1万 到 100万 条的扩展性
+
+语料：用 data/clean 里的舆论拼接出互不相同的帖子，其中 --dup-rate 比例的帖子
+是前面某条帖子的"转发"变体（加前后缀、改一个标点）。变体与原帖的真实 Jaccard
+相似度 ≥ 阈值的算作应检出的重复。
+
+对每个规模统计：耗时、每秒条数、检出的近似重复、召回率、候选比较次数，
+以及两两比较需要的次数（n²/2）作为对照。
+
+使用方法：
+    python benchmark_near_dedup.py
+    python benchmark_near_dedup.py --sizes 10000,100000,1000000
+    python benchmark_near_dedup.py --threshold 0.9
+"""
+
+import argparse
+import random
+import resource
+import time
+
+from benchmark_crawler import load_texts
+from near_dedup import HAS_NUMPY, SHINGLE_SIZE, NearDuplicateIndex
+
+VARIANTS = [
+    lambda t: "转发：" + t,
+    lambda t: t + " //",
+    lambda t: t + "！",
+    lambda t: t.replace("，", ",", 1),
+]
+
+
+def jaccard(a, b, size=SHINGLE_SIZE):
+    a, b = ''.join(a.split()), ''.join(b.split())
+    sa = {a[i:i + size] for i in range(len(a) - size + 1)}
+    sb = {b[i:i + size] for i in range(len(b) - size + 1)}
+    return len(sa & sb) / len(sa | sb)
+
+
+def generate(size, dup_rate, threshold, seed=42):
+    """返回 (文本列表, 是否与前面某条的相似度 ≥ 阈值)"""
+    rng = random.Random(seed)
+    texts = load_texts()
+    docs, is_dup = [], []
+    for i in range(size):
+        if docs and rng.random() < dup_rate:
+            parent = rng.choice(docs)
+            docs.append(rng.choice(VARIANTS)(parent))
+            is_dup.append(jaccard(parent, docs[-1]) >= threshold)
+        else:
+            a, b = rng.choice(texts), rng.choice(texts)
+            docs.append(f"{a[:len(a) // 2]}{b[len(b) // 2:]}#{i}")
+            is_dup.append(False)
+    return docs, is_dup
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="近似去重基准测试")
+    parser.add_argument("--sizes", default="10000,100000", help="逗号分隔的规模")
+    parser.add_argument("--threshold", type=float, default=0.95, help="相似度阈值")
+    parser.add_argument("--dup-rate", type=float, default=0.2, help="变体比例")
+    args = parser.parse_args()
+
+    probe = NearDuplicateIndex(args.threshold)
+    print(f"[INFO] threshold={args.threshold} num_perm={probe.num_perm} "
+          f"bands={probe.bands}x{probe.rows} backend={'numpy' if HAS_NUMPY else 'pure python'}")
+    print(f"{'posts':>9} {'seconds':>8} {'posts/s':>8} {'dups':>8} {'recall':>7} "
+          f"{'candidates':>11} {'pairwise':>14} {'max RSS MB':>11}")
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        docs, is_dup = generate(size, args.dup_rate, args.threshold)
+        index = NearDuplicateIndex(args.threshold)
+        start = time.perf_counter()
+        flagged = [index.is_duplicate(d) for d in docs]
+        elapsed = time.perf_counter() - start
+
+        true_dups = sum(is_dup)
+        hits = sum(f and d for f, d in zip(flagged, is_dup))
+        recall = hits / true_dups if true_dups else 1.0
+        print(f"{size:>9,} {elapsed:>8.1f} {size / elapsed:>8,.0f} {sum(flagged):>8,} {recall:>7.1%} "
+              f"{index.stats['candidates']:>11,} {size * (size - 1) // 2:>14,} {max_rss_mb():>11,.0f}")
+
+
+if __name__ == "__main__":
+    main()
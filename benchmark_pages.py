@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+看板页面渲染基准测试 - 用 Streamlit AppTest 无界面运行 main.py 和 pages/*.py
+
+test_all_pages.py / test_streamlit_start.py 只检查能否导入。这里在不同规模的数据上真正执行每个页面：
+    - 数据：generate_synthetic_corpus 生成的分析结果写成 analysis_results.json，
+      通过环境变量 ANALYSIS_DATA_FILE 交给 load_analysis_data；规模 0 表示现有的真实数据
+    - 每个页面：整页耗时（取 --repeat 次最快）、各顶层段落耗时、峰值内存（tracemalloc 另跑一遍）、
+      图表个数和 payload 大小、表格个数和大小、页面异常
+    - 段落：页面顶层的 st.title / st.header / st.subheader 以及 st.tabs 的各个 tab，
+      运行前在这些语句之前插入计时点（插入的只是一行记录时间的语句，页面代码不变）
+    - 默认每次运行前清空 st.cache_data（冷启动，每个页面单独计）；--warm 保留缓存
+    - --budget 为每个页面的耗时预算，超出的标 !；--save 保存结果，--baseline 与之前的结果对比
+
+需要看板的依赖（streamlit、pandas、plotly 等，见 streamlit_app/requirements.txt）。
+
+使用方法：
+    python benchmark_pages.py
+    python benchmark_pages.py --sizes 0 10000 100000 1000000 --only 总体概览 main
+    BENCH_PAGES_SIZES=0,50000 python benchmark_pages.py --budget 2 --save bench_pages.json
+    python benchmark_pages.py --baseline bench_pages.json
+"""
+
+import argparse
+import ast
+import json
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from benchmark_data_loader import generate_json   # 同时把 streamlit_app 加入 sys.path
+from generate_synthetic_corpus import CorpusProfile
+from utils import data_loader
+
+APP_DIR = Path(__file__).resolve().parent / "streamlit_app"
+SIZES = [0, 10_000, 100_000]          # 0 = 现有的真实数据；环境变量 BENCH_PAGES_SIZES 可覆盖
+BUDGET = 3.0                          # 默认每个页面的耗时预算（秒）
+REGRESSION = 1.2                      # 比基线慢 20% 以上视为退化
+TIMEOUT = 600                         # AppTest 单次运行的超时（秒）
+
+CHART_TYPES = ("plotly_chart", "arrow_vega_lite_chart", "vega_lite_chart", "graphviz_chart",
+               "bokeh_chart", "deck_gl_json_chart", "imgs")
+TABLE_TYPES = ("dataframe", "table")
+
+SECTIONS_KEY = "_bench_sections"
+SETUP = "(setup)"
+END = "(end)"
+_MARK = ("__import__('streamlit').session_state.setdefault(" + repr(SECTIONS_KEY) + ", [])"
+         ".append(({label!r}, __import__('time').perf_counter()))\n")
+
+
+def app_pages():
+    """main.py 和 pages/*.py（按页面顺序）"""
+    return [APP_DIR / "main.py"] + sorted((APP_DIR / "pages").glob("*.py"))
+
+
+# ============================================================================
+# 段落计时点
+# ============================================================================
+
+def _is_st_call(node, names):
+    return (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and isinstance(node.func.value, ast.Name) and node.func.value.id == "st"
+            and node.func.attr in names)
+
+
+def _tab_labels(tree):
+    """顶层 tab1, tab2 = st.tabs([...]) / tabs = st.tabs([...]) 中每个 tab 变量对应的标题"""
+    labels = {}
+    for node in tree.body:
+        if not (isinstance(node, ast.Assign) and _is_st_call(node.value, ("tabs",)) and node.value.args):
+            continue
+        titles = node.value.args[0]
+        if isinstance(titles, (ast.List, ast.Tuple)) and all(
+                isinstance(t, ast.Constant) and isinstance(t.value, str) for t in titles.elts):
+            titles = [t.value for t in titles.elts]
+        else:
+            titles = None
+        target = node.targets[0]
+        if isinstance(target, ast.Tuple):
+            for i, elt in enumerate(target.elts):
+                if isinstance(elt, ast.Name):
+                    labels[elt.id] = titles[i] if titles and i < len(titles) else elt.id
+        elif isinstance(target, ast.Name):
+            labels[target.id] = titles
+    return labels
+
+
+def _section_label(node, tabs, source):
+    """顶层语句开始一个新段落时返回段落名"""
+    if isinstance(node, ast.Expr) and _is_st_call(node.value, ("title", "header", "subheader")):
+        arg = node.value.args[0] if node.value.args else None
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+            return arg.value.strip()
+        return ast.get_source_segment(source, node.value)
+    if isinstance(node, ast.With):
+        context = node.items[0].context_expr
+        if isinstance(context, ast.Name) and context.id in tabs:
+            return f"[tab] {tabs[context.id]}"
+        if isinstance(context, ast.Subscript) and isinstance(context.value, ast.Name) and context.value.id in tabs:
+            titles = tabs[context.value.id]
+            index = context.slice
+            if titles and isinstance(index, ast.Constant) and isinstance(index.value, int) and index.value < len(titles):
+                return f"[tab] {titles[index.value]}"
+            return f"[tab] {ast.get_source_segment(source, context)}"
+    return None
+
+
+def instrument(path):
+    """在页面顶层段落前插入计时点；__file__ 仍指向原文件（页面用它找数据目录）"""
+    source = Path(path).read_text(encoding="utf-8")
+    tree = ast.parse(source)
+    tabs = _tab_labels(tree)
+    marks = {}
+    for node in tree.body:
+        label = _section_label(node, tabs, source)
+        if label:
+            marks[node.lineno] = label
+
+    lines = [f"__file__ = {str(path)!r}\n", _MARK.format(label=SETUP)]
+    for lineno, line in enumerate(source.splitlines(keepends=True), 1):
+        if lineno in marks:
+            lines.append(_MARK.format(label=marks[lineno]))
+        lines.append(line)
+    lines.append("\n" + _MARK.format(label=END))
+    return "".join(lines)
+
+
+def section_times(marks, finished):
+    """计时点 -> [(段落, 秒)]；页面中途 st.stop() 时最后一段算到运行结束"""
+    sections = []
+    for (label, start), (_, end) in zip(marks, marks[1:] + [(END, finished)]):
+        if label != END:
+            sections.append((label, end - start))
+    return sections
+
+
+# ============================================================================
+# 运行页面
+# ============================================================================
+
+def payloads(at, types):
+    """(个数, 字节数)"""
+    elements = [element for kind in types for element in at.get(kind)]
+    return len(elements), sum(len(element.proto.SerializeToString()) for element in elements)
+
+
+def run_page(script, warm=False, memory=False, timeout=TIMEOUT):
+    """运行一次页面，返回 (AppTest, 耗时, 峰值字节, 运行结束时刻)"""
+    if not warm:
+        st.cache_data.clear()
+    at = AppTest.from_string(script, default_timeout=timeout)
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        at.run()
+    finally:
+        finished = time.perf_counter()
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+        if memory:
+            tracemalloc.stop()
+    return at, finished - start, peak, finished
+
+
+def benchmark_page(path, repeat=1, warm=False, memory=True, timeout=TIMEOUT):
+    script = instrument(path)
+    best = None
+    for _ in range(max(1, repeat)):
+        at, seconds, _, finished = run_page(script, warm, timeout=timeout)
+        if best is None or seconds < best[1]:
+            best = (at, seconds, finished)
+    at, seconds, finished = best
+    marks = at.session_state[SECTIONS_KEY] if SECTIONS_KEY in at.session_state else []
+    charts, chart_bytes = payloads(at, CHART_TYPES)
+    tables, table_bytes = payloads(at, TABLE_TYPES)
+    result = {
+        "seconds": seconds,
+        "peak_mb": None,
+        "charts": charts,
+        "chart_kb": chart_bytes / 1024,
+        "tables": tables,
+        "table_kb": table_bytes / 1024,
+        "errors": [e.message for e in at.exception],
+        "sections": section_times(list(marks), finished),
+    }
+    if memory:
+        result["peak_mb"] = run_page(script, warm, memory=True, timeout=timeout)[2] / 2**20
+    return result
+
+
+# ============================================================================
+# 报告
+# ============================================================================
+
+def report(size, results, budget, baseline=None):
+    rows = f"{size:,} rows" if size else "real data"
+    print(f"\n=== {rows} ===")
+    print(f"{'page':28s} {'seconds':>8} {'peak MB':>8} {'charts':>6} {'chart KB':>9} "
+          f"{'tables':>6} {'table KB':>9}" + (f" {'vs base':>8}" if baseline else ""))
+    for page, r in results.items():
+        over = "!" if r["seconds"] > budget else " "
+        peak = "-" if r["peak_mb"] is None else f"{r['peak_mb']:,.1f}"
+        line = (f"{page:28s} {r['seconds']:>7.2f}{over} {peak:>8} {r['charts']:>6} {r['chart_kb']:>9,.1f} "
+                f"{r['tables']:>6} {r['table_kb']:>9,.1f}")
+        if baseline:
+            old = baseline.get(str(size), {}).get(page)
+            if old and old["seconds"] > 0:
+                ratio = r["seconds"] / old["seconds"]
+                line += f" {ratio:>7.2f}{'!' if ratio > REGRESSION else ' '}"
+            else:
+                line += f" {'-':>8}"
+        print(line)
+        for label, seconds in r["sections"]:
+            share = seconds / r["seconds"] if r["seconds"] else 0
+            print(f"    {seconds:>7.3f}s {share:>4.0%}  {label}")
+        for error in r["errors"]:
+            print(f"    [WARN] exception: {error.splitlines()[0] if error else error}")
+
+
+def default_sizes():
+    env = os.environ.get("BENCH_PAGES_SIZES")
+    return [int(size) for size in env.split(",") if size.strip()] if env else SIZES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="看板页面渲染基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=default_sizes(),
+                        help="数据行数（0 = 现有的真实数据）")
+    parser.add_argument("--only", nargs="+", default=None, help="只测文件名包含这些字符串的页面")
+    parser.add_argument("--repeat", type=int, default=1, help="每个页面运行次数（取最快）")
+    parser.add_argument("--warm", action="store_true", help="不清空 st.cache_data")
+    parser.add_argument("--no-memory", action="store_true", help="不测峰值内存（省时间）")
+    parser.add_argument("--budget", type=float, default=BUDGET, help="每个页面的耗时预算（秒）")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="单个页面的超时（秒）")
+    parser.add_argument("--save", default=None, help="把结果保存为 JSON")
+    parser.add_argument("--baseline", default=None, help="与之前 --save 的结果对比")
+    args = parser.parse_args()
+    # 页面里的弃用参数（use_container_width 等）每次渲染都会警告；
+    # AppTest 每次运行都会按配置重设 Streamlit 的日志级别，所以直接关掉 WARNING 及以下的日志
+    warnings.filterwarnings("ignore")
+    logging.disable(logging.WARNING)
+
+    pages = [p for p in app_pages() if not args.only or any(key in p.name for key in args.only)]
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+
+    profile = None
+    results = {}
+    over_budget = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = None
+            if size:
+                profile = profile or CorpusProfile.measure()
+                path = Path(tmp) / f"analysis_{size}.json"
+                generate_json(profile, size, path)
+                os.environ[data_loader.ANALYSIS_DATA_ENV] = str(path)
+            else:
+                os.environ.pop(data_loader.ANALYSIS_DATA_ENV, None)
+
+            by_page = results[str(size)] = {}
+            for page in pages:
+                name = page.stem
+                by_page[name] = benchmark_page(page, args.repeat, args.warm, not args.no_memory, args.timeout)
+                if by_page[name]["seconds"] > args.budget:
+                    over_budget.append(f"{name} @ {size:,}")
+            report(size, by_page, args.budget, baseline)
+            if path is not None:
+                path.unlink()
+        os.environ.pop(data_loader.ANALYSIS_DATA_ENV, None)
+
+    if over_budget:
+        print(f"\n[WARN] Over the {args.budget:g}s budget: {', '.join(over_budget)}")
+    else:
+        print(f"\n[OK] All pages within the {args.budget:g}s budget")
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({"sizes": args.sizes, "budget": args.budget, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"[OK] Saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
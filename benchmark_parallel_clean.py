@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+并行清洁基准测试 - 不同进程数下的清洁吞吐量（条/秒）
+
+语料：用 data/clean 里的舆论生成 --posts 条原始帖子（其中 10% 是前面某条的完全重复），
+写成临时目录下的 JSONL 分片（每片 5000 条）。
+
+对每个进程数分别运行：
+    merge     4_merge_and_clean.DataCleaner（每个分片一个分区）
+    pipeline  data_collection_pipeline.DataCleaner.clean_and_deduplicate（每批 2000 条）
+并与单进程的输出逐条比对，必须完全一致。
+
+使用方法：
+    python benchmark_parallel_clean.py
+    python benchmark_parallel_clean.py --posts 500000 --workers 1,2,4,8
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import logging
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import config
+from benchmark_crawler import load_texts
+from data_collection_pipeline import DataCleaner as PipelineCleaner
+from raw_shards import ShardWriter, iter_shards
+
+spec = importlib.util.spec_from_file_location("merge_and_clean", Path(__file__).parent / "4_merge_and_clean.py")
+merge_and_clean = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(merge_and_clean)
+
+
+def generate(raw_dir, size, dup_rate=0.1, seed=42):
+    rng = random.Random(seed)
+    texts = load_texts()
+    posts = []
+    with ShardWriter("weibo", out_dir=raw_dir / "weibo", max_records=5000, run_id="bench") as writer:
+        for i in range(size):
+            if posts and rng.random() < dup_rate:
+                content = rng.choice(posts)
+            else:
+                content = f"{rng.choice(texts)} #{i}"
+                posts.append(content)
+            writer.write({"platform": "weibo", "content": content, "text": content, "keyword": "跨境电商"})
+
+
+def run_merge(workers):
+    cleaner = merge_and_clean.DataCleaner(workers)
+    return [item["content"] for item in cleaner.clean()]
+
+
+def run_pipeline(raw_dir, workers):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return PipelineCleaner().clean_and_deduplicate(iter_shards(raw_dir / "weibo"), workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并行清洁基准测试")
+    parser.add_argument("--posts", type=int, default=200000, help="原始帖子条数")
+    parser.add_argument("--workers", default="1,2,4", help="逗号分隔的进程数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_dir = Path(tmp)
+        generate(raw_dir, args.posts)
+        config.WEIBO_RAW_DIR = raw_dir / "weibo"
+        config.ZHIHU_RAW_DIR = config.XIAOHONGSHU_RAW_DIR = config.RAW_DATA_DIR = raw_dir / "empty"
+        logging.disable(logging.CRITICAL)
+
+        print(f"[INFO] {args.posts} posts in {len(list((raw_dir / 'weibo').iterdir()))} shards, "
+              f"{os.cpu_count()} CPU cores")
+        print(f"{'workers':>7} {'merge posts/s':>14} {'speedup':>8} {'pipeline posts/s':>17} {'speedup':>8}")
+
+        baseline = {}
+        for workers in (int(w) for w in args.workers.split(",")):
+            row = []
+            for name, fn in (("merge", run_merge), ("pipeline", lambda w: run_pipeline(raw_dir, w))):
+                start = time.perf_counter()
+                result = fn(workers)
+                elapsed = time.perf_counter() - start
+                if name not in baseline:
+                    baseline[name] = (elapsed, result)
+                elif baseline[name][1] != result:
+                    print(f"[WARN] {name} with {workers} workers: results differ from 1 worker")
+                row.append((args.posts / elapsed, baseline[name][0] / elapsed))
+            (merge_rate, merge_speedup), (pipe_rate, pipe_speedup) = row
+            print(f"{workers:>7} {merge_rate:>14,.0f} {merge_speedup:>7.1f}x {pipe_rate:>17,.0f} {pipe_speedup:>7.1f}x")
+
+        print(f"[OK] merge kept {len(baseline['merge'][1])}, pipeline kept {len(baseline['pipeline'][1])}")
+
+
+if __name__ == "__main__":
+    main()
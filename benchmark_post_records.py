@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+帖子记录内存基准测试 - dict 和 post_records 紧凑记录每百万条占用的内存
+
+语料：用 data/clean 里的舆论生成 --posts 条原始帖子（20 个关键词，字段同 STEP_1 爬虫），
+先序列化成 JSONL 行，再逐行解析，模拟从分片读回后整体留在内存里的情况：
+    raw    json.loads 得到的 dict        vs  RawPost.from_dict
+    clean  清洁后的标准记录 dict         vs  CleanPost
+用 tracemalloc 统计整个列表（含记录引用的字符串）分配的内存，换算为每百万条的 MB；
+正文字符串两种方式都一样，单独列出以便看出记录本身的开销。
+
+使用方法：
+    python benchmark_post_records.py
+    python benchmark_post_records.py --posts 1000000
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmark_crawler import load_texts
+from post_records import CleanPost, RawPost
+
+KEYWORDS = [f"关键词{i:02d}" for i in range(20)]
+
+
+def generate_lines(size, seed=42):
+    rng = random.Random(seed)
+    texts = load_texts()
+    start = datetime(2025, 6, 1)
+    for i in range(size):
+        yield json.dumps({
+            "platform": rng.choice(("weibo", "zhihu")),
+            "keyword": rng.choice(KEYWORDS),
+            "text": f"{rng.choice(texts)} #{i}",
+            "likes": rng.randrange(1000),
+            "collected_at": (start + timedelta(seconds=i)).isoformat(),
+            "source_url": f"https://s.weibo.com/weibo?q=kw&page={i % 50 + 1}",
+        }, ensure_ascii=False)
+
+
+def clean_dict(post):
+    """cleaning_engine.build_output 的 standard 记录（dict 版本）"""
+    return {
+        "platform": post["platform"],
+        "content": post["text"],
+        "keywords": post["keyword"],
+        "source_url": post["source_url"],
+        "crawl_time": post["collected_at"],
+    }
+
+
+def measure(lines, build):
+    """build(lines) 建出的列表占用的内存（字节）和耗时（秒）"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = build(lines)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    gc.collect()
+    return size, elapsed
+
+
+CASES = [
+    ("raw", "dict", lambda lines: [json.loads(line) for line in lines]),
+    ("raw", "RawPost", lambda lines: [RawPost.from_dict(json.loads(line)) for line in lines]),
+    ("clean", "dict", lambda lines: [clean_dict(json.loads(line)) for line in lines]),
+    ("clean", "CleanPost", lambda lines: [CleanPost.from_dict(clean_dict(json.loads(line))) for line in lines]),
+    ("text", "str only", lambda lines: [json.loads(line)["text"] for line in lines]),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="帖子记录内存基准测试")
+    parser.add_argument("--posts", type=int, default=200000, help="帖子条数")
+    args = parser.parse_args()
+
+    lines = list(generate_lines(args.posts))
+    scale = 1_000_000 / args.posts
+    print(f"[INFO] {args.posts} posts, avg {sum(map(len, lines)) / len(lines):.0f} bytes per JSON line")
+    print(f"\n{'stage':6s} {'record':10s} {'bytes/post':>11} {'MB per 1M':>10} {'build s':>8}")
+
+    results = {}
+    for stage, name, build in CASES:
+        size, elapsed = measure(lines, build)
+        results[stage, name] = size
+        print(f"{stage:6s} {name:10s} {size / args.posts:>11,.0f} {size * scale / 2**20:>10,.0f} {elapsed:>8.2f}")
+
+    for stage, compact in (("raw", "RawPost"), ("clean", "CleanPost")):
+        before, after = results[stage, "dict"], results[stage, compact]
+        print(f"[OK] {stage}: {compact} saves {(before - after) * scale / 2**20:,.0f} MB per 1M posts "
+              f"({1 - after / before:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+原始数据加载基准测试 - 串行 json.load vs raw_loader（并发 + 流式解析）
+
+语料：--files 个 MediaCrawler xhs/json 风格的原始文件（search_contents 字段，indent=4），
+每个 --records 条，正文取自 data/clean 里的舆论。对比（下游逐条计数后丢弃）：
+    before   逐个文件 json.load + json_items，整个文件解析完才产出第一条
+    after    raw_loader.iter_raw_files：线程池并发解析，小文件 orjson 整体解析，大文件流式
+    stream   同上，但所有文件都流式解析（STREAM_THRESHOLD=0），看首条延迟和内存的下限
+每种方式产出的记录（按顺序逐条计入指纹）必须完全一致。
+峰值内存用 tracemalloc 单独测一遍（tracemalloc 会拖慢运行，耗时取不开 tracemalloc 的一遍）。
+
+使用方法：
+    python benchmark_raw_loader.py
+    python benchmark_raw_loader.py --files 40 --records 50000 --workers 8
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+
+import raw_loader
+from benchmark_crawler import load_texts
+from raw_loader import HAS_ORJSON, iter_raw_files, json_items
+
+
+def generate(out_dir, files, records, seed=42):
+    rng = random.Random(seed)
+    texts = load_texts()
+    paths = []
+    for n in range(files):
+        notes = [{
+            "note_id": f"{rng.getrandbits(96):024x}",
+            "type": "normal",
+            "title": rng.choice(texts)[:20],
+            "desc": rng.choice(texts),
+            "video_url": "",
+            "time": 1733800000000 + i,
+            "last_update_time": 1733800000000 + i,
+            "user_id": f"{rng.getrandbits(96):024x}",
+            "nickname": "用户" + str(rng.randrange(10**6)),
+            "avatar": "https://sns-avatar-qc.xhscdn.com/avatar/" + str(i),
+            "liked_count": str(rng.randrange(10000)),
+            "collected_count": str(rng.randrange(1000)),
+            "comment_count": str(rng.randrange(1000)),
+            "share_count": str(rng.randrange(100)),
+            "ip_location": rng.choice(["广东", "浙江", "上海"]),
+            "image_list": ",".join(f"https://sns-img.xhscdn.com/{rng.getrandbits(64):016x}" for _ in range(3)),
+            "tag_list": "跨境电商,税务",
+            "last_modify_ts": 1733800000000 + i,
+            "note_url": f"https://www.xiaohongshu.com/explore/{i}",
+            "source_keyword": "跨境电商 税",
+        } for i in range(records)]
+        path = out_dir / f"search_contents_{n:03d}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(notes, f, ensure_ascii=False, indent=4)
+        paths.append(path)
+    return paths
+
+
+def load_before(paths):
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json_items(json.load(f))
+
+
+def load_stream(paths, workers):
+    threshold = raw_loader.STREAM_THRESHOLD
+    raw_loader.STREAM_THRESHOLD = 0
+    try:
+        yield from iter_raw_files(paths, workers)
+    finally:
+        raw_loader.STREAM_THRESHOLD = threshold
+
+
+def consume(records):
+    """下游：逐条处理后丢弃；返回 (条数, 首条延迟, 总耗时, 记录指纹)"""
+    start = time.perf_counter()
+    first = None
+    count = 0
+    fingerprint = 0
+    for record in records:
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+        fingerprint = hash((fingerprint, tuple(record.items())))
+    return count, first, time.perf_counter() - start, fingerprint
+
+
+def peak_memory(load):
+    tracemalloc.start()
+    consume(load())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="原始数据加载基准测试")
+    parser.add_argument("--files", type=int, default=20, help="原始文件数")
+    parser.add_argument("--records", type=int, default=20000, help="每个文件的记录数")
+    parser.add_argument("--workers", type=int, default=4, help="raw_loader 线程数")
+    parser.add_argument("--no-memory", action="store_true", help="不测峰值内存（省时间）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate(Path(tmp), args.files, args.records)
+        size = sum(p.stat().st_size for p in paths)
+        total = args.files * args.records
+        print(f"[INFO] {args.files} files x {args.records} records, {size / 2**20:,.0f} MB, "
+              f"orjson: {'yes' if HAS_ORJSON else 'no'}")
+        print(f"\n{'loader':8s} {'seconds':>8} {'records/s':>10} {'MB/s':>7} {'first ms':>9} {'peak MB':>8}")
+
+        cases = [
+            ("before", partial(load_before, paths)),
+            ("after", partial(iter_raw_files, paths, args.workers)),
+            ("stream", partial(load_stream, paths, args.workers)),
+        ]
+        baseline = None
+        identical = True
+        for name, load in cases:
+            count, first, elapsed, fingerprint = consume(load())
+            if baseline is None:
+                baseline = (count, fingerprint)
+            elif (count, fingerprint) != baseline:
+                print(f"[WARN] {name}: records differ")
+                identical = False
+            peak = "-" if args.no_memory else f"{peak_memory(load) / 2**20:,.0f}"
+            print(f"{name:8s} {elapsed:>8.2f} {total / elapsed:>10,.0f} {size / 2**20 / elapsed:>7,.0f} "
+                  f"{first * 1000:>9,.1f} {peak:>8}")
+
+        if identical:
+            print("[OK] All loaders yield the same records")
+
+
+if __name__ == "__main__":
+    main()
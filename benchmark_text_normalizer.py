@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+文本规范化基准测试 - 每秒处理文档数（改造前 vs text_normalizer）
+
+语料：data/clean/opinions_clean_5000.json（没有时用示例文本），可用 --copies 放大。
+
+对比：
+    before  原 4_merge_and_clean 的实现：逐个广告词 `in` + `count`，
+            每条文本调用 re.sub(字符串模式)
+    after   text_normalizer：Aho-Corasick 一次扫描 + 预编译正则
+
+两种实现的结果逐条比对，必须完全一致。
+
+使用方法：
+    python benchmark_text_normalizer.py
+    python benchmark_text_normalizer.py --copies 20 --repeat 5
+"""
+
+import argparse
+import re
+import time
+
+from benchmark_crawler import load_texts
+from text_normalizer import AD_KEYWORDS, is_ad, normalize_text
+
+
+# ============================================================================
+# 改造前的实现（照搬自 4_merge_and_clean.py）
+# ============================================================================
+
+def before_is_ad(content):
+    for ad_kw in AD_KEYWORDS:
+        if ad_kw in content:
+            if content.count(ad_kw) > 1 or len(content) < 20:
+                return True
+    return False
+
+
+def before_normalize(content):
+    content = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', content)
+    content = re.sub(r'[\U0001F300-\U0001F9FF]|[\u2600-\u27BF]', '', content)
+    content = re.sub(r'\[.*?\]', '', content)
+    return ' '.join(content.split())
+
+
+def run(texts, ad_fn, normalize_fn):
+    return [None if ad_fn(t) else normalize_fn(t) for t in texts]
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文本规范化基准测试")
+    parser.add_argument("--copies", type=int, default=10, help="语料重复次数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最快一次）")
+    args = parser.parse_args()
+
+    texts = load_texts() * args.copies
+    print(f"[INFO] {len(texts)} documents, avg {sum(map(len, texts)) / len(texts):.0f} chars")
+    print(f"{'stage':12s} {'before docs/s':>14} {'after docs/s':>14} {'speedup':>8}")
+
+    rows = [
+        ("ad filter", lambda: [before_is_ad(t) for t in texts], lambda: [is_ad(t) for t in texts]),
+        ("normalize", lambda: [before_normalize(t) for t in texts], lambda: [normalize_text(t) for t in texts]),
+        ("both", lambda: run(texts, before_is_ad, before_normalize), lambda: run(texts, is_ad, normalize_text)),
+    ]
+    for name, before_fn, after_fn in rows:
+        before, before_result = best_of(args.repeat, before_fn)
+        after, after_result = best_of(args.repeat, after_fn)
+        if before_result != after_result:
+            print(f"[WARN] {name}: results differ")
+        print(f"{name:12s} {len(texts) / before:>14,.0f} {len(texts) / after:>14,.0f} {before / after:>7.1f}x")
+
+    ads = sum(is_ad(t) for t in texts)
+    print(f"[OK] Results identical; {ads} documents flagged as ads")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,13 @@
 不需要依赖复杂的config
 """
 import json
-import hashlib
-import re
 import sys
 from pathlib import Path
 
+from cleaning_engine import PROFILES, CleaningEngine
+from post_records import json_default
+from raw_loader import iter_raw_files
+
 # 处理Windows编码问题
 if sys.platform == 'win32':
     import io
@@ -37,162 +39,59 @@ OUTPUT_JSON = OUTPUT_DIR / "opinions_clean_5000.json"
 # ============================================================================
 
 def load_data():
-    """加载所有JSON数据"""
-    all_items = []
-    
+    """加载所有JSON数据（多个文件并发解析，边解析边产出记录，见 raw_loader.py）"""
+    input_files = []
     for input_file in INPUT_FILES:
         if not input_file.exists():
             print(f"[WARN] 文件不存在: {input_file}")
             continue
-        
-        print(f"[LOAD] {input_file.name}")
-        try:
-            with open(input_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-                # 处理列表格式
-                if isinstance(data, list):
-                    all_items.extend(data)
-                # 处理dict格式
-                elif isinstance(data, dict):
-                    if "data" in data:
-                        items = data["data"]
-                        if isinstance(items, list):
-                            all_items.extend(items)
-                    
-            print(f"       [OK] {len(all_items)} items loaded")
-        except Exception as e:
-            print(f"       [ERR] {e}")
+        input_files.append(input_file)
     
-    print(f"\n[OK] Total loaded: {len(all_items)} items\n")
-    return all_items
-
-def extract_content(item):
-    """从item中提取内容"""
-    # 优先级：content > text > desc > title
-    content = item.get("content", "")
-    if not content:
-        content = item.get("text", "")
-    if not content:
-        content = item.get("desc", "")
-    if not content:
-        content = item.get("title", "")
+    def on_file(path, count, error):
+        print(f"[LOAD] {path.name}")
+        if error is None:
+            print(f"       [OK] {count} items loaded")
+        else:
+            print(f"       [ERR] {error}")
     
-    return content.strip()
+    # 与原来一样只取列表里的记录：{"data": 非列表} 和单个对象跳过
+    return iter_raw_files(input_files, on_file=on_file, lists_only=True)
 
-def deduplicate(items):
-    """去重"""
-    print("[STEP2] Deduplication")
+def clean(items):
+    """去重 → 长度过滤 → 广告过滤 → 规范化（规则见 cleaning_engine.PROFILES["simple"]）"""
+    engine = CleaningEngine(PROFILES["simple"])
+    cleaned = list(engine.clean(items))
+    stats = engine.stats
+    rejected = stats["rejected"]
     
-    unique_items = []
-    seen_hashes = set()
+    print(f"\n[OK] Total loaded: {stats['total']} items\n")
+    if not stats["total"]:
+        return None
     
-    for item in items:
-        content = extract_content(item)
-        if not content:
-            continue
-        
-        # MD5哈希
-        content_hash = hashlib.md5(content.encode()).hexdigest()
-        
-        if content_hash not in seen_hashes:
-            unique_items.append(item)
-            seen_hashes.add(content_hash)
+    # 内容为空的记录不参与去重
+    after_dedup = stats["total"] - rejected["empty"] - stats["duplicates"]
+    after_length = after_dedup - rejected["length"]
     
-    removed = len(items) - len(unique_items)
-    print(f"  Before: {len(items)} items")
-    print(f"  After: {len(unique_items)} items")
-    print(f"  Removed: {removed} ({100*removed/len(items):.1f}%)\n")
+    print("[STEP2] Deduplication")
+    removed = stats["total"] - after_dedup
+    print(f"  Before: {stats['total']} items")
+    print(f"  After: {after_dedup} items")
+    print(f"  Removed: {removed} ({100*removed/stats['total']:.1f}%)\n")
     
-    return unique_items
-
-def filter_length(items, min_len=10, max_len=500):
-    """按长度过滤"""
     print("[STEP3] Length filter")
+    print(f"  Length: {PROFILES['simple'].min_length}-{PROFILES['simple'].max_length} chars")
+    print(f"  After: {after_length} items")
+    print(f"  Removed: {rejected['length']}\n")
     
-    filtered = []
-    for item in items:
-        content = extract_content(item)
-        
-        # 长度检查
-        if len(content) < min_len:
-            continue
-        
-        # 截断
-        if len(content) > max_len:
-            content = content[:max_len]
-        
-        item["_cleaned_content"] = content
-        filtered.append(item)
-    
-    removed = len(items) - len(filtered)
-    print(f"  Length: {min_len}-{max_len} chars")
-    print(f"  After: {len(filtered)} items")
-    print(f"  Removed: {removed}\n")
-    
-    return filtered
-
-def filter_ads(items):
-    """过滤广告"""
     print("[STEP4] Ad filter")
+    print(f"  Before: {after_length} items")
+    print(f"  After: {after_length - rejected['ads']} items")
+    print(f"  Removed: {rejected['ads']}\n")
     
-    ad_keywords = [
-        "purchase", "click", "scan", "contact", "wechat",
-        "earn", "daily", "monthly", "free", "limited",
-        "buy", "promotional", "discount", "agent", "franchise"
-    ]
-    
-    filtered = []
-    for item in items:
-        content = item.get("_cleaned_content", "")
-        
-        # 检查广告特征
-        is_ad = False
-        for kw in ad_keywords:
-            if kw in content and (content.count(kw) > 1 or len(content) < 20):
-                is_ad = True
-                break
-        
-        if not is_ad:
-            filtered.append(item)
-    
-    removed = len(items) - len(filtered)
-    print(f"  Before: {len(items)} items")
-    print(f"  After: {len(filtered)} items")
-    print(f"  Removed: {removed}\n")
-    
-    return filtered
-
-def normalize(items):
-    """规范化内容"""
     print("[STEP5] Normalize")
+    print(f"[OK] Normalized: {len(cleaned)} items\n")
     
-    normalized = []
-    for item in items:
-        content = item.get("_cleaned_content", "")
-        
-        # 移除URL
-        content = re.sub(r'http[s]?://\S+', '', content)
-        
-        # 移除emoji
-        content = re.sub(r'[\U0001F300-\U0001F9FF]|[\u2600-\u27BF]', '', content)
-        
-        # 移除[xxx]标签
-        content = re.sub(r'\[.*?\]', '', content)
-        
-        # 移除多余空格
-        content = ' '.join(content.split())
-        
-        clean_item = {
-            "content": content,
-            "platform": "xiaohongshu",
-            "keywords": item.get("tag_list", "") or item.get("source_keyword", ""),
-        }
-        
-        normalized.append(clean_item)
-    
-    print(f"[OK] Normalized: {len(normalized)} items\n")
-    return normalized
+    return cleaned
 
 # ============================================================================
 # 导出
@@ -216,7 +115,7 @@ def export_json(items, output_file):
         json.dump({
             "total": len(items),
             "data": items
-        }, f, ensure_ascii=False, indent=2)
+        }, f, ensure_ascii=False, indent=2, default=json_default)
     
     print(f"[OK] Saved {len(items)} items\n")
 
@@ -232,24 +131,13 @@ def main():
     
     # 1. 加载
     print("[STEP1] Load raw data")
-    items = load_data()
+    # 2-5. 去重、长度过滤、广告过滤、规范化（边加载边清洁）
+    items = clean(load_data())
     
-    if not items:
+    if items is None:
         print("[ERR] No data, exit")
         return False
     
-    # 2. 去重
-    items = deduplicate(items)
-    
-    # 3. 长度过滤
-    items = filter_length(items)
-    
-    # 4. 广告过滤
-    items = filter_ads(items)
-    
-    # 5. 规范化
-    items = normalize(items)
-    
     # 6. 导出
     export_txt(items, OUTPUT_TXT)
     export_json(items, OUTPUT_JSON)
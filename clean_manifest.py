@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+增量清洁清单 - 已清洁的原始文件 + 持久化的去重状态
+
+4_merge_and_clean.py 原来每次都重新清洁全部历史原始数据并覆盖输出。清单记录：
+    files        每个已清洁原始文件的 size / mtime / sha1
+    fingerprint  清洁规则（CLEAN_CONFIG）的指纹，变化时全量重建
+    records      输出中已有的条数
+去重状态与清单放在同一目录，只追加写入：
+    .dedup_hashes.bin       已收录内容的 md5 摘要（每条16字节）
+    .near_signatures.bin    semantic 模式下已收录文本的 MinHash 签名
+
+再次运行时只清洁新增或变化的原始文件（size/mtime 变了才计算 sha1），
+与历史内容重复的记录由加载的去重状态去掉，其余追加到输出末尾。
+变化的文件整体重读，其中已清洁过的记录作为重复跳过。
+
+由 pipeline_orchestrator.py 调用时，环境变量 PIPELINE_CHANGED_INPUTS 列出本次变化的
+输入文件，不在列表中的已登记文件直接视为未变化，不再检查。
+
+使用方法：
+    python 4_merge_and_clean.py             # 增量（首次运行或规则变化时全量）
+    python 4_merge_and_clean.py --full      # 强制全量重建
+
+    python clean_manifest.py                # 查看清单
+    python clean_manifest.py --reset        # 删除清单和去重状态（下次全量）
+"""
+
+import hashlib
+import json
+import os
+import sys
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+import config
+
+MANIFEST_FILE = config.CLEAN_DATA_DIR / ".clean_manifest.json"
+HASHES_FILE = config.CLEAN_DATA_DIR / ".dedup_hashes.bin"
+SIGNATURES_FILE = config.CLEAN_DATA_DIR / ".near_signatures.bin"
+DIGEST_SIZE = 16
+
+# 不影响清洁结果的配置项
+_FINGERPRINT_IGNORE = {"workers"}
+
+
+def rel_path(path):
+    """相对项目根目录的路径（与 pipeline_orchestrator 的 PIPELINE_CHANGED_INPUTS 一致）"""
+    path = Path(path)
+    try:
+        return str(path.resolve().relative_to(config.PROJECT_ROOT.resolve()))
+    except ValueError:
+        return str(path)
+
+
+def rules_fingerprint():
+    """清洁规则的指纹"""
+    rules = {k: v for k, v in config.CLEAN_CONFIG.items() if k not in _FINGERPRINT_IGNORE}
+    return hashlib.md5(json.dumps(rules, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def changed_inputs_hint():
+    """编排器传入的变化文件集合；没有时返回 None"""
+    value = os.environ.get("PIPELINE_CHANGED_INPUTS")
+    if value is None:
+        return None
+    try:
+        return set(json.loads(value))
+    except ValueError:
+        return None
+
+
+class CleanManifest:
+    """已清洁原始文件清单和去重状态"""
+
+    def __init__(self, path=MANIFEST_FILE, hashes_file=HASHES_FILE, signatures_file=SIGNATURES_FILE):
+        self.path = Path(path)
+        self.hashes_file = Path(hashes_file)
+        self.signatures_file = Path(signatures_file)
+        self.files = {}
+        self.fingerprint = None
+        self.records = 0
+        self.updated_at = None
+        self._pending = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.files = data.get("files", {})
+            self.fingerprint = data.get("fingerprint")
+            self.records = data.get("records", 0)
+            self.updated_at = data.get("updated_at")
+
+    def incremental_reason(self, fingerprint, outputs):
+        """不能增量时返回原因（需要全量重建），可以增量时返回 None"""
+        if not self.files:
+            return "首次运行"
+        if self.fingerprint != fingerprint:
+            return "清洁规则（CLEAN_CONFIG）已变化"
+        if not self.hashes_file.exists():
+            return "去重状态缺失"
+        missing = [p for p in outputs if not Path(p).exists()]
+        if missing:
+            return f"输出文件缺失 {Path(missing[0]).name}"
+        return None
+
+    def changed(self, paths, hint=None):
+        """新增或内容变化的文件；所有文件的新指纹在 commit 时写入清单"""
+        result = []
+        for path in paths:
+            key = rel_path(path)
+            entry = self.files.get(key)
+            if entry is not None and hint is not None and key not in hint:
+                continue
+            stat = os.stat(path)
+            current = {"size": stat.st_size, "mtime": stat.st_mtime}
+            if entry is not None and entry["size"] == current["size"] and entry["mtime"] == current["mtime"]:
+                continue
+            current["sha1"] = file_sha1(path)
+            self._pending[key] = current
+            if entry is None or entry.get("sha1") != current["sha1"]:
+                result.append(path)
+        return result
+
+    def reset(self):
+        """全量重建：清空记录和去重状态"""
+        self.files = {}
+        self.records = 0
+        self._pending = {}
+        for state_file in (self.hashes_file, self.signatures_file):
+            if state_file.exists():
+                state_file.unlink()
+
+    # ------------------------------------------------------------------
+    # 去重状态
+    # ------------------------------------------------------------------
+
+    def load_hashes(self):
+        """已收录内容的摘要（dict 保留顺序，新增的摘要追加在末尾）"""
+        if not self.hashes_file.exists():
+            return {}
+        data = self.hashes_file.read_bytes()
+        return dict.fromkeys(data[i:i + DIGEST_SIZE] for i in range(0, len(data), DIGEST_SIZE))
+
+    def load_signatures(self):
+        signatures = array('I')
+        if self.signatures_file.exists():
+            signatures.frombytes(self.signatures_file.read_bytes())
+        return signatures
+
+    def append_dedup_state(self, new_hashes, new_signatures=None):
+        """追加本次新收录的摘要和签名"""
+        self.hashes_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.hashes_file, 'ab') as f:
+            f.write(b''.join(new_hashes))
+        if new_signatures:
+            with open(self.signatures_file, 'ab') as f:
+                new_signatures.tofile(f)
+
+    def commit(self, fingerprint, records_added):
+        """输出和去重状态写完后，登记本次处理的文件"""
+        self.files.update(self._pending)
+        self._pending = {}
+        self.fingerprint = fingerprint
+        self.records += records_added
+        self.updated_at = datetime.now().isoformat(timespec='seconds')
+        data = {
+            "fingerprint": self.fingerprint,
+            "records": self.records,
+            "updated_at": self.updated_at,
+            "files": self.files,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+
+if __name__ == "__main__":
+    manifest = CleanManifest()
+    if "--reset" in sys.argv:
+        manifest.reset()
+        if manifest.path.exists():
+            manifest.path.unlink()
+        print(f"[OK] Reset {manifest.path}")
+        sys.exit(0)
+    if not manifest.files:
+        print(f"[INFO] No clean manifest yet: {manifest.path}")
+        sys.exit(0)
+    print(f"[INFO] {len(manifest.files)} raw files, {manifest.records} clean records, "
+          f"updated {manifest.updated_at}")
+    for key, entry in sorted(manifest.files.items()):
+        print(f"  {key:60s} {entry['size']:>12,} bytes  sha1={entry['sha1'][:12]}")
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+统一清洁引擎 - 四个清洁脚本共用的规则实现和流程
+
+原来四个清洁器各写一套：
+    4_merge_and_clean.DataCleaner           content/text，先去重，长度过滤+截断，中文广告词，规范化
+    clean_data_simple.py                    content/text/desc/title，先去重，英文广告词，宽松URL
+    STEP_1_data_cleaning.DataCleaner        text，预清洁，中文比例 ≥ 0.4，垃圾词，后去重
+    data_collection_pipeline.DataCleaner    text，预清洁，中文比例 ≥ 0.3，后去重
+差异现在只体现在 PROFILES 中的规则参数（CleaningRules），流程和每条规则的实现只有一份，
+脚本只负责读取输入、打印统计和导出。
+
+流程（每批记录）：
+    提取 → [去首尾空白] → [预清洁：合并空白、去不可打印字符、截断] → 空内容
+         → [dedup="first" 时在此去重] → 长度 → 中文比例 → 垃圾词 → 广告词 → [规范化]
+         → [dedup="last" 时在此去重] → [近似去重] → 输出
+近似去重（MinHash LSH）只登记和比较通过了所有规则的记录：被规则淘汰的广告、过短内容
+不会让后面与它近似的正常内容被当成重复。
+每条规则都按整批实现：关键词规则整批一次正则扫描（KeywordMatcher.candidates），
+中文比例/不可打印字符/规范化用 C 层的正则和字符串方法，只对剩余记录执行下一条规则。
+去重之外的步骤都是无状态的，按批（或按原始文件）交给进程池（parallel_clean.py），
+主进程按顺序做去重，结果与单进程完全一致。
+
+使用方法：
+    from cleaning_engine import PROFILES, CleaningEngine
+
+    engine = CleaningEngine(PROFILES["pipeline"], workers=4)
+    texts = list(engine.clean(posts))          # 可迭代的原始记录（dict、RawPost 或字符串）
+    engine.stats   # {'total': ..., 'duplicates': ..., 'final': ..., 'rejected': {'length': ..., ...}}
+
+    records = list(engine.clean_files(paths))  # 原始 JSON 文件 / JSONL 分片，每个文件一个分区（raw_loader 流式解析）
+
+    python benchmark_cleaning_engine.py        # 每条规则和每个配置的吞吐量
+"""
+
+import hashlib
+from collections import namedtuple
+from functools import lru_cache
+
+from near_dedup import MinHasher, NearDuplicateIndex
+from parallel_clean import chunked, imap_partitions, resolve_workers
+from post_records import CleanPost, CompactRecord
+from raw_loader import iter_raw_file
+from text_normalizer import (AD_MATCHER, AD_MATCHER_EN, SPAM_MATCHER, URL_LOOSE_RE, URL_RE,
+                             chinese_count, is_ad, normalize_text, strip_unprintable)
+
+BATCH_SIZE = 2000
+
+# 规则参数
+#   content_fields     依次取第一个非空的字段作为内容（记录不是 dict / RawPost 时取 str(记录)）
+#   strip              提取后去掉首尾空白
+#   preclean           合并空白、去不可打印字符、截断到 max_length
+#   dedup              "first"：提取后立即按内容去重；"last"：通过所有规则后按输出文本去重
+#   min_length / max_length / truncate    长度范围；truncate 为 True 时超长截断而不是判为无效
+#   min_chinese_ratio  中文字符最低占比（0 表示不检查）
+#   spam               出现任意垃圾词即无效（text_normalizer.SPAM_KEYWORDS）
+#   ads                广告词表："zh" / "en" / None，判定规则见 text_normalizer.is_ad
+#   normalize          规范化时移除 URL 的正则："strict" / "loose" / "keep"（保留URL）；None 表示不规范化
+#   remove_emojis      规范化时移除 emoji 和 [xxx] 标签
+#   output             "standard"（标准字段记录）/ "xhs"（小红书记录）/ "text"（只要文本）；
+#                      记录为 post_records.CleanPost，写出时用 to_dict() 或 json_default
+CleaningRules = namedtuple("CleaningRules", [
+    "content_fields", "strip", "preclean", "dedup",
+    "min_length", "max_length", "truncate", "min_chinese_ratio",
+    "spam", "ads", "normalize", "remove_emojis", "output",
+], defaults=[("content", "text"), False, False, "first", 10, 500, True, 0, False, None, None, True, "text"])
+
+PROFILES = {
+    "merge": CleaningRules(ads="zh", normalize="strict", output="standard"),
+    "simple": CleaningRules(content_fields=("content", "text", "desc", "title"), strip=True,
+                            ads="en", normalize="loose", output="xhs"),
+    "step1": CleaningRules(content_fields=("text",), preclean=True, dedup="last", truncate=False,
+                           min_chinese_ratio=0.4, spam=True),
+    "pipeline": CleaningRules(content_fields=("text",), preclean=True, dedup="last", truncate=False,
+                              min_chinese_ratio=0.3),
+}
+
+AD_MATCHERS = {"zh": AD_MATCHER, "en": AD_MATCHER_EN}
+URL_PATTERNS = {"strict": URL_RE, "loose": URL_LOOSE_RE, "keep": None}
+
+# 按字段取内容的记录类型（其他记录按 str(记录) 处理）
+RECORD_TYPES = (dict, CompactRecord)
+
+# 规则名（按执行顺序），也是 stats["rejected"] 的键
+RULES = ("empty", "length", "chinese", "spam", "ads")
+
+
+# ============================================================================
+# 整批实现的规则（输入文本列表，返回是否通过的列表）
+# ============================================================================
+
+def content_digest(content):
+    """内容哈希（16字节 md5 摘要）"""
+    return hashlib.md5(content.encode()).digest()
+
+
+def extract_contents(items, fields):
+    """每条记录的内容文本"""
+    contents = []
+    for item in items:
+        if not isinstance(item, RECORD_TYPES):
+            contents.append(str(item))
+            continue
+        content = ""
+        for field in fields:
+            content = item.get(field, "")
+            if content:
+                break
+        contents.append(content if isinstance(content, str) else "")
+    return contents
+
+
+def preclean_batch(texts, max_length):
+    """合并空白、去不可打印字符、截断"""
+    return [strip_unprintable(' '.join(t.split()))[:max_length].strip() for t in texts]
+
+
+def length_ok(texts, min_length, max_length=None):
+    if max_length is None:
+        return [len(t) >= min_length for t in texts]
+    return [min_length <= len(t) <= max_length for t in texts]
+
+
+def chinese_ratio_ok(texts, ratio):
+    return [chinese_count(t) >= len(t) * ratio for t in texts]
+
+
+def keywords_free(texts, matcher):
+    """不含任何关键词"""
+    hits = matcher.candidates(texts)
+    return [i not in hits for i in range(len(texts))]
+
+
+def ads_free(texts, matcher):
+    """不是广告：整批预过滤后只对可能命中的文本做完整判定"""
+    ok = [True] * len(texts)
+    for i in matcher.candidates(texts):
+        ok[i] = not is_ad(texts[i], matcher)
+    return ok
+
+
+def normalize_batch(texts, url_re, remove_emojis=True):
+    return [normalize_text(t, True, remove_emojis, url_re) if url_re is not None
+            else normalize_text(t, False, remove_emojis) for t in texts]
+
+
+def build_output(item, content, kind):
+    """输出记录"""
+    if kind == "text" or not isinstance(item, RECORD_TYPES):
+        return content
+    if kind == "xhs":
+        return CleanPost(
+            content=content,
+            platform="xiaohongshu",
+            keywords=item.get("tag_list", "") or item.get("source_keyword", ""),
+        )
+    return CleanPost(
+        platform=item.get("platform", "xiaohongshu"),  # 默认小红书
+        content=content,
+        keywords=item.get("keyword", "") or item.get("tag_list", "") or item.get("source_keyword", ""),
+        source_url=item.get("source_url", "") or item.get("note_url", ""),
+        crawl_time=item.get("crawl_time", "") or item.get("time", ""),
+    )
+
+
+# ============================================================================
+# 无状态步骤（可在子进程中执行）
+# ============================================================================
+
+@lru_cache(maxsize=None)
+def _hasher(num_perm, shingle_size):
+    return MinHasher(num_perm, shingle_size)
+
+
+def _apply(alive, rejected, name, oks):
+    """按 oks 淘汰 alive 中的记录，返回剩余的下标"""
+    remaining = []
+    for i, ok in zip(alive, oks):
+        if ok:
+            remaining.append(i)
+        else:
+            rejected[i] = name
+    return remaining
+
+
+def clean_batch(items, rules, minhash=None):
+    """一批记录的无状态步骤
+
+    返回与 items 一一对应的 (去重键, MinHash签名, 未通过的规则, 输出)：
+    未通过的规则为 None 表示通过了所有规则；去重键和签名只在需要去重的记录上计算。
+    """
+    texts = extract_contents(items, rules.content_fields)
+    if rules.strip:
+        texts = [t.strip() for t in texts]
+    if rules.preclean:
+        texts = preclean_batch(texts, rules.max_length)
+
+    n = len(texts)
+    rejected = [None] * n
+    keys = [None] * n
+    sigs = [None] * n
+    alive = _apply(range(n), rejected, "empty", texts)
+    hasher = _hasher(*minhash) if minhash else None
+
+    def fingerprint(indices):
+        for i in indices:
+            keys[i] = content_digest(texts[i])
+            if hasher is not None:
+                sigs[i] = hasher.signature(texts[i])
+
+    if rules.dedup == "first":
+        fingerprint(alive)
+
+    # 长度（超长截断或判为无效）
+    subset = [texts[i] for i in alive]
+    if rules.truncate:
+        alive = _apply(alive, rejected, "length", length_ok(subset, rules.min_length))
+        for i in alive:
+            if len(texts[i]) > rules.max_length:
+                texts[i] = texts[i][:rules.max_length]
+    else:
+        alive = _apply(alive, rejected, "length", length_ok(subset, rules.min_length, rules.max_length))
+
+    if rules.min_chinese_ratio:
+        alive = _apply(alive, rejected, "chinese",
+                       chinese_ratio_ok([texts[i] for i in alive], rules.min_chinese_ratio))
+    if rules.spam:
+        alive = _apply(alive, rejected, "spam", keywords_free([texts[i] for i in alive], SPAM_MATCHER))
+    if rules.ads:
+        alive = _apply(alive, rejected, "ads", ads_free([texts[i] for i in alive], AD_MATCHERS[rules.ads]))
+
+    if rules.normalize:
+        normalized = normalize_batch([texts[i] for i in alive], URL_PATTERNS[rules.normalize], rules.remove_emojis)
+        for i, text in zip(alive, normalized):
+            texts[i] = text
+
+    if rules.dedup == "last":
+        fingerprint(alive)
+
+    outputs = [None] * n
+    for i in alive:
+        outputs[i] = build_output(items[i], texts[i], rules.output)
+    return list(zip(keys, sigs, rejected, outputs))
+
+
+def _clean_batch_task(task):
+    return clean_batch(*task)
+
+
+def _clean_file_task(task):
+    """一个原始文件：边解析边按批清洁，返回 (条数, 错误信息, 结果)"""
+    path, rules, minhash = task
+    count = 0
+    results = []
+    try:
+        for batch in chunked(iter_raw_file(path), BATCH_SIZE):
+            count += len(batch)
+            results.extend(clean_batch(batch, rules, minhash))
+    except Exception as e:
+        return 0, str(e), []
+    return count, None, results
+
+
+# ============================================================================
+# 引擎（主进程：调度 + 去重 + 统计）
+# ============================================================================
+
+class CleaningEngine:
+    """按规则清洁记录；workers > 1 时无状态步骤在进程池中执行
+
+    seen 为已收录内容的摘要（dict 保留插入顺序，可预先加载历史状态做增量清洁），
+    near_threshold 不为 None 时再用 MinHash LSH 去掉近似重复。
+    """
+
+    def __init__(self, rules, workers=1, near_threshold=None):
+        self.rules = rules
+        self.workers = resolve_workers(workers)
+        self.seen = {}
+        self.near_index = NearDuplicateIndex(near_threshold) if near_threshold else None
+        self.stats = {"total": 0, "duplicates": 0, "final": 0, "rejected": dict.fromkeys(RULES, 0)}
+
+    @property
+    def minhash(self):
+        if self.near_index is None:
+            return None
+        return self.near_index.num_perm, self.near_index.hasher.shingle_size
+
+    def _is_duplicate(self, key):
+        if key in self.seen:
+            return True
+        self.seen[key] = None
+        return False
+
+    def _is_near_duplicate(self, sig):
+        """只对通过所有规则的记录调用：不重复时签名加入索引"""
+        return self.near_index is not None and self.near_index.is_duplicate_signature(sig)
+
+    def merge(self, results):
+        """按顺序去重、计数，产出保留的输出"""
+        stats = self.stats
+        rejected_counts = stats["rejected"]
+        dedup_first = self.rules.dedup == "first"
+        for key, sig, rejected, output in results:
+            stats["total"] += 1
+            if rejected == "empty" or (rejected is not None and not dedup_first):
+                rejected_counts[rejected] += 1
+                continue
+            if self._is_duplicate(key):
+                stats["duplicates"] += 1
+                continue
+            if rejected is not None:
+                rejected_counts[rejected] += 1
+                continue
+            if self._is_near_duplicate(sig):
+                stats["duplicates"] += 1
+                continue
+            stats["final"] += 1
+            yield output
+
+    def clean(self, items, batch_size=BATCH_SIZE):
+        """清洁可迭代的记录，按原顺序产出保留的输出"""
+        tasks = ((batch, self.rules, self.minhash) for batch in chunked(items, batch_size))
+        for results in imap_partitions(_clean_batch_task, tasks, self.workers):
+            yield from self.merge(results)
+
+    def clean_files(self, paths, on_file=None):
+        """清洁原始文件（每个文件一个分区），on_file(路径, 条数, 错误信息) 在合并每个文件前调用"""
+        paths = list(paths)
+        tasks = ((path, self.rules, self.minhash) for path in paths)
+        for path, (count, error, results) in zip(paths, imap_partitions(_clean_file_task, tasks, self.workers)):
+            if on_file is not None:
+                on_file(path, count, error)
+            yield from self.merge(results)
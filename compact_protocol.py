@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+紧凑响应协议 - 减少LLM输出token
+
+模型不再返回带长键名的JSON对象，而是返回一个定长位置数组：
+
+    [情感, 情感置信度, 话题, 话题置信度, 模式, 模式置信度,
+     风险, 风险置信度, 参与方, 参与方置信度]
+
+- 维度值用枚举下标表示，复合标签用 "0|1" 表示
+- 置信度用 0-99 的整数表示（省去 "0." 前缀）
+- 只有高风险（critical/high）或负面舆论才在末尾追加
+  key_phrase 和 brief_summary 两个字符串
+
+decode_compact_response() 把数组还原成 analysis_results.json 中的原有记录格式，
+下游的 Streamlit 页面无需任何修改。
+"""
+
+import json
+
+# ============================================================================
+# 枚举表（顺序即编码，不能随意调整）
+# ============================================================================
+
+SENTIMENTS = ["positive", "neutral", "negative"]
+TOPICS = ["tax_policy", "price_impact", "compliance", "business_risk", "advocacy", "other"]
+PATTERNS = ["0110", "9610", "9710", "9810", "1039", "Temu", "multiple", "unknown"]
+RISK_LEVELS = ["critical", "high", "medium", "low"]
+ACTORS = ["enterprise", "consumer", "government", "cross_border_seller", "general_public", "multiple"]
+
+# (字段名, 置信度字段名, 枚举表)，顺序与数组位置一一对应
+FIELDS = [
+    ("sentiment", "sentiment_confidence", SENTIMENTS),
+    ("topic", "topic_confidence", TOPICS),
+    ("pattern", "pattern_confidence", PATTERNS),
+    ("risk_level", "risk_confidence", RISK_LEVELS),
+    ("actor", "actor_confidence", ACTORS),
+]
+
+# 需要追加摘要的条件
+SUMMARY_RISK_LEVELS = {"critical", "high"}
+SUMMARY_SENTIMENTS = {"negative"}
+
+
+def _enum_line(name, values):
+    return f"{name}: " + " ".join(f"{i}={v}" for i, v in enumerate(values))
+
+
+COMPACT_SYSTEM_PROMPT = f"""你是跨境电商税收舆论分析系统。对舆论做5维度分类，只返回一个JSON数组，不要任何解释。
+
+编码表：
+{_enum_line("S情感", SENTIMENTS)}
+{_enum_line("T话题", TOPICS)}
+{_enum_line("P模式", PATTERNS)}
+{_enum_line("R风险", RISK_LEVELS)}
+{_enum_line("A参与方", ACTORS)}
+
+返回格式：[S,Sc,T,Tc,P,Pc,R,Rc,A,Ac]
+- S/T/P/R/A 填编号；多个标签用字符串 "0|1"
+- Sc/Tc/Pc/Rc/Ac 为置信度，0-99整数
+- 仅当 R 为0或1（严重/高风险）或 S 为2（负面）时，末尾再追加两个字符串：
+  关键短语（原文摘取）、简短总结（20字以内）
+
+示例：[1,90,5,80,7,85,3,80,1,75]
+示例：[2,85,0,90,7,75,1,88,1,80,"补税压力大","卖家担忧补税导致现金流紧张"]"""
+
+
+class CompactDecodeError(ValueError):
+    """紧凑响应无法解析"""
+
+
+def _strip_code_fence(text):
+    """去掉可能的markdown代码块包装"""
+    text = text.strip()
+    if text.startswith("```"):
+        start = text.find('\n') + 1
+        end = text.rfind('```')
+        text = text[start:end].strip()
+    return text
+
+
+def _decode_enum(code, values):
+    """把下标（或 "0|1" 形式的复合下标）还原为标签"""
+    if isinstance(code, bool):
+        raise CompactDecodeError(f"非法编号: {code!r}")
+    if isinstance(code, int):
+        parts = [code]
+    elif isinstance(code, str):
+        try:
+            parts = [int(p) for p in code.split('|') if p.strip()]
+        except ValueError:
+            # 模型偶尔直接返回标签原文，原样接受
+            if all(p.strip() in values for p in code.split('|')):
+                return code
+            raise CompactDecodeError(f"非法编号: {code!r}")
+    elif isinstance(code, list):
+        parts = code
+    else:
+        raise CompactDecodeError(f"非法编号: {code!r}")
+
+    labels = []
+    for idx in parts:
+        if not isinstance(idx, int) or not 0 <= idx < len(values):
+            raise CompactDecodeError(f"编号越界: {idx!r}")
+        labels.append(values[idx])
+    if not labels:
+        raise CompactDecodeError("空编号")
+    return '|'.join(labels)
+
+
+def _decode_confidence(value):
+    """0-99整数 → 0-1浮点；兼容模型直接返回小数"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise CompactDecodeError(f"非法置信度: {value!r}")
+    if value > 1:
+        value = value / 100
+    return round(min(max(value, 0.0), 1.0), 2)
+
+
+def needs_summary(record):
+    """是否属于需要摘要的舆论（高风险或负面）"""
+    if record.get("risk_level") in SUMMARY_RISK_LEVELS:
+        return True
+    sentiments = str(record.get("sentiment", "")).split('|')
+    return any(s in SUMMARY_SENTIMENTS for s in sentiments)
+
+
+def decode_compact_response(result_text):
+    """把模型返回的紧凑数组解码为 analysis_results.json 的记录格式
+
+    无法解析时抛出 CompactDecodeError。
+    """
+    text = _strip_code_fence(result_text)
+    try:
+        arr = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise CompactDecodeError(f"不是有效JSON: {e}")
+
+    if not isinstance(arr, list) or len(arr) < len(FIELDS) * 2:
+        raise CompactDecodeError(f"数组长度不足: {text[:50]}")
+
+    record = {}
+    for i, (field, conf_field, values) in enumerate(FIELDS):
+        record[field] = _decode_enum(arr[2 * i], values)
+        record[conf_field] = _decode_confidence(arr[2 * i + 1])
+
+    extras = arr[len(FIELDS) * 2:]
+    record["key_phrase"] = str(extras[0]) if len(extras) > 0 else ""
+    record["brief_summary"] = str(extras[1]) if len(extras) > 1 else ""
+
+    return record
+
+
+def encode_record(record):
+    """把完整记录编码为紧凑数组（用于构造few-shot示例和测算token节省）"""
+    arr = []
+    for field, conf_field, values in FIELDS:
+        labels = str(record.get(field, "")).split('|')
+        idxs = [values.index(l) for l in labels if l in values]
+        if not idxs:
+            idxs = [len(values) - 1]
+        arr.append(idxs[0] if len(idxs) == 1 else '|'.join(str(i) for i in idxs))
+        arr.append(int(round(float(record.get(conf_field, 0)) * 100)))
+    if needs_summary(record):
+        arr.append(record.get("key_phrase", ""))
+        arr.append(record.get("brief_summary", ""))
+    return arr
+
+
+if __name__ == "__main__":
+    # 用已有分析结果估算输出长度的缩减比例
+    from pathlib import Path
+    from statistics import median
+
+    analysis_file = Path("data/analysis/analysis_results.json")
+    with open(analysis_file, 'r', encoding='utf-8') as f:
+        records = json.load(f).get('data', [])
+
+    verbose_keys = ["sentiment", "sentiment_confidence", "topic", "topic_confidence",
+                    "pattern", "pattern_confidence", "risk_level", "risk_confidence",
+                    "actor", "actor_confidence", "key_phrase", "brief_summary"]
+
+    verbose_lens = []
+    compact_lens = []
+    for r in records:
+        verbose = {k: r.get(k) for k in verbose_keys}
+        verbose_lens.append(len(json.dumps(verbose, ensure_ascii=False, indent=4)))
+        compact_lens.append(len(json.dumps(encode_record(r), ensure_ascii=False, separators=(',', ':'))))
+
+    flagged = sum(1 for r in records if needs_summary(r))
+    print(f"[INFO] Records: {len(records)}, need summary: {flagged} ({100*flagged/len(records):.1f}%)")
+    print(f"[INFO] Median completion chars: verbose={median(verbose_lens)}, compact={median(compact_lens)}")
+    print(f"[INFO] Reduction: {100*(1 - median(compact_lens)/median(verbose_lens)):.1f}%")
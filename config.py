@@ -110,6 +110,17 @@ CRAWL_CONFIG = {
     }
 }
 
+# 自适应礼貌延迟（politeness.py，AIMD：正常时加法提速，异常时乘法退避）
+POLITENESS_CONFIG = {
+    "floor_ratio": 0.5,        # 最短延迟 = delay_min × 0.5
+    "max_delay": 60,           # 最长延迟（秒）
+    "increase_step": 0.02,     # 每次正常响应，速率增加（次/秒）
+    "backoff_factor": 0.5,     # 非200/空页时速率乘以该系数（验证码页乘两次）
+    "captcha_cooldown": 30,    # 遇到验证码后暂停（秒）
+    "jitter": 0.2,             # 延迟随机抖动 ±20%
+    "stale_hours": 24          # 超过该时间未更新的状态作废
+}
+
 # ============================================================================
 # 数据清洁配置
 # ============================================================================
@@ -120,8 +131,8 @@ CLEAN_CONFIG = {
     "max_length": 500,     # 太长的文本截断
     
     # 去重标准
-    "dedup_method": "hash",  # 'hash'（快速）或 'semantic'（精确）
-    "dedup_threshold": 0.95,  # 相似度阈值
+    "dedup_method": "hash",  # 'hash'（完全相同，快速）或 'semantic'（MinHash近似去重，见 near_dedup.py）
+    "dedup_threshold": 0.95,  # semantic 模式的相似度阈值（字符3-gram Jaccard；0.95 时召回约 85-88%，见 near_dedup.py）
     
     # 过滤规则
     "remove_ads": True,      # 过滤广告
@@ -133,7 +144,10 @@ CLEAN_CONFIG = {
     
     # 编码
     "encoding": "utf-8",
-    "normalize_unicode": True
+    "normalize_unicode": True,
+    
+    # 并行：原始文件/分片分给多个进程清洁，再统一去重（0 = CPU核数，1 = 单进程）
+    "workers": 0
 }
 
 # ============================================================================
@@ -155,6 +169,12 @@ OUTPUT_CONFIG = {
     "clean_log_file": LOGS_DIR / "clean.log"
 }
 
+# 原始数据分片（爬虫流式写入 data/raw/<平台>/*.jsonl[.gz]）
+SHARD_CONFIG = {
+    "max_records": 5000,   # 每个分片最多条数，超过后轮换
+    "compress": True       # gzip 压缩
+}
+
 # ============================================================================
 # 日志配置
 # ============================================================================
@@ -186,6 +206,45 @@ LLM_CONFIG = {
     "delay_between_batches": 1  # 秒
 }
 
+# ============================================================================
+# 主动学习配置（本地分类器蒸馏LLM标注）
+# ============================================================================
+
+ANALYSIS_DATA_DIR = DATA_DIR / "analysis"
+
+ACTIVE_LEARNING_CONFIG = {
+    # 特征：'hashing'（无状态，最快）或 'tfidf'（字符n-gram TF-IDF）
+    "features": "hashing",
+    "ngram_range": (1, 3),
+    "n_features": 2 ** 18,
+
+    # 训练/评估
+    "holdout_ratio": 0.2,     # 留出多少LLM标注做准确率评估
+    "random_state": 42,
+
+    # 打分与选样
+    "batch_size": 5000,       # 向量化打分的批大小
+    "query_size": 200,        # 每轮送给LLM的条数
+    "disagreement_weight": 0.5,  # 与风险词典不一致的额外权重
+    "min_local_confidence": 0.6,  # 各维度置信度都不低于此值的本地预测才直接采用（不再送LLM）
+
+    # 输出
+    "output_dir": ANALYSIS_DATA_DIR / "active_learning",
+}
+
+# ============================================================================
+# 分层抽样配置（预算有限时的标注模式）
+# ============================================================================
+
+SAMPLING_CONFIG = {
+    "enabled": False,          # True：按预算抽样标注，仪表盘显示外推估计
+    "budget": 500,             # LLM调用预算（样本量）
+    "min_per_stratum": 2,      # 每层最少抽样数（≥2 才能估计方差）
+    "date_granularity": "week",  # 采集日期分层粒度：'day' / 'week' / 'month'
+    "confidence": 0.95,        # 置信区间水平
+    "random_state": 42
+}
+
 # ============================================================================
 # 验证配置
 # ============================================================================
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+采集边界（frontier） - 基于布隆过滤器的URL/帖子ID去重
+
+爬虫把解析出的每条帖子都追加到 self.posts / self.all_posts，去重留给清洗阶段。
+重叠的关键词（如“跨境电商”和“电商税收”）会把同一条帖子采集很多次。
+这里每个平台维护一个持久化的布隆过滤器，记录见过的帖子ID和已访问的URL，
+跨关键词、跨运行共享：
+    - 已成功抓取的页面在抓取前跳过（抓取失败的不登记；搜索结果页只在本次运行内去重，每日刷新仍会重新抓取）
+    - 已见过的帖子在进入结果列表前丢弃
+    - 统计避免的重复率
+
+布隆过滤器只会误判“见过”（概率 ≤ error_rate），不会漏判。
+
+使用方法：
+    from crawl_frontier import CrawlFrontier
+    frontier = CrawlFrontier("weibo")
+    posts = frontier.filter_new(posts)
+
+    # 之后还要截断（如全局预算）时，只登记真正写出的帖子
+    posts = budget.accept(frontier.select_new(posts))
+    frontier.mark(posts)
+    frontier.save()
+    print(frontier.report())
+
+    python crawl_frontier.py            # 查看各平台过滤器状态
+"""
+
+import hashlib
+import json
+import math
+import os
+import sys
+
+import config
+from crawl_state import post_id
+
+FRONTIER_DIR = config.DATA_DIR / "frontier"
+
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_ERROR_RATE = 0.001
+
+_MAGIC = b"BLOOM1\n"
+
+
+class BloomFilter:
+    """定长位数组布隆过滤器（双重哈希）"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key):
+        """加入key，返回它之前是否已存在"""
+        bits = self.bits
+        existed = True
+        for p in self._positions(key):
+            byte, mask = p >> 3, 1 << (p & 7)
+            if not bits[byte] & mask:
+                existed = False
+                bits[byte] |= mask
+        if not existed:
+            self.count += 1
+        return existed
+
+    def save(self, path):
+        header = json.dumps({"capacity": self.capacity, "error_rate": self.error_rate,
+                             "num_bits": self.num_bits, "num_hashes": self.num_hashes,
+                             "count": self.count}).encode('utf-8')
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(_MAGIC + header + b"\n")
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            if f.readline() != _MAGIC:
+                raise ValueError(f"不是布隆过滤器文件：{path}")
+            meta = json.loads(f.readline())
+            bloom = cls.__new__(cls)
+            bloom.capacity = meta["capacity"]
+            bloom.error_rate = meta["error_rate"]
+            bloom.num_bits = meta["num_bits"]
+            bloom.num_hashes = meta["num_hashes"]
+            bloom.count = meta["count"]
+            bloom.bits = bytearray(f.read())
+        return bloom
+
+
+class CrawlFrontier:
+    """单个平台的采集边界"""
+
+    def __init__(self, platform, frontier_dir=FRONTIER_DIR,
+                 capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        self.platform = platform
+        self.path = os.path.join(frontier_dir, f"{platform}.bloom")
+        if os.path.exists(self.path):
+            self.bloom = BloomFilter.load(self.path)
+        else:
+            self.bloom = BloomFilter(capacity, error_rate)
+        self._run_urls = set()
+        self.stats = {"posts": 0, "posts_skipped": 0, "urls": 0, "urls_skipped": 0}
+
+    def is_visited(self, url, persistent=True):
+        """页面是否已成功抓取过（是则应跳过抓取）
+
+        persistent=False 时只在本次运行内去重（搜索结果页会随时间变化）。
+        """
+        self.stats["urls"] += 1
+        seen = ("url:" + url) in self.bloom if persistent else url in self._run_urls
+        if seen:
+            self.stats["urls_skipped"] += 1
+        return seen
+
+    def mark_visited(self, url, persistent=True):
+        """抓取成功后登记页面；失败的页面不登记，之后还会重试"""
+        if persistent:
+            self.bloom.add("url:" + url)
+        else:
+            self._run_urls.add(url)
+
+    def select_new(self, posts):
+        """只保留第一次出现的帖子（同一批内也去重），但不登记
+
+        先按预算等截断，再用 mark 登记真正写出的帖子；被截掉的帖子下次仍算新的。
+        """
+        new = []
+        batch = set()
+        for post in posts:
+            self.stats["posts"] += 1
+            key = "post:" + post_id(post)
+            if key in batch or key in self.bloom:
+                self.stats["posts_skipped"] += 1
+                continue
+            batch.add(key)
+            new.append(post)
+        return new
+
+    def mark(self, posts):
+        """登记已写出的帖子"""
+        for post in posts:
+            self.bloom.add("post:" + post_id(post))
+
+    def filter_new(self, posts):
+        """只保留第一次出现的帖子并登记（之后不再截断时使用）"""
+        posts = self.select_new(posts)
+        self.mark(posts)
+        return posts
+
+    def avoidance_rate(self):
+        total = self.stats["posts"] + self.stats["urls"]
+        skipped = self.stats["posts_skipped"] + self.stats["urls_skipped"]
+        return skipped / total if total else 0.0
+
+    def report(self):
+        s = self.stats
+        return (f"{self.platform}：跳过重复帖子 {s['posts_skipped']}/{s['posts']}，"
+                f"跳过已访问页面 {s['urls_skipped']}/{s['urls']}，"
+                f"重复避免率 {self.avoidance_rate():.1%}")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.bloom.save(self.path)
+        if self.bloom.count > self.bloom.capacity:
+            print(f"[WARN] {self.platform} frontier holds {self.bloom.count} keys (> capacity "
+                  f"{self.bloom.capacity}); false-positive rate is rising")
+
+
+if __name__ == "__main__":
+    frontier_dir = sys.argv[1] if len(sys.argv) > 1 else FRONTIER_DIR
+    if not os.path.isdir(frontier_dir):
+        print(f"[INFO] No frontier yet: {frontier_dir}")
+        sys.exit(0)
+    for name in sorted(os.listdir(frontier_dir)):
+        if name.endswith(".bloom"):
+            bloom = BloomFilter.load(os.path.join(frontier_dir, name))
+            fill = bloom.count / bloom.capacity
+            print(f"  {name[:-6]:12s} keys={bloom.count:>9} capacity={bloom.capacity:>9} "
+                  f"fill={fill:.1%} size={len(bloom.bits) / 1024:.0f} KB")
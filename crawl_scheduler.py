@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+爬虫调度器 - 三个平台并发采集
+
+原来 1_/2_/3_crawl_*_mediacrawler.py 依次运行，每个脚本大部分时间都在
+等自己平台的限流延迟。这里把三个平台放在各自的线程里同时运行：
+- 每个平台有自己的请求间隔（politeness 的 AIMD 控制器，从 config.CRAWL_CONFIG 的
+  delay_min/delay_max 起步），只限制本平台相邻两次请求
+- TARGET_VOLUMES 由全局预算统一控制：各平台不超过自己的目标（允许10%余量），
+  全部平台合计不超过 TARGET_VOLUMES["total"]
+
+总耗时接近最慢的平台，而不是三者之和。
+
+使用方法：
+    python crawl_scheduler.py                      # 三个平台并发
+    python crawl_scheduler.py weibo zhihu          # 只跑指定平台
+
+    # 在代码中并发运行任意采集任务
+    from crawl_scheduler import run_concurrently
+    results, timings = run_concurrently({"weibo": fn1, "zhihu": fn2})
+"""
+
+import importlib
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# 各平台的采集脚本和爬虫类
+PLATFORM_CRAWLERS = {
+    "weibo": ("1_crawl_weibo_mediacrawler", "WeiboOpinionCrawler"),
+    "zhihu": ("2_crawl_zhihu_mediacrawler", "ZhihuOpinionCrawler"),
+    "xiaohongshu": ("3_crawl_xiaohongshu_mediacrawler", "XiaohongshuOpinionCrawler"),
+}
+
+# 单平台允许超过目标的比例（与原微博爬虫的10%预留一致）
+PLATFORM_SLACK = 0.1
+
+
+# ============================================================================
+# 预算
+# ============================================================================
+
+class GlobalBudget:
+    """全局采集量预算（线程安全）"""
+
+    def __init__(self, targets=None, slack=PLATFORM_SLACK):
+        targets = dict(targets or config.TARGET_VOLUMES)
+        self.total_cap = targets.pop("total", None)
+        self.platform_caps = {p: int(n * (1 + slack)) for p, n in targets.items()}
+        self.counts = {p: 0 for p in self.platform_caps}
+        self._lock = threading.Lock()
+
+    def remaining(self, platform):
+        with self._lock:
+            return self._remaining(platform)
+
+    def _remaining(self, platform):
+        left = self.platform_caps.get(platform, 0) - self.counts.get(platform, 0)
+        if self.total_cap is not None:
+            left = min(left, self.total_cap - sum(self.counts.values()))
+        return max(0, left)
+
+    def take(self, platform, n):
+        """申请 n 条的额度，返回实际获准的条数"""
+        with self._lock:
+            granted = min(n, self._remaining(platform))
+            self.counts[platform] = self.counts.get(platform, 0) + granted
+            return granted
+
+    def total(self):
+        with self._lock:
+            return sum(self.counts.values())
+
+
+class PlatformBudget:
+    """单个平台在全局采集量预算中的份额
+
+    拿到数据后用 accept(posts) 截断到剩余额度，exhausted() 为真时停止。
+    请求间隔由爬虫自己的 politeness 控制器负责。
+    """
+
+    def __init__(self, platform, global_budget):
+        self.platform = platform
+        self.global_budget = global_budget
+
+    def accept(self, posts):
+        """按全局预算截断本次获得的数据"""
+        granted = self.global_budget.take(self.platform, len(posts))
+        return posts[:granted]
+
+    def exhausted(self):
+        return self.global_budget.remaining(self.platform) <= 0
+
+
+# ============================================================================
+# 并发执行
+# ============================================================================
+
+def run_concurrently(tasks):
+    """并发运行 {名称: 无参函数}，返回 (结果dict, 耗时dict)
+
+    某个任务出错不影响其他任务，其结果为该异常。
+    """
+    results, timings = {}, {}
+
+    def timed(name, fn):
+        start = time.time()
+        try:
+            return fn()
+        finally:
+            timings[name] = time.time() - start
+
+    with ThreadPoolExecutor(max_workers=max(1, len(tasks))) as pool:
+        futures = {name: pool.submit(timed, name, fn) for name, fn in tasks.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"✗ {name} 失败：{e}")
+                results[name] = e
+    return results, timings
+
+
+class CrawlScheduler:
+    """并发运行各平台的 MediaCrawler 爬虫"""
+
+    def __init__(self, platforms=None, targets=None):
+        self.platforms = list(platforms or PLATFORM_CRAWLERS)
+        self.budget = GlobalBudget(targets)
+        self.crawlers = {}
+
+    def _make_task(self, platform):
+        module_name, class_name = PLATFORM_CRAWLERS[platform]
+
+        def task():
+            module = importlib.import_module(module_name)
+            crawler = getattr(module, class_name)()
+            self.crawlers[platform] = crawler
+            posts = crawler.crawl(budget=PlatformBudget(platform, self.budget))
+            crawler.save_results()
+            return len(posts)
+
+        return task
+
+    def run(self):
+        logger.info("=" * 70)
+        logger.info(f"【并发采集】平台：{', '.join(self.platforms)}")
+        logger.info("=" * 70)
+
+        start = time.time()
+        results, timings = run_concurrently({p: self._make_task(p) for p in self.platforms})
+        wall = time.time() - start
+
+        logger.info("\n【采集汇总】")
+        for platform in self.platforms:
+            result = results.get(platform)
+            status = f"{result} 条" if isinstance(result, int) else f"失败：{result}"
+            logger.info(f"  {platform:12s} {status:20s} {timings.get(platform, 0):8.1f}s")
+        logger.info(f"  合计 {self.budget.total()} 条；总耗时 {wall:.1f}s"
+                    f"（串行需 {sum(timings.values()):.1f}s）")
+        return results
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
+        handlers=[
+            logging.FileHandler(config.LOGS_DIR / "crawl.log", encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+    platforms = sys.argv[1:] or None
+    results = CrawlScheduler(platforms).run()
+    return all(isinstance(r, int) for r in results.values())
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
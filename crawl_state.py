@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+增量采集状态 - 每个 (平台, 关键词) 的高水位标记
+
+每次采集都在整个 DATE_RANGE 内重新搜索所有关键词，已有的帖子被重复下载，
+最后在清洗时作为重复删除。这里持久化每个 (平台, 关键词) 见过的最新帖子：
+    newest_id    最新帖子的ID
+    newest_time  最新帖子的发布时间
+    seen_ids     最近见过的帖子ID（有上限）
+
+之后的采集按页翻到已见内容就停止，每日刷新只抓增量。
+本次运行中观察到的帖子在 save() 时才并入高水位，
+所以同一次运行里后面的页不会被前面的页“挡住”。
+
+使用方法：
+    from crawl_state import CrawlState
+    state = CrawlState()
+    new_posts, hit_seen = state.filter_new("weibo", keyword, posts)
+    state.observe("weibo", keyword, new_posts)
+    if hit_seen:
+        break           # 停止翻页
+    ...
+    state.save()
+
+    python crawl_state.py            # 查看当前高水位
+    python crawl_state.py --reset    # 清空状态（下次全量采集）
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+import config
+
+STATE_FILE = config.DATA_DIR / "crawl_state.json"
+
+# 每个 (平台, 关键词) 保留的最近帖子ID数
+MAX_SEEN_IDS = 1000
+
+# 帖子ID字段（按优先级）
+ID_FIELDS = ("id", "mid", "note_id", "answer_id", "post_id")
+TIME_FIELDS = ("publish_time", "created_at", "create_time", "time")
+
+# 多个平台爬虫（crawl_scheduler）共用同一状态文件时串行写盘
+_save_lock = threading.Lock()
+
+
+def post_id(post):
+    """帖子ID：平台ID > URL > 文本哈希"""
+    for field in ID_FIELDS:
+        if post.get(field):
+            return str(post[field])
+    url = post.get("source_url") or post.get("url")
+    if url:
+        return url
+    text = post.get("content") or post.get("text") or ""
+    return "md5:" + hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+def post_time(post):
+    """帖子发布时间（ISO格式字符串），无法解析时返回 None"""
+    for field in TIME_FIELDS:
+        value = post.get(field)
+        if not value:
+            continue
+        if isinstance(value, (int, float)):
+            # 秒或毫秒时间戳
+            ts = value / 1000 if value > 1e11 else value
+            return datetime.fromtimestamp(ts).isoformat()
+        try:
+            return datetime.fromisoformat(str(value).replace("Z", "")[:19]).isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+class CrawlState:
+    """持久化的增量采集状态"""
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self.marks = {}
+        self._pending = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.marks = json.load(f)
+
+    def mark(self, platform, keyword):
+        """返回该 (平台, 关键词) 的高水位，没有时返回 None"""
+        return self.marks.get(platform, {}).get(keyword)
+
+    def since(self, platform, keyword, default=None):
+        """增量搜索的起始日期（YYYY-MM-DD），没有高水位时返回 default"""
+        mark = self.mark(platform, keyword)
+        if not mark or not mark.get("newest_time"):
+            return default
+        day = mark["newest_time"][:10]
+        return max(day, default) if default else day
+
+    def is_seen(self, platform, keyword, post):
+        mark = self.mark(platform, keyword)
+        if not mark:
+            return False
+        if "seen_id_set" not in mark:
+            mark["seen_id_set"] = set(mark.get("seen_ids", []))
+        if post_id(post) in mark["seen_id_set"]:
+            return True
+        t = post_time(post)
+        return bool(t and mark.get("newest_time") and t <= mark["newest_time"])
+
+    def filter_new(self, platform, keyword, posts):
+        """返回 (未见过的帖子, 是否碰到已见内容)"""
+        new_posts = [p for p in posts if not self.is_seen(platform, keyword, p)]
+        return new_posts, len(new_posts) < len(posts)
+
+    def observe(self, platform, keyword, posts):
+        """记录本次运行采到的帖子（save 时并入高水位）"""
+        self._pending.setdefault((platform, keyword), []).extend(posts)
+
+    def save(self):
+        """把本次运行的观察并入高水位并写盘
+
+        写盘前重新读取文件，保留其他爬虫在此期间写入的关键词。
+        """
+        with _save_lock:
+            self._merge_from_disk()
+            self._save()
+
+    def _merge_from_disk(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            disk = json.load(f)
+        for platform, keywords in disk.items():
+            for keyword, mark in keywords.items():
+                if (platform, keyword) not in self._pending:
+                    self.marks.setdefault(platform, {})[keyword] = mark
+
+    def _save(self):
+        now = datetime.now().isoformat()
+        for (platform, keyword), posts in self._pending.items():
+            if not posts:
+                continue
+            mark = self.marks.setdefault(platform, {}).setdefault(keyword, {"seen_ids": []})
+            ids = [post_id(p) for p in posts]
+            id_set = set(ids)
+            seen = ids + [i for i in mark.get("seen_ids", []) if i not in id_set]
+            mark["seen_ids"] = seen[:MAX_SEEN_IDS]
+            mark.pop("seen_id_set", None)
+
+            times = [(post_time(p), post_id(p)) for p in posts]
+            times = [t for t in times if t[0]]
+            if times:
+                newest_time, newest_id = max(times)
+                if not mark.get("newest_time") or newest_time > mark["newest_time"]:
+                    mark["newest_time"], mark["newest_id"] = newest_time, newest_id
+            mark.setdefault("newest_id", ids[0])
+            mark["updated_at"] = now
+        self._pending = {}
+
+        serializable = {
+            platform: {kw: {k: v for k, v in m.items() if k != "seen_id_set"} for kw, m in kws.items()}
+            for platform, kws in self.marks.items()
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(serializable, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def reset(self):
+        self.marks = {}
+        self._pending = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+if __name__ == "__main__":
+    state = CrawlState()
+    if "--reset" in sys.argv:
+        state.reset()
+        print("[OK] Crawl state reset")
+        sys.exit(0)
+    if not state.marks:
+        print("[INFO] No crawl state yet (next crawl is a full crawl)")
+    for platform, keywords in state.marks.items():
+        print(f"\n[{platform}]")
+        for keyword, mark in sorted(keywords.items()):
+            print(f"  {keyword:20s} newest={mark.get('newest_time') or '-':20s} "
+                  f"seen={len(mark.get('seen_ids', []))}")
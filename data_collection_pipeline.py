@@ -14,13 +14,12 @@
 
 import sys
 import os
-import json
 import time
-import requests
 import random
 from datetime import datetime
 from pathlib import Path
-import csv
+from urllib.parse import urlparse
+from itertools import chain
 
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(__file__))
@@ -32,7 +31,16 @@ try:
 except ImportError:
     HAS_PANDAS = False
 
-from bs4 import BeautifulSoup
+from async_fetcher import AsyncFetcher, HostPolicy, keyword_page_requests, run_fetch, run_paginated
+import politeness
+from crawl_frontier import CrawlFrontier
+from crawl_state import CrawlState
+from html_extractors import get_extractor
+from crawl_scheduler import run_concurrently
+from post_records import RawPost
+from raw_shards import ShardedPosts
+from streaming_exporters import CsvWriter, JsonWriter, TxtWriter
+from cleaning_engine import PROFILES, CleaningEngine
 
 
 class PipelineConfig:
@@ -65,9 +73,15 @@ class PipelineConfig:
     ]
     ZHIHU_PAGES = 2
     
+    # 抓取配置（按主机生效）
+    CONCURRENCY_PER_HOST = 2   # 每个主机同时进行的请求数
+    DELAY_RANGE = (2, 4)       # 同一主机相邻请求的起始间隔（秒），之后按响应情况自适应
+    INCREMENTAL = True         # 增量采集：翻到上次已采集的内容就停止
+    FRONTIER = True            # 跨关键词/跨运行的帖子去重（布隆过滤器）
+    CLEAN_WORKERS = 0          # 清洁进程数（0 = CPU核数，1 = 单进程）
+    
     # 输出配置
-    WEIBO_RAW_FILE = 'weibo_raw_data.json'
-    ZHIHU_RAW_FILE = 'zhihu_raw_data.json'
+    # 原始数据按平台流式写入 data/raw/<平台>/*.jsonl.gz 分片（见 raw_shards.py）
     FINAL_TXT_FILE = 'opinions_clean_5000.txt'
     FINAL_JSON_FILE = 'opinions_clean_5000.json'
     FINAL_CSV_FILE = 'opinions_clean_5000.csv'
@@ -111,17 +125,28 @@ class Logger:
 class WeiboCollector:
     """微博数据采集器"""
     
-    def __init__(self):
-        self.posts = []
-        self.session = self._create_session()
-    
-    def _create_session(self):
-        """创建请求会话"""
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': self._random_user_agent()
-        })
-        return session
+    SEARCH_URL = "https://s.weibo.com/weibo"
+    
+    PLATFORM = 'weibo'
+    
+    def __init__(self, search_url=None, state=None):
+        self.posts = ShardedPosts(self.PLATFORM)
+        self.search_url = search_url or self.SEARCH_URL
+        self.state = state
+        self.frontier = CrawlFrontier(self.PLATFORM) if PipelineConfig.FRONTIER else None
+        self.fetcher = self._create_fetcher()
+        self.extractor = get_extractor()
+    
+    def _create_fetcher(self):
+        """创建异步抓取器（按主机限流）"""
+        policy = HostPolicy(
+            concurrency=PipelineConfig.CONCURRENCY_PER_HOST,
+            delay_min=PipelineConfig.DELAY_RANGE[0],
+            delay_max=PipelineConfig.DELAY_RANGE[1],
+        )
+        host = urlparse(self.search_url).netloc
+        return AsyncFetcher({host: policy}, headers={'User-Agent': self._random_user_agent()},
+                            frontier=self.frontier)
     
     @staticmethod
     def _random_user_agent():
@@ -133,67 +158,108 @@ class WeiboCollector:
         ]
         return random.choice(agents)
     
-    def collect(self, keyword, num_pages=2):
-        """采集单个关键词的微博"""
-        Logger.info(f"采集微博：{keyword}")
+    @staticmethod
+    def _search_params(keyword, page):
+        return {'q': keyword, 'typeall': 1, 'suball': 1, 'page': page}
+    
+    def parse_page(self, html, keyword):
+        """解析一页搜索结果"""
+        posts = []
         
-        for page in range(1, num_pages + 1):
-            try:
-                url = f"https://s.weibo.com/weibo?q={keyword}&typeall=1&suball=1&page={page}"
-                
-                response = self.session.get(url, timeout=10)
-                response.encoding = 'utf-8'
-                
-                if response.status_code != 200:
-                    Logger.warning(f"  页面 {page} 请求失败 (状态码: {response.status_code})")
-                    continue
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                posts = soup.find_all('div', class_='mbrank')
-                
-                count = 0
-                for post in posts:
-                    try:
-                        text_elem = post.find('p', class_='txt')
-                        if not text_elem:
-                            continue
-                        
-                        text = text_elem.get_text(strip=True)
-                        
-                        if len(text) < 20:
-                            continue
-                        
-                        # 过滤垃圾
-                        if any(kw in text for kw in ['推广', '广告', '链接']):
-                            continue
-                        
-                        self.posts.append({
-                            'platform': 'weibo',
-                            'keyword': keyword,
-                            'text': text[:500],
-                            'collected_at': datetime.now().isoformat()
-                        })
-                        count += 1
-                    except:
-                        continue
-                
-                Logger.info(f"  页面 {page}：采集 {count} 条")
-                time.sleep(random.uniform(2, 4))
-                
-            except Exception as e:
-                Logger.warning(f"  页面 {page} 出错：{str(e)}")
-                time.sleep(random.uniform(3, 5))
+        for item in self.extractor.extract('weibo', html):
+            text = item['text']
+            
+            if len(text) < 20:
+                continue
+            
+            # 过滤垃圾
+            if any(kw in text for kw in ['推广', '广告', '链接']):
+                continue
+            
+            post = RawPost(
+                platform='weibo',
+                keyword=keyword,
+                text=text[:500],
+                collected_at=datetime.now().isoformat(),
+            )
+            # 微博ID在外层卡片的 mid 属性上（用于增量采集）
+            if item['id']:
+                post['mid'] = item['id']
+            posts.append(post)
+        
+        return posts
+    
+    def collect_many(self, keywords, num_pages=2):
+        """并发采集多个关键词的所有页"""
+        if self.state is not None:
+            return self._collect_incremental(keywords, num_pages)
+        
+        requests = keyword_page_requests(self.search_url, keywords, num_pages, self._search_params)
+        
+        for result in run_fetch(self.fetcher, requests):
+            keyword, page = result.meta
+            if result.skipped:
+                continue
+            if not result.ok:
+                Logger.warning(f"  {keyword} 页面 {page} 请求失败 ({result.error})")
+                continue
+            
+            posts = self.parse_page(result.text, keyword)
+            if not posts:
+                self.fetcher.feedback(result.url, politeness.EMPTY)
+            posts = self._dedup(posts)
+            self.posts.extend(posts)
+            self.posts.flush()
+            Logger.info(f"  {keyword} 页面 {page}：采集 {len(posts)} 条")
         
         return len(self.posts)
     
+    def _dedup(self, posts):
+        """去掉其他关键词或之前运行已采集过的帖子"""
+        if self.frontier is None:
+            return posts
+        return self.frontier.filter_new(posts)
+    
+    def _collect_incremental(self, keywords, num_pages):
+        """增量采集：关键词之间并发，同一关键词按页顺序翻页，碰到已采集内容就停止"""
+        def on_page(result):
+            keyword, page = result.meta
+            if result.skipped:
+                return True
+            if not result.ok:
+                Logger.warning(f"  {keyword} 页面 {page} 请求失败 ({result.error})")
+                return True
+            
+            posts = self.parse_page(result.text, keyword)
+            if not posts:
+                self.fetcher.feedback(result.url, politeness.EMPTY)
+            new_posts, hit_seen = self.state.filter_new(self.PLATFORM, keyword, posts)
+            self.state.observe(self.PLATFORM, keyword, new_posts)
+            new_posts = self._dedup(new_posts)
+            self.posts.extend(new_posts)
+            self.posts.flush()
+            Logger.info(f"  {keyword} 页面 {page}：采集 {len(new_posts)} 条新内容")
+            if hit_seen or not posts:
+                Logger.info(f"  {keyword}：已到上次采集位置，停止翻页")
+                return False
+            return True
+        
+        run_paginated(self.fetcher, self.search_url, keywords, num_pages, self._search_params, on_page)
+        return len(self.posts)
+    
+    def collect(self, keyword, num_pages=2):
+        """采集单个关键词的微博"""
+        Logger.info(f"采集微博：{keyword}")
+        return self.collect_many([keyword], num_pages)
+    
     def run(self):
         """执行微博采集"""
         Logger.section("📱 第1步：采集微博数据")
         
         total_before = len(self.posts)
         
-        for keyword in PipelineConfig.WEIBO_KEYWORDS:
-            self.collect(keyword, num_pages=PipelineConfig.WEIBO_PAGES)
+        Logger.info(f"采集微博：{len(PipelineConfig.WEIBO_KEYWORDS)} 个关键词 × {PipelineConfig.WEIBO_PAGES} 页")
+        self.collect_many(PipelineConfig.WEIBO_KEYWORDS, num_pages=PipelineConfig.WEIBO_PAGES)
         
         total_after = len(self.posts)
         new_count = total_after - total_before
@@ -202,32 +268,24 @@ class WeiboCollector:
         
         return self.posts
     
-    def save(self, filename=None):
-        """保存数据"""
-        if not filename:
-            filename = PipelineConfig.WEIBO_RAW_FILE
+    def save(self):
+        """关闭原始数据分片（数据在采集过程中已逐页写盘）"""
+        paths = self.posts.close()
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.posts, f, ensure_ascii=False, indent=2)
+        Logger.success(f"已保存 {len(self.posts)} 条到 {len(paths)} 个分片：{self.posts.writer.out_dir}")
         
-        Logger.success(f"已保存到 {filename}")
-        return filename
+        if self.frontier is not None:
+            self.frontier.save()
+            Logger.info(self.frontier.report())
+        politeness.save_state()
+        return paths
 
 
-class ZhihuCollector:
+class ZhihuCollector(WeiboCollector):
     """知乎数据采集器"""
     
-    def __init__(self):
-        self.posts = []
-        self.session = self._create_session()
-    
-    def _create_session(self):
-        """创建请求会话"""
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': self._random_user_agent()
-        })
-        return session
+    SEARCH_URL = "https://www.zhihu.com/search"
+    PLATFORM = 'zhihu'
     
     @staticmethod
     def _random_user_agent():
@@ -238,61 +296,36 @@ class ZhihuCollector:
         ]
         return random.choice(agents)
     
+    @staticmethod
+    def _search_params(keyword, page):
+        return {'type': 'content', 'q': keyword, 'page': page}
+    
+    def parse_page(self, html, keyword):
+        """解析一页搜索结果"""
+        posts = []
+        
+        for item in self.extractor.extract('zhihu_pipeline', html):
+            text = item['text']
+            
+            if len(text) < 20:
+                continue
+            
+            if any(kw in text for kw in ['推广', '广告']):
+                continue
+            
+            posts.append(RawPost(
+                platform='zhihu',
+                keyword=keyword,
+                text=text[:500],
+                collected_at=datetime.now().isoformat(),
+            ))
+        
+        return posts
+    
     def collect(self, keyword, num_pages=2):
         """采集知乎"""
         Logger.info(f"采集知乎：{keyword}")
-        
-        for page in range(1, num_pages + 1):
-            try:
-                url = f"https://www.zhihu.com/search?type=content&q={keyword}&page={page}"
-                
-                response = self.session.get(url, timeout=10)
-                response.encoding = 'utf-8'
-                
-                if response.status_code != 200:
-                    Logger.warning(f"  页面 {page} 请求失败")
-                    continue
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # 查找内容元素
-                items = soup.find_all('div', attrs={'class': lambda x: x and 'SearchResult' in (x or '')})
-                
-                count = 0
-                for item in items:
-                    try:
-                        title_elem = item.find('h2')
-                        content_elem = item.find('p')
-                        
-                        title = title_elem.get_text(strip=True) if title_elem else ""
-                        content = content_elem.get_text(strip=True) if content_elem else ""
-                        
-                        text = f"{title} {content}".strip()
-                        
-                        if len(text) < 20:
-                            continue
-                        
-                        if any(kw in text for kw in ['推广', '广告']):
-                            continue
-                        
-                        self.posts.append({
-                            'platform': 'zhihu',
-                            'keyword': keyword,
-                            'text': text[:500],
-                            'collected_at': datetime.now().isoformat()
-                        })
-                        count += 1
-                    except:
-                        continue
-                
-                Logger.info(f"  页面 {page}：采集 {count} 条")
-                time.sleep(random.uniform(2, 4))
-                
-            except Exception as e:
-                Logger.warning(f"  页面 {page} 出错：{str(e)}")
-                time.sleep(random.uniform(3, 5))
-        
-        return len(self.posts)
+        return self.collect_many([keyword], num_pages)
     
     def run(self):
         """执行知乎采集"""
@@ -300,8 +333,8 @@ class ZhihuCollector:
         
         total_before = len(self.posts)
         
-        for keyword in PipelineConfig.ZHIHU_KEYWORDS:
-            self.collect(keyword, num_pages=PipelineConfig.ZHIHU_PAGES)
+        Logger.info(f"采集知乎：{len(PipelineConfig.ZHIHU_KEYWORDS)} 个关键词 × {PipelineConfig.ZHIHU_PAGES} 页")
+        self.collect_many(PipelineConfig.ZHIHU_KEYWORDS, num_pages=PipelineConfig.ZHIHU_PAGES)
         
         total_after = len(self.posts)
         new_count = total_after - total_before
@@ -309,77 +342,26 @@ class ZhihuCollector:
         Logger.success(f"知乎采集完成：共 {new_count} 条")
         
         return self.posts
-    
-    def save(self, filename=None):
-        """保存数据"""
-        if not filename:
-            filename = PipelineConfig.ZHIHU_RAW_FILE
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.posts, f, ensure_ascii=False, indent=2)
-        
-        Logger.success(f"已保存到 {filename}")
-        return filename
 
 
 class DataCleaner:
     """数据清洁器"""
     
-    @staticmethod
-    def clean_text(text):
-        """清洁文本"""
-        if not isinstance(text, str):
-            return ""
-        
-        text = ' '.join(text.split())
-        text = ''.join(c for c in text if c.isprintable())
-        text = text[:500].strip()
-        
-        return text
-    
-    @staticmethod
-    def is_valid(text):
-        """判断是否有效"""
-        if not text or len(text) < 10 or len(text) > 500:
-            return False
-        
-        # 检查中文比例
-        chinese_count = sum(1 for c in text if '\u4e00' <= c <= '\u9fff')
-        if chinese_count < len(text) * 0.3:
-            return False
-        
-        return True
-    
-    def clean_and_deduplicate(self, all_posts):
-        """清洁和去重"""
+    def clean_and_deduplicate(self, all_posts, workers=PipelineConfig.CLEAN_WORKERS):
+        """清洁和去重（规则见 cleaning_engine.PROFILES["pipeline"]：预清洁、长度10-500、
+        中文占比 ≥ 0.3；按批分给多个进程，去重在主进程按原顺序进行）"""
         Logger.section("🧹 第3步：数据清洁和去重")
         
-        seen = set()
-        cleaned = []
-        duplicates = 0
-        invalid = 0
+        engine = CleaningEngine(PROFILES["pipeline"], workers)
+        Logger.info(f"开始处理原始数据（从分片流式读取，{engine.workers} 个进程）...")
         
-        Logger.info(f"开始处理 {len(all_posts)} 条原始数据...")
-        
-        for post in all_posts:
-            text = post.get('text', '') if isinstance(post, dict) else str(post)
-            text = self.clean_text(text)
-            
-            if not self.is_valid(text):
-                invalid += 1
-                continue
-            
-            if text in seen:
-                duplicates += 1
-                continue
-            
-            seen.add(text)
-            cleaned.append(text)
+        cleaned = list(engine.clean(all_posts))
+        stats = engine.stats
         
-        Logger.info(f"原始条数：{len(all_posts)}")
+        Logger.info(f"原始条数：{stats['total']}")
         Logger.info(f"已清洁：{len(cleaned)}")
-        Logger.info(f"重复移除：{duplicates}")
-        Logger.info(f"无效移除：{invalid}")
+        Logger.info(f"重复移除：{stats['duplicates']}")
+        Logger.info(f"无效移除：{sum(stats['rejected'].values())}")
         Logger.success(f"最终条数：{len(cleaned)}")
         
         return cleaned
@@ -387,40 +369,45 @@ class DataCleaner:
     @staticmethod
     def save_txt(texts, filename):
         """保存为TXT"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            for text in texts:
-                f.write(text + '\n')
+        with TxtWriter(filename) as writer:
+            writer.write_many(texts)
         Logger.success(f"TXT 已保存到 {filename}")
     
     @staticmethod
-    def save_json(texts, filename):
+    def json_writer(filename):
+        """JSON：{"data": [...], "metadata": {...}}（metadata 放在末尾，可以逐条写出）"""
+        created_at = datetime.now().isoformat()
+        return JsonWriter(filename, trailer=lambda total: {
+            'metadata': {'total': total, 'created_at': created_at}
+        })
+    
+    @classmethod
+    def save_json(cls, texts, filename):
         """保存为JSON"""
-        data = {
-            'metadata': {
-                'total': len(texts),
-                'created_at': datetime.now().isoformat()
-            },
-            'data': texts
-        }
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with cls.json_writer(filename) as writer:
+            writer.write_many(texts)
         Logger.success(f"JSON 已保存到 {filename}")
     
     @staticmethod
     def save_csv(texts, filename):
         """保存为CSV"""
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['id', 'text'])
+        with CsvWriter(filename, ['id', 'text']) as writer:
             for i, text in enumerate(texts, 1):
-                writer.writerow([i, text])
+                writer.write({'id': i, 'text': text})
         Logger.success(f"CSV 已保存到 {filename}")
     
     def save_all_formats(self, texts):
-        """保存为所有格式"""
-        self.save_txt(texts, PipelineConfig.FINAL_TXT_FILE)
-        self.save_json(texts, PipelineConfig.FINAL_JSON_FILE)
-        self.save_csv(texts, PipelineConfig.FINAL_CSV_FILE)
+        """保存为所有格式（单遍逐条写出 TXT / JSON / CSV）"""
+        txt = TxtWriter(PipelineConfig.FINAL_TXT_FILE)
+        json_out = self.json_writer(PipelineConfig.FINAL_JSON_FILE)
+        csv_out = CsvWriter(PipelineConfig.FINAL_CSV_FILE, ['id', 'text'])
+        with txt, json_out, csv_out:
+            for i, text in enumerate(texts, 1):
+                txt.write(text)
+                json_out.write(text)
+                csv_out.write({'id': i, 'text': text})
+        for writer in (txt, json_out, csv_out):
+            Logger.success(f"{writer.path.suffix[1:].upper()} 已保存到 {writer.path}")
     
     @staticmethod
     def quality_report(texts):
@@ -451,8 +438,9 @@ class DataCollectionPipeline:
     """数据采集主管道"""
     
     def __init__(self):
-        self.weibo_collector = WeiboCollector()
-        self.zhihu_collector = ZhihuCollector()
+        self.state = CrawlState() if PipelineConfig.INCREMENTAL else None
+        self.weibo_collector = WeiboCollector(state=self.state)
+        self.zhihu_collector = ZhihuCollector(state=self.state)
         self.cleaner = DataCleaner()
     
     def run(self):
@@ -464,18 +452,26 @@ class DataCollectionPipeline:
         print("╚" + "=" * 68 + "╝\n")
         
         try:
-            # 第1步：采集微博
-            weibo_posts = self.weibo_collector.run()
+            # 第1、2步：微博和知乎并发采集（各自按主机限流）
+            results, timings = run_concurrently({
+                'weibo': self.weibo_collector.run,
+                'zhihu': self.zhihu_collector.run,
+            })
+            for name, result in results.items():
+                if isinstance(result, Exception):
+                    raise result
             self.weibo_collector.save()
-            
-            # 第2步：采集知乎
-            zhihu_posts = self.zhihu_collector.run()
             self.zhihu_collector.save()
+            if self.state is not None:
+                self.state.save()
+            weibo_posts, zhihu_posts = results['weibo'], results['zhihu']
             
             # 合并
-            all_posts = weibo_posts + zhihu_posts
+            all_posts = chain(weibo_posts, zhihu_posts)
             Logger.section("📦 数据合并")
-            Logger.success(f"合并完成：微博 {len(weibo_posts)} + 知乎 {len(zhihu_posts)} = {len(all_posts)} 条")
+            Logger.info(f"采集耗时：微博 {timings['weibo']:.0f}s，知乎 {timings['zhihu']:.0f}s（并发）")
+            Logger.success(f"合并完成：微博 {len(weibo_posts)} + 知乎 {len(zhihu_posts)} = "
+                           f"{len(weibo_posts) + len(zhihu_posts)} 条")
             
             # 第3步：清洁
             cleaned_texts = self.cleaner.clean_and_deduplicate(all_posts)
@@ -531,14 +527,8 @@ class DataCollectionPipeline:
 
 def main():
     """主函数"""
-    # 检查依赖
-    try:
-        from bs4 import BeautifulSoup
-        import requests
-    except ImportError:
-        print("❌ 缺少依赖，请运行：")
-        print("   pip install requests beautifulsoup4 pandas")
-        sys.exit(1)
+    # 解析后端（selectolax/lxml 更快，都没有时退回 BeautifulSoup 或标准库）
+    Logger.info(f"HTML 解析后端：{get_extractor().name}")
     
     # 运行管道
     pipeline = DataCollectionPipeline()
@@ -4,10 +4,13 @@ Generate mock opinion data for quick testing
 Real data can replace this after collection
 """
 
-import json
 import random
 from datetime import datetime
 
+from streaming_exporters import CsvWriter, JsonWriter, TxtWriter
+
+CSV_FIELDS = ['id', 'platform', 'category', 'text']
+
 # Mock opinion templates based on real cross-border e-commerce tax discussions
 MOCK_TEMPLATES = {
     '0110': [
@@ -162,35 +165,49 @@ class MockDataGenerator:
     
     def save_txt(self, filename='opinions_clean_5000.txt'):
         """Save as TXT"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            for item in self.data:
-                f.write(item['text'] + '\n')
+        with TxtWriter(filename, field='text') as writer:
+            writer.write_many(self.data)
         print("[+] Saved to %s" % filename)
     
-    def save_json(self, filename='opinions_clean_5000.json'):
-        """Save as JSON"""
-        output = {
+    @staticmethod
+    def json_writer(filename):
+        """JSON writer: texts under 'data', metadata written after them"""
+        created_at = datetime.now().isoformat()
+        return JsonWriter(filename, trailer=lambda total: {
             'metadata': {
-                'total': len(self.data),
+                'total': total,
                 'type': 'mock_data_for_testing',
-                'created_at': datetime.now().isoformat(),
+                'created_at': created_at,
                 'note': 'Mock data for quick testing. Replace with real data after collection.'
-            },
-            'data': [item['text'] for item in self.data]
-        }
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
+            }
+        })
+    
+    def save_json(self, filename='opinions_clean_5000.json'):
+        """Save as JSON"""
+        with self.json_writer(filename) as writer:
+            writer.write_many(item['text'] for item in self.data)
         print("[+] Saved to %s" % filename)
     
     def save_csv(self, filename='opinions_clean_5000.csv'):
         """Save as CSV"""
-        import csv
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=['id', 'platform', 'category', 'text'])
-            writer.writeheader()
-            writer.writerows(self.data)
+        with CsvWriter(filename, CSV_FIELDS) as writer:
+            writer.write_many(self.data)
         print("[+] Saved to %s" % filename)
     
+    def save_all(self, txt_file='opinions_clean_5000.txt', json_file='opinions_clean_5000.json',
+                 csv_file='opinions_clean_5000.csv'):
+        """Save TXT, JSON and CSV in a single pass"""
+        txt = TxtWriter(txt_file, field='text')
+        json_out = self.json_writer(json_file)
+        csv_out = CsvWriter(csv_file, CSV_FIELDS)
+        with txt, json_out, csv_out:
+            for item in self.data:
+                txt.write(item)
+                json_out.write(item['text'])
+                csv_out.write(item)
+        for filename in (txt_file, json_file, csv_file):
+            print("[+] Saved to %s" % filename)
+    
     def report(self):
         """Print report"""
         from collections import Counter
@@ -222,9 +239,7 @@ class MockDataGenerator:
 if __name__ == "__main__":
     generator = MockDataGenerator(count=5000)
     generator.generate()
-    generator.save_txt()
-    generator.save_json()
-    generator.save_csv()
+    generator.save_all()
     generator.report()
     
     print("[SUCCESS] Mock data ready for LLM analysis!")
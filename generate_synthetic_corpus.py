@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+合成语料生成器 - 按现有数据的统计特征生成任意规模的原始帖子和分析结果
+
+generate_mock_data.py 只是循环几十条模板，规模一大全是重复，也没有分析结果，
+没法用来压测清洁、LLM 分析流程和看板。这里先从现有数据测出语料画像（CorpusProfile）：
+    - 标签：从 analysis_results.json 的真实记录里整行抽取 5 个维度的标签和置信度，
+      各维度的分布、组合标签（a|b）以及维度之间的相关性都与真实数据一致
+    - 正文长度：真实 source_text 的长度分布
+    - 重复率：真实 source_text 中完全重复的比例
+    - 平台分布：opinions_clean_5000.json 的 platform
+正文由真实舆论切出的分句随机拼接、截断到抽到的长度；
+按重复率从最近生成的正文里重复抽取一条（只保留最近 RECENT_TEXTS 条），
+其余正文用布隆过滤器保证不与之前的撞车，重复率与现有数据一致。
+
+输出全部流式写入分片（raw_shards.ShardWriter），生成过程内存只有布隆过滤器（每条约 1.25 字节）；
+--workers 分段并行生成（每段独立的随机序列和撞车检查，分片名为 *_synthetic_pNN_*）：
+    <out>/raw/<平台>/<平台>_synthetic_0001.jsonl.gz     原始帖子（字段同 STEP_1 爬虫）
+    <out>/analysis/analysis_synthetic_0001.jsonl.gz    分析结果（字段同 analysis_results.json）
+    <out>/analysis/analysis_results.json               可选（--analysis-json），看板可直接加载
+第 i 条分析结果的 index 为 i，source_text 就是第 i 条原始帖子的正文。
+
+使用方法：
+    python generate_synthetic_corpus.py --posts 1000000
+    python generate_synthetic_corpus.py --posts 20000000 --out data/synthetic_20m --workers 0 --no-compress
+    python generate_synthetic_corpus.py --posts 100000 --analysis-json
+
+    from generate_synthetic_corpus import CorpusProfile, SyntheticCorpus
+    for post, result in SyntheticCorpus(CorpusProfile.measure(), seed=42).generate(10000):
+        ...
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import config
+from post_records import RawPost
+from parallel_clean import imap_partitions, resolve_workers
+from raw_shards import ShardWriter
+from streaming_exporters import JsonWriter
+
+ANALYSIS_FILE = config.ANALYSIS_DATA_DIR / "analysis_results.json"
+CLEAN_FILE = config.CLEAN_DATA_DIR / "opinions_clean_5000.json"
+OUTPUT_DIR = config.DATA_DIR / "synthetic"
+
+# 每行分析结果里从真实记录整行抽取的字段（标签 + 置信度 + 摘要）
+LABEL_FIELDS = (
+    "sentiment", "sentiment_confidence",
+    "topic", "topic_confidence",
+    "pattern", "pattern_confidence",
+    "risk_level", "risk_confidence",
+    "actor", "actor_confidence",
+)
+LABEL_DIMENSIONS = ("sentiment", "topic", "pattern", "risk_level", "actor")
+
+RECENT_TEXTS = 10000          # 重复帖子从最近这么多条正文里抽取
+RETRIES = 8                   # 新正文撞车时同一长度的重试次数
+START_TIME = datetime(2025, 6, 1)
+
+SOURCE_URLS = {
+    "weibo": "https://s.weibo.com/weibo?q={keyword}&page={page}",
+    "zhihu": "https://www.zhihu.com/search?type=content&q={keyword}&page={page}",
+    "xiaohongshu": "https://www.xiaohongshu.com/search_result?keyword={keyword}&page={page}",
+}
+
+# 分句：在中英文标点、空白之后切开，标点留在前一句末尾
+_CLAUSE_RE = re.compile(r'[^，。！？；、,.!?;\s]*[，。！？；、,.!?;\s]*')
+
+
+def split_clauses(text):
+    return [clause for clause in _CLAUSE_RE.findall(text) if clause]
+
+
+class CorpusProfile:
+    """从现有数据测出的语料画像"""
+
+    def __init__(self, labels, summaries, lengths, key_phrase_lengths, clauses, platforms, duplicate_rate):
+        self.labels = labels                          # 真实记录的 LABEL_FIELDS 元组（整行抽取）
+        self.summaries = summaries                    # 与 labels 同行的 brief_summary
+        self.lengths = lengths                        # 真实正文长度
+        self.key_phrase_lengths = key_phrase_lengths
+        self.clauses = clauses                        # 正文分句池
+        self.clause_length = sum(map(len, clauses)) / len(clauses)
+        self.platforms = platforms                    # {平台: 条数}
+        self.duplicate_rate = duplicate_rate
+
+    @classmethod
+    def measure(cls, analysis_file=ANALYSIS_FILE, clean_file=CLEAN_FILE):
+        with open(analysis_file, 'r', encoding='utf-8') as f:
+            results = json.load(f)["data"]
+        if not results:
+            raise ValueError(f"{analysis_file} 中没有分析结果")
+
+        texts = [r.get("source_text", "") for r in results]
+        platforms = Counter()
+        if Path(clean_file).exists():
+            with open(clean_file, 'r', encoding='utf-8') as f:
+                clean = json.load(f)["data"]
+            platforms.update(item.get("platform", "unknown") for item in clean)
+            texts.extend(item.get("content", "") for item in clean)
+
+        clauses = [clause for text in texts for clause in split_clauses(text)]
+        source_texts = [r.get("source_text", "") for r in results]
+        return cls(
+            labels=[tuple(r.get(field) for field in LABEL_FIELDS) for r in results],
+            summaries=[r.get("brief_summary", "") for r in results],
+            lengths=[len(text) for text in source_texts if text],
+            key_phrase_lengths=[len(r.get("key_phrase", "")) for r in results],
+            clauses=clauses,
+            platforms=dict(platforms) or {"weibo": 1, "zhihu": 1, "xiaohongshu": 1},
+            duplicate_rate=1 - len(set(source_texts)) / len(source_texts),
+        )
+
+    def report(self):
+        total = len(self.labels)
+        print(f"[INFO] Profile from {total} analysis results, {len(self.clauses)} clauses")
+        print(f"       text length: median {sorted(self.lengths)[len(self.lengths) // 2]}, "
+              f"mean {sum(self.lengths) / len(self.lengths):.1f}, max {max(self.lengths)}")
+        print(f"       duplicate rate: {self.duplicate_rate:.2%}")
+        print(f"       platforms: {self.platforms}")
+        for dimension in LABEL_DIMENSIONS:
+            values = Counter(row[LABEL_FIELDS.index(dimension)] for row in self.labels)
+            composite = sum(count for value, count in values.items() if "|" in str(value))
+            print(f"       {dimension}: {len(values)} labels, composite (a|b) {composite / total:.1%}")
+
+
+class _SeenTexts:
+    """已生成正文的布隆过滤器（每条约 1.25 字节），用来避免新正文与之前的撞车
+
+    误判只会让一条新正文多重试一次，不会漏掉真正的重复。
+    """
+
+    HASHES = 7
+
+    def __init__(self, capacity):
+        self.size = max(1 << 20, capacity * 10)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, text):
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.HASHES)]
+
+    def add(self, text):
+        """加入 text；之前（可能）出现过时返回 False"""
+        positions = self._positions(text)
+        bits = self.bits
+        if all(bits[pos >> 3] & (1 << (pos & 7)) for pos in positions):
+            return False
+        for pos in positions:
+            bits[pos >> 3] |= 1 << (pos & 7)
+        return True
+
+
+class SyntheticCorpus:
+    """按画像逐条生成 (原始帖子, 分析结果)
+
+    新正文与已生成的正文撞车时（短正文的组合有限）重新生成，
+    所以重复只来自按重复率刻意重复的那部分。
+    """
+
+    def __init__(self, profile, seed=42, duplicate_rate=None):
+        self.profile = profile
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.duplicate_rate = profile.duplicate_rate if duplicate_rate is None else duplicate_rate
+        self.keywords = sorted(config.FLAT_KEYWORDS)
+        self.platforms = list(profile.platforms)
+        self.platform_weights = list(profile.platforms.values())
+        self.recent = []
+        self.seen = None
+        self.duplicates = 0
+
+    def text(self, length):
+        """拼接随机分句直到达到 length 个字符（按平均分句长度一次抽够，不够再补）"""
+        clauses = self.profile.clauses
+        text = "".join(self.rng.choices(clauses, k=int(length / self.profile.clause_length) + 1))
+        while len(text) < length:
+            text += self.rng.choice(clauses)
+        return text[:length].strip() or self.rng.choice(clauses)
+
+    def new_text(self):
+        """没有出现过的正文；同一长度连续撞车 RETRIES 次后换一个长度"""
+        lengths = self.profile.lengths
+        while True:
+            length = self.rng.choice(lengths)
+            for _ in range(RETRIES):
+                text = self.text(length)
+                if self.seen.add(text):
+                    return text
+
+    def generate(self, count, start=0):
+        """产出 count 对 (RawPost, 分析结果 dict)，分析结果的 index 从 start 开始"""
+        rng = self.rng
+        profile = self.profile
+        labels, summaries = profile.labels, profile.summaries
+        key_phrase_lengths = profile.key_phrase_lengths
+        recent = self.recent
+        if self.seen is None:
+            self.seen = _SeenTexts(count)
+        for index in range(start, start + count):
+            if recent and rng.random() < self.duplicate_rate:
+                text = rng.choice(recent)
+                self.duplicates += 1
+            else:
+                text = self.new_text()
+                if len(recent) < RECENT_TEXTS:
+                    recent.append(text)
+                else:
+                    recent[index % RECENT_TEXTS] = text
+
+            platform = rng.choices(self.platforms, self.platform_weights)[0]
+            keyword = rng.choice(self.keywords)
+            post = RawPost(
+                platform=platform,
+                keyword=keyword,
+                text=text,
+                collected_at=(START_TIME + timedelta(seconds=index)).isoformat(),
+                source_url=SOURCE_URLS.get(platform, SOURCE_URLS["weibo"]).format(
+                    keyword=keyword, page=index % 50 + 1),
+            )
+
+            row = rng.randrange(len(labels))
+            result = dict(zip(LABEL_FIELDS, labels[row]))
+            result["key_phrase"] = text[:rng.choice(key_phrase_lengths)]
+            result["brief_summary"] = summaries[row]
+            result["source_text"] = text
+            result["index"] = index
+            yield post, result
+
+
+def analysis_json_writer(path, seed):
+    """analysis_results.json 格式（元数据写在 data 之后）"""
+    return JsonWriter(path, trailer=lambda total: {
+        "total": total,
+        "model": "synthetic",
+        "seed": seed,
+        "last_updated": datetime.now().isoformat(),
+    })
+
+
+def write_corpus(corpus, count, out_dir=OUTPUT_DIR, max_records=None, compress=None,
+                 analysis_json=False, start=0, run_id="synthetic", progress_every=1000000):
+    """把 count 条语料流式写入 out_dir 下的分片，返回各平台帖子数"""
+    out_dir = Path(out_dir)
+    writers = {}
+    analysis = ShardWriter("analysis", out_dir=out_dir / "analysis", max_records=max_records,
+                           compress=compress, run_id=run_id)
+    json_out = None
+    if analysis_json:
+        json_out = analysis_json_writer(out_dir / "analysis" / "analysis_results.json", corpus.seed)
+    began = time.perf_counter()
+    try:
+        for n, (post, result) in enumerate(corpus.generate(count, start), 1):
+            writer = writers.get(post["platform"])
+            if writer is None:
+                writer = writers[post["platform"]] = ShardWriter(
+                    post["platform"], out_dir=out_dir / "raw" / post["platform"],
+                    max_records=max_records, compress=compress, run_id=run_id)
+            writer.write(post)
+            analysis.write(result)
+            if json_out is not None:
+                json_out.write(result)
+            if progress_every and n % progress_every == 0:
+                print(f"  ... {run_id}: {n:,} posts ({n / (time.perf_counter() - began):,.0f}/s)")
+    except BaseException:
+        if json_out is not None:
+            json_out.abort()
+        raise
+    finally:
+        for writer in writers.values():
+            writer.close()
+        analysis.close()
+    if json_out is not None:
+        json_out.close()
+    return {platform: writer.count for platform, writer in writers.items()}
+
+
+def _write_part(task):
+    """进程池任务：生成第 part 段（index 从 start 开始），分片名带段号"""
+    profile, part, start, count, seed, duplicate_rate, out_dir, max_records, compress = task
+    corpus = SyntheticCorpus(profile, seed=f"{seed}-{part}", duplicate_rate=duplicate_rate)
+    counts = write_corpus(corpus, count, out_dir, max_records, compress, start=start,
+                          run_id=f"synthetic_p{part:02d}")
+    return counts, corpus.duplicates
+
+
+def write_corpus_parallel(profile, count, out_dir=OUTPUT_DIR, seed=42, duplicate_rate=None,
+                          workers=None, max_records=None, compress=None):
+    """分成 workers 段并行生成（每段独立的随机序列和分片），返回 (各平台帖子数, 重复条数)"""
+    workers = resolve_workers(workers)
+    bounds = [count * part // workers for part in range(workers + 1)]
+    tasks = [(profile, part + 1, bounds[part], bounds[part + 1] - bounds[part], seed, duplicate_rate,
+              out_dir, max_records, compress) for part in range(workers)]
+    totals = Counter()
+    duplicates = 0
+    for counts, part_duplicates in imap_partitions(_write_part, tasks, workers):
+        totals.update(counts)
+        duplicates += part_duplicates
+    return dict(totals), duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成语料生成器")
+    parser.add_argument("--posts", type=int, default=100000, help="生成的帖子条数")
+    parser.add_argument("--out", default=str(OUTPUT_DIR), help="输出目录")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--duplicate-rate", type=float, default=None, help="重复率（默认取现有数据的重复率）")
+    parser.add_argument("--shard-records", type=int, default=None, help="每个分片的条数（默认同爬虫配置）")
+    parser.add_argument("--no-compress", action="store_true", help="分片不做 gzip 压缩（生成更快）")
+    parser.add_argument("--analysis-json", action="store_true", help="同时写出 analysis_results.json（仅单进程）")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数（0 = CPU 核数）")
+    args = parser.parse_args()
+    if args.analysis_json and resolve_workers(args.workers) > 1:
+        parser.error("--analysis-json 只能单进程生成（--workers 1）")
+
+    profile = CorpusProfile.measure()
+    profile.report()
+    compress = False if args.no_compress else None
+
+    start = time.perf_counter()
+    if resolve_workers(args.workers) > 1:
+        counts, duplicates = write_corpus_parallel(profile, args.posts, args.out, args.seed, args.duplicate_rate,
+                                                   args.workers, args.shard_records, compress)
+    else:
+        corpus = SyntheticCorpus(profile, seed=args.seed, duplicate_rate=args.duplicate_rate)
+        counts = write_corpus(corpus, args.posts, args.out, max_records=args.shard_records,
+                              compress=compress, analysis_json=args.analysis_json)
+        duplicates = corpus.duplicates
+    elapsed = time.perf_counter() - start
+    print(f"[OK] {args.posts:,} posts in {elapsed:.1f}s ({args.posts / elapsed:,.0f}/s) -> {args.out}")
+    print(f"     platforms: {counts}, duplicates: {duplicates:,} ({duplicates / max(1, args.posts):.2%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+"""
+HTML 抽取后端 - 搜索结果页的快速解析
+
+采集改为并发之后，CPU 热点变成了 BeautifulSoup(html.parser) 建整棵树
+再用 find_all + lambda 类名判断。这里把每个平台的选择器写成一份声明式规格，
+由不同后端各自预编译：
+    selectolax   lexbor 引擎（C），CSS 选择器
+    lxml         libxml2（C），预编译 XPath
+    bs4          BeautifulSoup（原实现，兜底；有 lxml 时用 lxml 解析器）
+    htmlparser   标准库 html.parser 流式抽取，不建树（无任何依赖时使用）
+
+默认按上面的顺序选第一个可用的后端，也可以用环境变量 HTML_EXTRACTOR 指定。
+
+每个平台的规格（与原来各采集器里 BeautifulSoup 的选择顺序一致）：
+    items   条目选择器（按顺序尝试，第一个有结果的生效；嵌套的条目各算一条，按文档顺序）
+    fields  字段选择器（每个字段取条目内第一个匹配的元素，按顺序尝试备选）
+    id_attr 条目自身或祖先元素上的ID属性（微博的 mid）
+知乎有两份规格：STEP_1_zhihu_spider 用 "zhihu"（优先 class 含 content 的 <p>），
+data_collection_pipeline 用 "zhihu_pipeline"（只认 SearchResult 条目、h2 标题和第一个 <p>）。
+
+使用方法：
+    from html_extractors import get_extractor
+    extractor = get_extractor()              # 或 get_extractor("lxml")
+    for item in extractor.extract("weibo", html):
+        item["text"], item["likes"], item["id"]
+"""
+
+import os
+from collections import namedtuple
+from html.parser import HTMLParser
+
+try:
+    from selectolax.parser import HTMLParser as LexborParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from bs4 import BeautifulSoup
+    HAS_BS4 = True
+except ImportError:
+    HAS_BS4 = False
+
+
+# ============================================================================
+# 平台规格
+# ============================================================================
+
+# tag: 标签名；token: class 中含有该完整类名；contains: class 字符串包含该子串；
+# ci: contains 是否忽略大小写
+Sel = namedtuple("Sel", ["tag", "token", "contains", "ci"])
+
+
+def sel(tag, token=None, contains=None, ci=False):
+    return Sel(tag, token, contains, ci)
+
+
+SPECS = {
+    "weibo": {
+        "items": [sel("div", token="mbrank"), sel("div", contains="feed-item")],
+        "fields": {
+            "text": [sel("p", token="txt"), sel("p")],
+            "likes": [sel("span", contains="like")],
+        },
+        "id_attr": "mid",
+    },
+    "zhihu": {
+        "items": [sel("div", contains="SearchResult"), sel("article", contains="search", ci=True)],
+        "fields": {
+            "title": [sel("h2"), sel("a", contains="title", ci=True)],
+            "content": [sel("p", contains="content", ci=True), sel("p")],
+            "votes": [sel("button", contains="vote", ci=True)],
+        },
+        "id_attr": None,
+    },
+    "zhihu_pipeline": {
+        "items": [sel("div", contains="SearchResult")],
+        "fields": {
+            "title": [sel("h2")],
+            "content": [sel("p")],
+        },
+        "id_attr": None,
+    },
+}
+
+
+def _class_matches(s, class_value):
+    """class 属性值是否满足选择器"""
+    if s.token is None and s.contains is None:
+        return True
+    if not class_value:
+        return False
+    if s.token is not None and s.token not in class_value.split():
+        return False
+    if s.contains is not None:
+        if s.ci:
+            return s.contains.lower() in class_value.lower()
+        return s.contains in class_value
+    return True
+
+
+def _finish(platform, fields, item_id):
+    """把抽取到的字段整理成统一的条目"""
+    item = dict(fields)
+    item["id"] = item_id
+    if platform.startswith("zhihu"):
+        item["text"] = f"{fields.get('title') or ''} {fields.get('content') or ''}".strip()
+    else:
+        item["text"] = item.get("text") or ""
+    return item
+
+
+# ============================================================================
+# 后端
+# ============================================================================
+
+class SelectolaxExtractor:
+    """selectolax（lexbor）后端"""
+
+    name = "selectolax"
+
+    def __init__(self):
+        self.compiled = {p: self._compile(spec) for p, spec in SPECS.items()}
+
+    @staticmethod
+    def _css(s):
+        css = s.tag
+        if s.token:
+            css += f".{s.token}"
+        if s.contains and not s.ci:
+            css += f'[class*="{s.contains}"]'
+        elif s.contains:
+            css += "[class]"  # 忽略大小写的部分在 Python 里再过滤
+        return css
+
+    def _compile(self, spec):
+        return {
+            "items": [(self._css(s), s) for s in spec["items"]],
+            "fields": {f: [(self._css(s), s) for s in alts] for f, alts in spec["fields"].items()},
+            "id_attr": spec["id_attr"],
+        }
+
+    @staticmethod
+    def _select(node, css, s):
+        nodes = node.css(css)
+        if s.ci:
+            nodes = [n for n in nodes if _class_matches(s, n.attributes.get("class"))]
+        return nodes
+
+    def extract(self, platform, html):
+        spec = self.compiled[platform]
+        tree = LexborParser(html)
+        items = []
+        for css, s in spec["items"]:
+            items = self._select(tree, css, s)
+            if items:
+                break
+
+        results = []
+        for node in items:
+            fields = {}
+            for field, alts in spec["fields"].items():
+                fields[field] = None
+                for css, s in alts:
+                    found = self._select(node, css, s)
+                    if found:
+                        fields[field] = found[0].text(deep=True, separator='', strip=True)
+                        break
+            item_id = None
+            if spec["id_attr"]:
+                cur = node
+                while cur is not None and item_id is None:
+                    item_id = (cur.attributes or {}).get(spec["id_attr"])
+                    cur = cur.parent
+            results.append(_finish(platform, fields, item_id))
+        return results
+
+
+class LxmlExtractor:
+    """lxml 后端：预编译 XPath"""
+
+    name = "lxml"
+
+    def __init__(self):
+        self.compiled = {p: self._compile(spec) for p, spec in SPECS.items()}
+
+    @staticmethod
+    def _predicate(s):
+        conds = []
+        if s.token:
+            conds.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {s.token} ')")
+        if s.contains and s.ci:
+            conds.append("contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', "
+                         f"'abcdefghijklmnopqrstuvwxyz'), '{s.contains.lower()}')")
+        elif s.contains:
+            conds.append(f"contains(@class, '{s.contains}')")
+        return f"[{' and '.join(conds)}]" if conds else ""
+
+    def _compile(self, spec):
+        id_xpath = None
+        if spec["id_attr"]:
+            id_xpath = etree.XPath(f"ancestor-or-self::*[@{spec['id_attr']}][1]/@{spec['id_attr']}")
+        return {
+            "items": [etree.XPath(f"//{s.tag}{self._predicate(s)}") for s in spec["items"]],
+            "fields": {f: [etree.XPath(f"(.//{s.tag}{self._predicate(s)})[1]") for s in alts]
+                       for f, alts in spec["fields"].items()},
+            "id": id_xpath,
+        }
+
+    def extract(self, platform, html):
+        spec = self.compiled[platform]
+        tree = lxml_html.fromstring(html) if html.strip() else None
+        if tree is None:
+            return []
+        items = []
+        for xpath in spec["items"]:
+            items = xpath(tree)
+            if items:
+                break
+
+        results = []
+        for node in items:
+            fields = {}
+            for field, alts in spec["fields"].items():
+                fields[field] = None
+                for xpath in alts:
+                    found = xpath(node)
+                    if found:
+                        fields[field] = "".join(t.strip() for t in found[0].itertext())
+                        break
+            ids = spec["id"](node) if spec["id"] is not None else []
+            results.append(_finish(platform, fields, str(ids[0]) if ids else None))
+        return results
+
+
+class Bs4Extractor:
+    """BeautifulSoup 后端（原实现）"""
+
+    name = "bs4"
+
+    def __init__(self, parser=None):
+        self.parser = parser or ("lxml" if HAS_LXML else "html.parser")
+
+    @staticmethod
+    def _find_all(node, s, limit=None):
+        if s.token is None and s.contains is None:
+            return node.find_all(s.tag, limit=limit)
+        return node.find_all(s.tag, attrs={'class': lambda x: _class_matches(s, x)}, limit=limit)
+
+    def extract(self, platform, html):
+        spec = SPECS[platform]
+        soup = BeautifulSoup(html, self.parser)
+        items = []
+        for s in spec["items"]:
+            items = self._find_all(soup, s)
+            if items:
+                break
+
+        results = []
+        for node in items:
+            fields = {}
+            for field, alts in spec["fields"].items():
+                fields[field] = None
+                for s in alts:
+                    found = self._find_all(node, s, limit=1)
+                    if found:
+                        fields[field] = found[0].get_text(strip=True)
+                        break
+            item_id = None
+            if spec["id_attr"]:
+                holder = node if node.get(spec["id_attr"]) else node.find_parent(attrs={spec["id_attr"]: True})
+                item_id = holder.get(spec["id_attr"]) if holder else None
+            results.append(_finish(platform, fields, item_id))
+        return results
+
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "param", "source", "track", "wbr"}
+
+
+class _StreamingParser(HTMLParser):
+    """单遍扫描的抽取器：不建树，只跟踪打开的元素栈"""
+
+    def __init__(self, spec):
+        super().__init__(convert_charrefs=True)
+        self.spec = spec
+        self.stack = []      # [tag, attrs, 捕获中的文本缓冲列表, 条目(若为条目根)]
+        self.open_items = []  # 打开的条目（可以嵌套）
+        self.results = [[] for _ in spec["items"]]
+        self.seq = 0         # 条目开始标签的顺序：内层条目先关闭，结果按它排回文档顺序
+
+    def _new_item(self, alt, attrs):
+        item_id = None
+        id_attr = self.spec["id_attr"]
+        if id_attr:
+            item_id = attrs.get(id_attr)
+            for entry in reversed(self.stack):
+                if item_id:
+                    break
+                item_id = entry[1].get(id_attr)
+        self.seq += 1
+        return {"alt": alt, "id": item_id, "seq": self.seq,
+                "fields": {f: [None] * len(alts) for f, alts in self.spec["fields"].items()}}
+
+    def handle_starttag(self, tag, attr_list):
+        attrs = dict(attr_list)
+        cls = attrs.get("class")
+        captures = []
+        # 已打开条目内的字段
+        for item in self.open_items:
+            for field, alts in self.spec["fields"].items():
+                slots = item["fields"][field]
+                for i, s in enumerate(alts):
+                    if slots[i] is None and s.tag == tag and _class_matches(s, cls):
+                        slots[i] = []
+                        captures.append(slots[i])
+        # 新条目
+        started = None
+        for alt, s in enumerate(self.spec["items"]):
+            if s.tag == tag and _class_matches(s, cls):
+                started = started or []
+                item = self._new_item(alt, attrs)
+                self.open_items.append(item)
+                started.append(item)
+        if tag in VOID_TAGS:
+            if started:
+                for item in started:
+                    self._close_item(item)
+            return
+        self.stack.append([tag, attrs, captures, started])
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if not any(entry[0] == tag for entry in self.stack):
+            return
+        while self.stack:
+            entry = self.stack.pop()
+            if entry[3]:
+                for item in entry[3]:
+                    self._close_item(item)
+            if entry[0] == tag:
+                break
+
+    def handle_data(self, data):
+        text = data.strip()
+        if not text:
+            return
+        for entry in self.stack:
+            for buf in entry[2]:
+                buf.append(text)
+
+    def _close_item(self, item):
+        self.open_items = [it for it in self.open_items if it is not item]
+        fields = {}
+        for field, slots in item["fields"].items():
+            fields[field] = next(("".join(buf) for buf in slots if buf is not None), None)
+        self.results[item["alt"]].append((item["seq"], fields, item["id"]))
+
+    def close(self):
+        super().close()
+        while self.stack:
+            self.handle_endtag(self.stack[-1][0])
+
+
+class HtmlParserExtractor:
+    """标准库流式后端"""
+
+    name = "htmlparser"
+
+    def extract(self, platform, html):
+        parser = _StreamingParser(SPECS[platform])
+        parser.feed(html)
+        parser.close()
+        for alt_results in parser.results:
+            if alt_results:
+                return [_finish(platform, fields, item_id) for _, fields, item_id in sorted(alt_results)]
+        return []
+
+
+# ============================================================================
+# 选择后端
+# ============================================================================
+
+BACKENDS = {
+    "selectolax": (HAS_SELECTOLAX, SelectolaxExtractor),
+    "lxml": (HAS_LXML, LxmlExtractor),
+    "bs4": (HAS_BS4, Bs4Extractor),
+    "htmlparser": (True, HtmlParserExtractor),
+}
+
+
+def available_backends():
+    return [name for name, (ok, _) in BACKENDS.items() if ok]
+
+
+def get_extractor(name=None):
+    """返回抽取器实例；name 为空时读环境变量 HTML_EXTRACTOR，否则取第一个可用后端"""
+    name = name or os.getenv("HTML_EXTRACTOR")
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"未知抽取后端：{name}（可选 {', '.join(BACKENDS)}）")
+        ok, cls = BACKENDS[name]
+        if not ok:
+            raise ImportError(f"抽取后端 {name} 的依赖未安装")
+        return cls()
+    return BACKENDS[available_backends()[0]][1]()
+
+
+def parse_count(value):
+    """点赞/投票数文本转整数，无法解析时为0"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP响应磁盘缓存 - 采集器开发用的录制/回放
+
+调整 WeiboCollector / ZhihuCollector 的选择器时不必每次都重新访问线上网站：
+    record  抓取时把原始响应写入缓存（已缓存的URL直接读缓存）
+    replay  只从缓存读取，完全不联网；缓存未命中返回 status=None
+    off     不使用缓存（默认）
+
+存储按内容寻址：
+    data/http_cache/refs/ab/<请求哈希>.json    URL（参数排序后）→ 状态码、内容哈希、抓取时间
+    data/http_cache/objects/cd/<内容哈希>.gz   gzip 压缩的响应体，相同内容只存一份
+
+使用方法：
+    HTTP_CACHE=record python data_collection_pipeline.py    # 录制
+    HTTP_CACHE=replay python data_collection_pipeline.py    # 离线回放
+    python http_cache.py                                    # 查看缓存统计
+
+    from http_cache import HttpCache
+    for url, html in HttpCache().iter_pages("s.weibo.com"):
+        parse(html)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import config
+
+CACHE_DIR = config.DATA_DIR / "http_cache"
+MODES = ("off", "record", "replay")
+
+
+def canonical_url(url):
+    """参数排序后的URL，作为缓存键"""
+    parts = urlparse(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunparse((parts.scheme, parts.netloc.lower(), parts.path or "/", "", query, ""))
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class HttpCache:
+    """内容寻址的响应缓存"""
+
+    def __init__(self, cache_dir=CACHE_DIR, mode="record"):
+        if mode not in MODES:
+            raise ValueError(f"未知缓存模式：{mode}（可选 {', '.join(MODES)}）")
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.stats = {"hits": 0, "misses": 0, "stored": 0}
+
+    @property
+    def replay(self):
+        return self.mode == "replay"
+
+    def _ref_path(self, key):
+        return os.path.join(self.cache_dir, "refs", key[:2], f"{key}.json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.cache_dir, "objects", digest[:2], f"{digest}.gz")
+
+    @staticmethod
+    def key(url):
+        return _sha256(canonical_url(url).encode('utf-8'))
+
+    def get(self, url):
+        """返回 (状态码, 文本)，未命中返回 None"""
+        ref_path = self._ref_path(self.key(url))
+        if not os.path.exists(ref_path):
+            self.stats["misses"] += 1
+            return None
+        with open(ref_path, 'r', encoding='utf-8') as f:
+            ref = json.load(f)
+        with gzip.open(self._object_path(ref["content_sha256"]), 'rb') as f:
+            text = f.read().decode('utf-8')
+        self.stats["hits"] += 1
+        return ref["status"], text
+
+    def put(self, url, status, text):
+        """写入一条响应（先写内容对象，再写引用，保证引用总指向完整内容）"""
+        body = text.encode('utf-8')
+        digest = _sha256(body)
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp = f"{object_path}.tmp"
+            with gzip.open(tmp, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, object_path)
+
+        ref_path = self._ref_path(self.key(url))
+        os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+        ref = {
+            "url": canonical_url(url),
+            "status": status,
+            "content_sha256": digest,
+            "size": len(body),
+            "fetched_at": datetime.now().isoformat(),
+        }
+        tmp = f"{ref_path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(ref, f, ensure_ascii=False)
+        os.replace(tmp, ref_path)
+        self.stats["stored"] += 1
+
+    def iter_refs(self):
+        refs_dir = os.path.join(self.cache_dir, "refs")
+        if not os.path.isdir(refs_dir):
+            return
+        for root, _, files in os.walk(refs_dir):
+            for name in sorted(files):
+                if name.endswith(".json"):
+                    with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                        yield json.load(f)
+
+    def iter_pages(self, host=None):
+        """遍历缓存中的页面 (url, 文本)，可按主机过滤（解析器基准测试用）"""
+        for ref in self.iter_refs():
+            if host and urlparse(ref["url"]).netloc != host:
+                continue
+            with gzip.open(self._object_path(ref["content_sha256"]), 'rb') as f:
+                yield ref["url"], f.read().decode('utf-8')
+
+
+def from_env():
+    """按环境变量 HTTP_CACHE 创建缓存，off 或未设置时返回 None"""
+    mode = os.getenv("HTTP_CACHE", "off").lower()
+    if mode == "off":
+        return None
+    return HttpCache(os.getenv("HTTP_CACHE_DIR", CACHE_DIR), mode)
+
+
+if __name__ == "__main__":
+    cache = HttpCache(sys.argv[1] if len(sys.argv) > 1 else CACHE_DIR)
+    hosts = {}
+    total_size = 0
+    objects = set()
+    for ref in cache.iter_refs():
+        host = urlparse(ref["url"]).netloc
+        hosts[host] = hosts.get(host, 0) + 1
+        total_size += ref.get("size", 0)
+        objects.add(ref["content_sha256"])
+
+    if not hosts:
+        print(f"[INFO] Cache is empty: {cache.cache_dir}")
+    else:
+        print(f"[INFO] Cache: {cache.cache_dir}")
+        for host, count in sorted(hosts.items(), key=lambda x: -x[1]):
+            print(f"  {host:30s} {count:>7} pages")
+        print(f"[OK] {sum(hosts.values())} pages, {len(objects)} unique bodies, "
+              f"{total_size / 1024 / 1024:.1f} MB uncompressed")
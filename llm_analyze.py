@@ -9,6 +9,10 @@ import sys
 import time
 from pathlib import Path
 from datetime import datetime
+from statistics import median
+
+from compact_protocol import COMPACT_SYSTEM_PROMPT, CompactDecodeError, decode_compact_response
+from priority_scheduler import PriorityWorkQueue, RiskCoverageTracker
 
 # 处理Windows编码问题
 if sys.platform == 'win32':
@@ -24,6 +28,15 @@ INPUT_FILE = Path("data/clean/opinions_clean_5000.txt")
 OUTPUT_FILE = Path("data/analysis/analysis_results.json")
 OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
+# 紧凑响应协议：模型返回位置数组，仅高风险/负面舆论附带摘要，显著减少输出token
+COMPACT_MODE = False  # 改为 True 启用紧凑协议
+
+# 优先级调度：先分析最可能高风险的舆论（关闭则按文件顺序；保存的结果始终按文件顺序）
+PRIORITY_MODE = True
+
+# 每次调用的耗时和输出token数（用于统计中位数）
+CALL_STATS = []
+
 # ============================================================================
 # 系统Prompt - 5维度分析
 # ============================================================================
@@ -80,8 +93,14 @@ SYSTEM_PROMPT = """你是一个专业的跨境电商税收舆论分析系统。
 # 调用LLM的函数
 # ============================================================================
 
-def call_zhipu_api(opinion_text):
-    """调用智谱清言API进行分析"""
+def call_zhipu_api(opinion_text, compact=None):
+    """调用智谱清言API进行分析
+
+    compact为None时使用全局COMPACT_MODE
+    """
+    if compact is None:
+        compact = COMPACT_MODE
+    
     try:
         from zhipuai import ZhipuAI
     except ImportError:
@@ -91,10 +110,11 @@ def call_zhipu_api(opinion_text):
     try:
         client = ZhipuAI(api_key=API_KEY)
         
+        call_start = time.time()
         response = client.chat.completions.create(
             model=MODEL,
             messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "system", "content": COMPACT_SYSTEM_PROMPT if compact else SYSTEM_PROMPT},
                 {"role": "user", "content": f"分析这条舆论：{opinion_text}"}
             ],
             temperature=0.3,
@@ -103,6 +123,18 @@ def call_zhipu_api(opinion_text):
         
         result_text = response.choices[0].message.content
         
+        usage = getattr(response, 'usage', None)
+        CALL_STATS.append({
+            'latency': time.time() - call_start,
+            'completion_tokens': getattr(usage, 'completion_tokens', None),
+        })
+        
+        if compact:
+            try:
+                return decode_compact_response(result_text)
+            except CompactDecodeError:
+                return None
+        
         # 提取JSON (可能被markdown代码块包装)
         if result_text.startswith("```"):
             start = result_text.find('\n') + 1
@@ -152,15 +184,24 @@ def analyze_opinions(opinions, sample_size=None, start_idx=0):
     print(f"[START] Analyzing {len(opinions)} opinions")
     print(f"[API] {MODEL} (Key: {API_KEY[:10]}...)\n")
     
+    # 派发顺序：(原始位置, 舆论)
+    if PRIORITY_MODE:
+        work = [(pos, opinion) for pos, opinion, _ in PriorityWorkQueue(opinions).drain()]
+        print("[INFO] Priority scheduling enabled (likely high-risk first)\n")
+    else:
+        work = list(enumerate(opinions))
+    
+    tracker = RiskCoverageTracker()
     start_time = time.time()
     
-    for idx, opinion in enumerate(opinions, 1):
+    for idx, (pos, opinion) in enumerate(work, 1):
         # 调用API
         result = call_zhipu_api(opinion)
+        tracker.record(result)
         
         if result:
             result['source_text'] = opinion
-            result['index'] = idx
+            result['index'] = pos + 1
             results.append(result)
             status = "✓"
         else:
@@ -184,8 +225,17 @@ def analyze_opinions(opinions, sample_size=None, start_idx=0):
         if idx % 10 == 0:
             time.sleep(1)
     
+    # 优先级只决定派发顺序，输出仍按原始顺序
+    results.sort(key=lambda r: r['index'])
+    
     print(f"\n[OK] Analysis complete")
-    print(f"[STATS] Success: {len(results)}, Failed: {failed}, Rate: {100*len(results)/len(opinions):.1f}%\n")
+    print(f"[STATS] Success: {len(results)}, Failed: {failed}, Rate: {100*len(results)/len(opinions):.1f}%")
+    
+    coverage = tracker.summary()
+    for label, key in [("first high-risk", "time_to_first_high_risk"), ("first critical", "time_to_first_critical")]:
+        if coverage[key] is not None:
+            print(f"[STATS] Time to {label}: {coverage[key]:.1f}s")
+    print()
     
     return results
 
@@ -258,6 +308,15 @@ def generate_statistics(results):
     
     print(f"\n[CONFIDENCE] Average: {avg_confidence:.2f}")
     
+    # 调用耗时和输出长度
+    if CALL_STATS:
+        latencies = [c['latency'] for c in CALL_STATS]
+        tokens = [c['completion_tokens'] for c in CALL_STATS if c['completion_tokens'] is not None]
+        print(f"\n[CALLS] Protocol: {'compact' if COMPACT_MODE else 'verbose'}")
+        print(f"  Median latency: {median(latencies):.2f}s")
+        if tokens:
+            print(f"  Median completion tokens: {median(tokens):.0f}")
+    
     print("\n" + "=" * 70)
 
 def main():
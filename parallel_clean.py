@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+并行清洁 - 无状态步骤分给进程池，主进程按原顺序做全局去重
+
+清洁步骤分两类：
+    无状态（每条记录独立）：解析原始文件、提取内容、长度过滤、广告过滤、规范化、
+                          中文比例检查、不可打印字符过滤、MinHash 签名
+    有状态（依赖之前的所有记录）：去重（内容哈希集合 / 近似重复索引）
+无状态步骤按分区（一个原始文件或分片 / 一批记录）交给进程池，结果按提交顺序取回，
+主进程依次做去重，所以输出和统计与单进程逐条处理完全一致。
+同时在途的分区最多 workers × 2 个，内存不随分区数增长。
+
+分区内的清洁规则见 cleaning_engine.py（CleaningEngine 使用这里的进程池）。
+
+使用方法：
+    from parallel_clean import chunked, imap_partitions, resolve_workers
+
+    for result in imap_partitions(fn, partitions, workers=4):   # fn 须为模块级函数
+        ...
+
+    python benchmark_parallel_clean.py   # 不同进程数下的吞吐量
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+
+def resolve_workers(workers=None):
+    """进程数：None 或 0 表示 CPU 核数"""
+    if not workers:
+        workers = os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def chunked(iterable, size):
+    """按 size 条切成列表"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def imap_partitions(fn, partitions, workers=1):
+    """按提交顺序产出 fn(partition)
+
+    workers == 1 或只有一个分区时直接在当前进程执行，不启动进程池。
+    """
+    partitions = iter(partitions)
+    head = list(islice(partitions, 2))
+    if workers <= 1 or len(head) < 2:
+        for partition in chain(head, partitions):
+            yield fn(partition)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for partition in chain(head, partitions):
+            pending.append(pool.submit(fn, partition))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
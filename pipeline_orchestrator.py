@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""
+端到端增量管道编排器
+
+把原来的手工流程
+    1_/2_/3_crawl_* → 4_merge_and_clean.py → auto_analyze.py → pretrain_bertopic.py → git push
+描述为一个DAG：每个阶段声明输入和输出，编排器对输入做内容哈希，
+只重跑输入发生变化（或输出缺失）的阶段，互不依赖的阶段（三个爬虫）并行执行，
+并记录每个阶段的耗时。
+
+支持增量处理的阶段会通过环境变量 PIPELINE_CHANGED_INPUTS 收到
+本次变化的输入文件列表（JSON数组，相对项目根目录），只处理变化的记录。
+
+使用方法：
+    python pipeline_orchestrator.py                    # 增量运行
+    python pipeline_orchestrator.py --dry-run          # 只显示将要运行的阶段
+    python pipeline_orchestrator.py --refresh-crawl    # 强制重新爬取（每日刷新）
+    python pipeline_orchestrator.py --force clean      # 强制重跑某些阶段（及其下游）
+    python pipeline_orchestrator.py --only clean analyze
+    python pipeline_orchestrator.py --adopt            # 把现有数据登记为最新（首次接入时）
+
+状态文件：data/.pipeline_state.json
+运行记录：logs/pipeline_runs.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import config
+
+# ============================================================================
+# 日志设置
+# ============================================================================
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
+    handlers=[
+        logging.FileHandler(config.LOGS_DIR / "pipeline.log", encoding='utf-8'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+ROOT = config.PROJECT_ROOT
+STATE_FILE = config.DATA_DIR / ".pipeline_state.json"
+RUN_LOG_FILE = config.LOGS_DIR / "pipeline_runs.jsonl"
+
+
+def _rel(path):
+    path = Path(path)
+    try:
+        return str(path.resolve().relative_to(ROOT.resolve()))
+    except ValueError:
+        return str(path)
+
+
+# ============================================================================
+# 阶段定义
+# ============================================================================
+
+class Stage:
+    """管道中的一个阶段
+
+    command:     子进程命令（list）或 Python 可调用对象
+    inputs:      输入文件/目录（目录按其中所有文件计算指纹）
+    outputs:     输出文件/目录（缺失时必须重跑）
+    deps:        上游阶段名
+    incremental: 阶段能否只处理变化的记录（收到 PIPELINE_CHANGED_INPUTS）
+    volatile:    输入无法从文件判断（如爬虫依赖线上数据），只在 --refresh-crawl 时运行
+    """
+
+    def __init__(self, name, command, inputs=(), outputs=(), deps=(),
+                 incremental=False, volatile=False, env=None):
+        self.name = name
+        self.command = command
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.deps = list(deps)
+        self.incremental = incremental
+        self.volatile = volatile
+        self.env = env or {}
+
+
+def _script(name):
+    return [sys.executable, str(ROOT / name)]
+
+
+def publish():
+    """提交并推送分析结果和预训练模型"""
+    paths = ["data/analysis/analysis_results.json", "streamlit_app/data/bertopic_model"]
+    subprocess.run(["git", "add", *paths], cwd=ROOT, check=True)
+    staged = subprocess.run(["git", "diff", "--cached", "--quiet"], cwd=ROOT)
+    if staged.returncode == 0:
+        logger.info("  无需提交：没有变化")
+        return
+    message = f"Auto: 更新分析数据 ({datetime.now().strftime('%Y-%m-%d %H:%M')})"
+    subprocess.run(["git", "commit", "-m", message], cwd=ROOT, check=True)
+    subprocess.run(["git", "push", "origin", "main"], cwd=ROOT, check=True)
+
+
+def build_stages():
+    """项目的标准管道"""
+    config_file = ROOT / "config.py"
+    analysis_file = config.ANALYSIS_DATA_DIR / "analysis_results.json"
+    clean_json = config.OUTPUT_CONFIG["clean_json_file"]
+    clean_txt = config.OUTPUT_CONFIG["clean_opinions_file"]
+    raw_dirs = [config.WEIBO_RAW_DIR, config.ZHIHU_RAW_DIR, config.XIAOHONGSHU_RAW_DIR]
+
+    crawlers = [
+        ("crawl_weibo", "1_crawl_weibo_mediacrawler.py", config.WEIBO_RAW_DIR),
+        ("crawl_zhihu", "2_crawl_zhihu_mediacrawler.py", config.ZHIHU_RAW_DIR),
+        ("crawl_xiaohongshu", "3_crawl_xiaohongshu_mediacrawler.py", config.XIAOHONGSHU_RAW_DIR),
+    ]
+
+    stages = [
+        Stage(name, _script(script), inputs=[ROOT / script, config_file],
+              outputs=[out_dir], volatile=True)
+        for name, script, out_dir in crawlers
+    ]
+    stages += [
+        Stage("clean", _script("4_merge_and_clean.py"),
+              inputs=[ROOT / "4_merge_and_clean.py", config_file, *raw_dirs],
+              outputs=[clean_txt, clean_json],
+              deps=[name for name, _, _ in crawlers],
+              incremental=True),
+        # auto_analyze 本身只分析新增意见；git推送交给 publish 阶段
+        Stage("analyze", _script("auto_analyze.py"),
+              inputs=[ROOT / "auto_analyze.py", clean_json],
+              outputs=[analysis_file],
+              deps=["clean"],
+              incremental=True,
+              env={"SKIP_GIT_PUSH": "1"}),
+        Stage("pretrain_bertopic", _script("pretrain_bertopic.py"),
+              inputs=[ROOT / "pretrain_bertopic.py", analysis_file],
+              outputs=[ROOT / "streamlit_app" / "data" / "bertopic_model"],
+              deps=["analyze"]),
+        Stage("publish", publish,
+              inputs=[analysis_file, ROOT / "streamlit_app" / "data" / "bertopic_model"],
+              deps=["analyze", "pretrain_bertopic"]),
+    ]
+    return stages
+
+
+# ============================================================================
+# 内容指纹
+# ============================================================================
+
+class Fingerprinter:
+    """文件内容哈希，按 (size, mtime) 缓存，未改动的大文件不重复读取"""
+
+    def __init__(self, cache=None):
+        self.cache = cache or {}
+
+    def file_hash(self, path):
+        stat = path.stat()
+        key = _rel(path)
+        cached = self.cache.get(key)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["sha256"]
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.cache[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        return digest
+
+    def files(self, paths):
+        """返回 {相对路径: 哈希}，目录展开为其中所有文件"""
+        result = {}
+        for path in paths:
+            if path.is_dir():
+                for p in sorted(path.rglob("*")):
+                    if p.is_file():
+                        result[_rel(p)] = self.file_hash(p)
+            elif path.is_file():
+                result[_rel(path)] = self.file_hash(path)
+        return result
+
+    @staticmethod
+    def combine(file_hashes):
+        h = hashlib.sha256()
+        for name in sorted(file_hashes):
+            h.update(name.encode('utf-8'))
+            h.update(file_hashes[name].encode('ascii'))
+        return h.hexdigest()
+
+
+# ============================================================================
+# 编排器
+# ============================================================================
+
+class PipelineOrchestrator:
+    """按依赖关系增量执行阶段"""
+
+    def __init__(self, stages, state_file=STATE_FILE, max_workers=3):
+        self.stages = {s.name: s for s in stages}
+        self.state_file = Path(state_file)
+        self.max_workers = max_workers
+        self.state = self._load_state()
+        self.fp = Fingerprinter(self.state.get("_file_cache", {}))
+        self._check_dag()
+
+    def _load_state(self):
+        if self.state_file.exists():
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def _save_state(self):
+        self.state["_file_cache"] = self.fp.cache
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_file.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.state_file)
+
+    def _check_dag(self):
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"阶段 {stage.name} 依赖未知阶段 {dep}")
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"阶段依赖存在环：{name}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def downstream(self, names):
+        """names 及其所有下游阶段"""
+        result = set(names)
+        changed = True
+        while changed:
+            changed = False
+            for stage in self.stages.values():
+                if stage.name not in result and any(d in result for d in stage.deps):
+                    result.add(stage.name)
+                    changed = True
+        return result
+
+    def decide(self, stage, forced, refresh_volatile):
+        """判断阶段是否需要运行，返回 (是否运行, 原因, 输入文件哈希, 变化的文件)"""
+        inputs = self.fp.files(stage.inputs)
+        previous = self.state.get(stage.name, {})
+        prev_inputs = previous.get("inputs", {})
+        changed = sorted(k for k in inputs if prev_inputs.get(k) != inputs[k])
+        removed = sorted(k for k in prev_inputs if k not in inputs)
+
+        if stage.name in forced:
+            return True, "forced", inputs, changed
+        if stage.volatile:
+            if refresh_volatile:
+                return True, "refresh", inputs, changed
+            if not previous and not any(p.exists() and (p.is_file() or any(p.iterdir())) for p in stage.outputs):
+                return True, "never run", inputs, changed
+            return False, "volatile (use --refresh-crawl)", inputs, changed
+        if previous.get("status") != "ok":
+            return True, "no successful run", inputs, changed
+        missing = [str(p) for p in stage.outputs if not p.exists()]
+        if missing:
+            return True, f"missing output {_rel(missing[0])}", inputs, changed
+        if changed or removed:
+            return True, f"{len(changed) + len(removed)} input(s) changed", inputs, changed + removed
+        return False, "up to date", inputs, changed
+
+    def _execute(self, stage, changed_files):
+        """执行单个阶段，返回 (是否成功, 耗时秒)"""
+        start = time.time()
+        try:
+            if callable(stage.command):
+                stage.command()
+            else:
+                env = dict(os.environ, **stage.env)
+                if stage.incremental:
+                    env["PIPELINE_CHANGED_INPUTS"] = json.dumps(changed_files, ensure_ascii=False)
+                log_file = config.LOGS_DIR / f"pipeline_{stage.name}.log"
+                with open(log_file, 'w', encoding='utf-8') as log:
+                    subprocess.run(stage.command, cwd=ROOT, env=env, check=True,
+                                   stdout=log, stderr=subprocess.STDOUT)
+            return True, time.time() - start
+        except Exception as e:
+            logger.error(f"  ✗ {stage.name} 失败：{e}")
+            return False, time.time() - start
+
+    def run(self, forced=(), only=None, refresh_volatile=False, dry_run=False):
+        """执行管道，返回 {阶段: 结果dict}"""
+        forced = self.downstream(forced) if forced else set()
+        selected = set(only) if only else set(self.stages)
+        pending = {n for n in self.stages if n in selected}
+        finished = {}
+        results = {}
+
+        logger.info("=" * 70)
+        logger.info("【增量管道】" + ("（dry-run）" if dry_run else ""))
+        logger.info("=" * 70)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while pending or running:
+                # 启动所有依赖已完成的阶段
+                for name in sorted(pending):
+                    stage = self.stages[name]
+                    deps = [d for d in stage.deps if d in selected]
+                    if any(d not in finished for d in deps):
+                        continue
+                    pending.discard(name)
+
+                    if any(finished[d] == "failed" for d in deps):
+                        finished[name] = "failed"
+                        results[name] = {"status": "skipped", "reason": "upstream failed"}
+                        logger.warning(f"  - {name}: 跳过（上游失败）")
+                        continue
+
+                    # 上游刚重跑过的阶段：重新计算指纹即可自然感知输出变化
+                    run_it, reason, inputs, changed = self.decide(
+                        stage, forced, refresh_volatile)
+                    if not run_it or dry_run:
+                        finished[name] = "ok"
+                        status = "would run" if run_it else "skipped"
+                        results[name] = {"status": status, "reason": reason}
+                        logger.info(f"  {'▶' if run_it else '·'} {name}: {reason}")
+                        continue
+
+                    logger.info(f"  ▶ {name}: {reason}")
+                    future = pool.submit(self._execute, stage, changed)
+                    running[future] = (name, inputs)
+
+                if not running:
+                    if pending and not any(
+                        all(d in finished for d in self.stages[n].deps if d in selected)
+                        for n in pending
+                    ):
+                        break
+                    continue
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, inputs = running.pop(future)
+                    ok, duration = future.result()
+                    finished[name] = "ok" if ok else "failed"
+                    results[name] = {"status": "ok" if ok else "failed",
+                                     "seconds": round(duration, 2)}
+                    self.state[name] = {
+                        "status": "ok" if ok else "failed",
+                        "inputs": inputs if ok else self.state.get(name, {}).get("inputs", {}),
+                        "last_run": datetime.now().isoformat(),
+                        "seconds": round(duration, 2),
+                    }
+                    logger.info(f"  {'✓' if ok else '✗'} {name}: {duration:.1f}s")
+                    if not dry_run:
+                        self._save_state()
+
+        if not dry_run:
+            self._save_state()
+            self._log_run(results)
+        self._print_summary(results)
+        return results
+
+    def adopt(self):
+        """把当前输入指纹登记为已成功运行（已有数据首次接入编排器时使用）"""
+        for stage in self.stages.values():
+            self.state[stage.name] = {
+                "status": "ok",
+                "inputs": self.fp.files(stage.inputs),
+                "last_run": datetime.now().isoformat(),
+                "seconds": None,
+            }
+        self._save_state()
+        logger.info(f"已登记 {len(self.stages)} 个阶段的当前状态")
+
+    @staticmethod
+    def _log_run(results):
+        RUN_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(RUN_LOG_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"time": datetime.now().isoformat(), "stages": results},
+                               ensure_ascii=False) + "\n")
+
+    @staticmethod
+    def _print_summary(results):
+        logger.info("\n【阶段耗时】")
+        total = 0.0
+        for name, r in results.items():
+            seconds = r.get("seconds")
+            total += seconds or 0
+            timing = f"{seconds:8.1f}s" if seconds is not None else " " * 9
+            logger.info(f"  {name:20s} {r['status']:10s} {timing}  {r.get('reason', '')}")
+        logger.info(f"  {'合计（串行）':18s} {'':10s} {total:8.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量管道编排器")
+    parser.add_argument("--dry-run", action="store_true", help="只显示将要运行的阶段")
+    parser.add_argument("--force", nargs="*", default=[], help="强制重跑的阶段（含下游）")
+    parser.add_argument("--only", nargs="*", help="只考虑这些阶段")
+    parser.add_argument("--refresh-crawl", action="store_true", help="重新运行爬虫阶段")
+    parser.add_argument("--workers", type=int, default=3, help="并行阶段数")
+    parser.add_argument("--adopt", action="store_true", help="把现有数据登记为最新，不运行任何阶段")
+    args = parser.parse_args()
+
+    orchestrator = PipelineOrchestrator(build_stages(), max_workers=args.workers)
+    if args.adopt:
+        orchestrator.adopt()
+        return True
+    results = orchestrator.run(forced=args.force, only=args.only,
+                               refresh_volatile=args.refresh_crawl, dry_run=args.dry_run)
+    return all(r["status"] != "failed" for r in results.values())
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+自适应礼貌延迟 - 按平台的 AIMD 控制器
+
+原来的爬虫不管网站响应如何都固定等待（delay_min、random.uniform(2, 4)、
+出错后 random.uniform(3, 7)）。这里按平台（异步抓取器按主机）维护一个请求速率：
+    - 响应正常：速率加法增加（延迟逐步缩短，最低到 delay_min × floor_ratio）
+    - 非200 / 网络错误 / 空结果页：速率乘以 backoff_factor（延迟成倍增加）
+    - 验证码页：速率乘以 backoff_factor²，并暂停 captcha_cooldown 秒
+状态保存在 data/politeness_state.json，下次运行从上次的速率继续；
+超过 stale_hours 未更新的状态作废，重新从配置的延迟开始。
+
+使用方法：
+    import politeness
+    pacer = politeness.get_controller("weibo")
+    pacer.wait()                                  # 每次请求前
+    pacer.record(politeness.classify(status, text, items=len(posts)))
+    politeness.save_state()                       # 运行结束时
+    print(pacer.report())
+
+    python politeness.py            # 查看各平台当前延迟
+    python politeness.py --reset    # 清除保存的状态
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import config
+
+STATE_FILE = config.DATA_DIR / "politeness_state.json"
+
+# 响应分类
+OK = "ok"
+ERROR = "error"
+CAPTCHA = "captcha"
+EMPTY = "empty"
+
+# 验证码/风控页面的特征
+CAPTCHA_MARKERS = (
+    "验证码", "安全验证", "访问过于频繁", "captcha", "passport.weibo.com/visitor",
+    "unhuman", "website-login/captcha",
+)
+
+_lock = threading.Lock()
+_controllers = {}
+
+
+def classify(status=200, text=None, items=None):
+    """把一次响应归类为 OK / ERROR / CAPTCHA / EMPTY
+
+    status 为 None 表示网络错误；items 为解析出的条目数（未解析时不传）。
+    """
+    if status != 200:
+        return ERROR
+    if text:
+        head = text[:20000].lower()
+        if any(marker in head for marker in CAPTCHA_MARKERS):
+            return CAPTCHA
+    if items == 0:
+        return EMPTY
+    return OK
+
+
+def classify_error(error):
+    """异常/错误信息归类：包含验证码特征时为 CAPTCHA，否则为 ERROR"""
+    message = str(error).lower()
+    return CAPTCHA if any(marker in message for marker in CAPTCHA_MARKERS) else ERROR
+
+
+class AimdController:
+    """单个平台的 AIMD 请求速率控制器（线程安全）"""
+
+    def __init__(self, name, delay_min=1.0, delay_max=None, settings=None, saved=None):
+        settings = dict(config.POLITENESS_CONFIG, **(settings or {}))
+        delay_max = delay_max if delay_max is not None else delay_min
+        self.name = name
+        self.floor = max(0.05, delay_min * settings["floor_ratio"])
+        self.ceiling = max(settings["max_delay"], delay_max)
+        self.step = settings["increase_step"]
+        self.factor = settings["backoff_factor"]
+        self.jitter = settings["jitter"]
+        self.cooldown = settings["captcha_cooldown"]
+        self.rate = 2.0 / (delay_min + delay_max) if delay_min + delay_max > 0 else 1 / self.floor
+        self.stats = {OK: 0, ERROR: 0, CAPTCHA: 0, EMPTY: 0}
+        self.waited = 0.0
+        self._next_request = 0.0
+        self._lock = threading.Lock()
+        if saved and not self._stale(saved, settings["stale_hours"]):
+            self.rate = saved["rate"]
+        self._clamp()
+
+    @staticmethod
+    def _stale(saved, stale_hours):
+        updated = saved.get("updated_at")
+        if not updated:
+            return True
+        return datetime.now() - datetime.fromisoformat(updated) > timedelta(hours=stale_hours)
+
+    def _clamp(self):
+        self.rate = min(1 / self.floor, max(1 / self.ceiling, self.rate))
+
+    @property
+    def delay(self):
+        """当前基准延迟（秒）"""
+        return 1 / self.rate
+
+    def next_delay(self):
+        """下一次请求前应等待的时间（带抖动）"""
+        return self.delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def wait(self):
+        """阻塞到本平台允许的下一次请求时间"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_request)
+            self._next_request = start + self.next_delay()
+        if start > now:
+            time.sleep(start - now)
+            self.waited += start - now
+
+    def record(self, outcome):
+        """根据一次响应的结果调整速率"""
+        with self._lock:
+            self.stats[outcome] = self.stats.get(outcome, 0) + 1
+            if outcome == OK:
+                self.rate += self.step
+            elif outcome == CAPTCHA:
+                self.rate *= self.factor ** 2
+                self._next_request = max(self._next_request, time.monotonic() + self.cooldown)
+            else:
+                self.rate *= self.factor
+            self._clamp()
+
+    def to_dict(self):
+        return {"rate": self.rate, "delay": round(self.delay, 3),
+                "updated_at": datetime.now().isoformat()}
+
+    def report(self):
+        s = self.stats
+        return (f"{self.name}：当前延迟 {self.delay:.2f}s（范围 {self.floor:.2f}-{self.ceiling:.0f}s），"
+                f"正常 {s[OK]} / 错误 {s[ERROR]} / 验证码 {s[CAPTCHA]} / 空页 {s[EMPTY]}，"
+                f"累计等待 {self.waited:.0f}s")
+
+
+def _load(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def get_controller(name, delay_min=None, delay_max=None):
+    """取得平台（或主机）共享的控制器；默认延迟取自 config.CRAWL_CONFIG[name]"""
+    with _lock:
+        if name not in _controllers:
+            crawl_config = config.CRAWL_CONFIG.get(name, {})
+            if delay_min is None:
+                delay_min = crawl_config.get("delay_min", 1)
+            if delay_max is None:
+                delay_max = crawl_config.get("delay_max", delay_min)
+            _controllers[name] = AimdController(name, delay_min, delay_max,
+                                                saved=_load().get(name))
+        return _controllers[name]
+
+
+def save_state(path=STATE_FILE):
+    """保存所有控制器的速率（重新读取文件，保留本进程未使用的平台）"""
+    with _lock:
+        state = _load(path)
+        for name, controller in _controllers.items():
+            state[name] = controller.to_dict()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+
+if __name__ == "__main__":
+    if "--reset" in sys.argv:
+        if os.path.exists(STATE_FILE):
+            os.remove(STATE_FILE)
+        print(f"[OK] Reset {STATE_FILE}")
+        sys.exit(0)
+    state = _load()
+    if not state:
+        print(f"[INFO] No politeness state yet: {STATE_FILE}")
+    for name, entry in sorted(state.items()):
+        print(f"  {name:20s} delay={entry['delay']:>7.2f}s updated={entry['updated_at']}")
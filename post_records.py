@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+紧凑帖子记录 - 用 __slots__ 代替每条帖子一个 dict
+
+从采集到清洁，每条帖子原来都是一个 dict，每条都带一份自己的键表和哈希表，
+platform / keyword 的值也是每条一个字符串对象（json.loads 不会复用值）。
+百万条帖子时这些开销比正文本身还大。这里的记录：
+    - 常用字段存在 __slots__ 里（没有 __dict__，没有哈希表）
+    - platform / keyword 用 sys.intern 共享，同一个关键词全体帖子只有一个字符串对象
+    - 其余字段放在 extra（没有时为 None，不分配 dict）
+记录实现 Mapping 接口（get / [] / in / keys / items / ==），
+读取帖子的代码不用改；写盘时用 to_dict() 或 json.dumps(..., default=json_default)。
+
+    RawPost     原始帖子（爬虫写出 / 从分片读回）
+    CleanPost   清洁后的标准记录（cleaning_engine 的 standard / xhs 输出）
+
+使用方法：
+    from post_records import RawPost, CleanPost, json_default
+
+    post = RawPost(platform='weibo', keyword='跨境电商', text='...', likes=3)
+    post['text'], post.get('likes'), post.to_dict()
+    post = RawPost.from_dict(json.loads(line))
+
+    python benchmark_post_records.py   # dict 和紧凑记录每百万条的内存
+"""
+
+import sys
+from collections.abc import Mapping
+
+_intern = sys.intern
+
+
+class CompactRecord(Mapping):
+    """字段固定的紧凑记录；值为 None 的字段视为不存在"""
+
+    __slots__ = ()
+    FIELDS = ()
+    INTERNED = ()       # 用 sys.intern 共享的字段
+    HAS_EXTRA = False   # 是否有 extra（FIELDS 之外的字段）
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            object.__setattr__(self, name, None)
+        if self.HAS_EXTRA:
+            self.extra = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        for name in cls.FIELDS:
+            value = data.get(name)
+            if value is not None and name in cls.INTERNED and type(value) is str:
+                value = _intern(value)
+            object.__setattr__(record, name, value)
+        if cls.HAS_EXTRA:
+            # FIELDS 中显式为 None 的值也放进 extra，to_dict() 可以原样还原
+            extra = {_intern(k): v for k, v in data.items() if k not in cls._FIELD_SET or v is None}
+            record.extra = extra or None
+        return record
+
+    def to_dict(self):
+        data = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        if self.HAS_EXTRA and self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        if self.HAS_EXTRA and self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        # Mapping.get 走异常路径，清洁时每条记录要取好几个字段，这里直接查
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        if self.HAS_EXTRA and self.extra:
+            return self.extra.get(key, default)
+        return default
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            if value is not None and key in self.INTERNED and type(value) is str:
+                value = _intern(value)
+            object.__setattr__(self, key, value)
+        elif self.HAS_EXTRA:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+        else:
+            raise KeyError(f"{type(self).__name__} 没有字段 {key}")
+
+    def __iter__(self):
+        for name in self.FIELDS:
+            if getattr(self, name) is not None:
+                yield name
+        if self.HAS_EXTRA and self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __reduce__(self):
+        # 进程池传递结果时只序列化字段值
+        return _rebuild, (type(self), tuple(getattr(self, name) for name in self._SLOTS))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+        cls._SLOTS = cls.FIELDS + (("extra",) if cls.HAS_EXTRA else ())
+
+
+def _rebuild(cls, values):
+    record = cls.__new__(cls)
+    for name, value in zip(cls._SLOTS, values):
+        object.__setattr__(record, name, value)
+    return record
+
+
+class RawPost(CompactRecord):
+    """原始帖子"""
+
+    FIELDS = ("platform", "keyword", "text", "content", "collected_at", "source_url")
+    INTERNED = frozenset({"platform", "keyword"})
+    HAS_EXTRA = True
+    __slots__ = FIELDS + ("extra",)
+
+
+class CleanPost(CompactRecord):
+    """清洁后的标准记录"""
+
+    FIELDS = ("platform", "content", "keywords", "source_url", "crawl_time")
+    INTERNED = frozenset({"platform", "keywords"})
+    __slots__ = FIELDS
+
+
+def compact(item):
+    """dict 转为 RawPost，其他记录原样返回"""
+    return RawPost.from_dict(item) if type(item) is dict else item
+
+
+def json_default(obj):
+    """json.dump(..., default=json_default)：紧凑记录按 dict 写出"""
+    if isinstance(obj, CompactRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+优先级调度器 - 先分析最可能高风险的舆论
+
+政策热点期间新增舆论可能有几千条，按文件顺序分析时，P3 风险分析和
+P6 政策建议需要的高风险舆论可能排在大量无关评论之后。
+
+这里用几个廉价信号给待分析舆论打分，按分数从高到低派发给LLM：
+- config.KEYWORDS 命中（模式词 > 税收词 > 情感词）
+- 文本长度（有实质内容的舆论更可能有风险信号）
+- 平台（知乎讨论深度更好）
+- 本地预分类器的风险概率（默认是风险词典，可替换为本地模型）
+
+RiskCoverageTracker 记录第一条严重/高风险舆论被标注的耗时，
+以及部分运行时已覆盖的高风险比例。
+
+使用方法：
+    from priority_scheduler import PriorityWorkQueue
+    queue = PriorityWorkQueue(opinions)
+    for idx, opinion, score in queue.drain():
+        ...
+"""
+
+import heapq
+import itertools
+import math
+import time
+
+import config
+
+# ============================================================================
+# 打分参数
+# ============================================================================
+
+# 关键词类别权重
+KEYWORD_WEIGHTS = {
+    "modes": 3.0,
+    "tax": 2.0,
+    "sentiment": 1.0,
+}
+
+# 平台权重
+PLATFORM_WEIGHTS = {
+    "zhihu": 1.0,
+    "weibo": 0.6,
+    "xiaohongshu": 0.4,
+}
+
+# 风险词典（预分类器的默认实现）
+RISK_TERMS = [
+    "补税", "稽查", "查了", "被查", "罚款", "处罚", "滞纳金", "偷税", "漏税",
+    "追缴", "风险", "违规", "封号", "冻结", "倒闭", "亏损", "交不起", "跑路",
+    "暴雷", "严查", "立案", "举报", "税负", "困难", "焦虑", "怎么办",
+]
+
+# 各信号的组合权重
+SCORE_WEIGHTS = {
+    "keywords": 1.0,
+    "length": 1.5,
+    "platform": 1.0,
+    "risk": 4.0,
+}
+
+# 长度分数在该长度处饱和
+LENGTH_SATURATION = 200
+
+HIGH_RISK_LEVELS = ("critical", "high")
+
+
+def lexicon_risk(text):
+    """风险词典预分类器：返回0-1之间的风险概率"""
+    hits = sum(1 for term in RISK_TERMS if term in text)
+    return 1 - math.exp(-0.7 * hits)
+
+
+# 本地预分类器：text -> 风险概率(0-1)，可以被替换为训练好的本地模型
+risk_classifier = lexicon_risk
+
+
+def set_risk_classifier(fn):
+    """替换本地风险预分类器"""
+    global risk_classifier
+    risk_classifier = fn
+
+
+def _opinion_text(opinion):
+    if isinstance(opinion, dict):
+        return opinion.get("content") or opinion.get("text") or ""
+    return str(opinion)
+
+
+def _opinion_platform(opinion):
+    if isinstance(opinion, dict):
+        return opinion.get("platform", "")
+    return ""
+
+
+def score_opinion(text, platform="", risk_prob=None):
+    """计算单条舆论的优先级分数（越高越先分析）"""
+    keyword_score = 0.0
+    for category, words in config.KEYWORDS.items():
+        weight = KEYWORD_WEIGHTS.get(category, 1.0)
+        keyword_score += weight * sum(1 for w in words if w in text)
+    keyword_score = math.log1p(keyword_score)
+
+    length_score = min(len(text), LENGTH_SATURATION) / LENGTH_SATURATION
+    platform_score = PLATFORM_WEIGHTS.get(platform, 0.5)
+
+    if risk_prob is None:
+        risk_prob = risk_classifier(text)
+
+    return (SCORE_WEIGHTS["keywords"] * keyword_score
+            + SCORE_WEIGHTS["length"] * length_score
+            + SCORE_WEIGHTS["platform"] * platform_score
+            + SCORE_WEIGHTS["risk"] * risk_prob)
+
+
+# ============================================================================
+# 工作队列
+# ============================================================================
+
+class PriorityWorkQueue:
+    """按优先级派发待分析舆论的工作队列
+
+    同分时保持原始顺序；运行中可以继续 push 新舆论。
+    """
+
+    def __init__(self, opinions=None):
+        self._heap = []
+        self._counter = itertools.count()
+        for idx, opinion in enumerate(opinions or []):
+            self.push(opinion, idx)
+
+    def push(self, opinion, index=None):
+        """加入一条舆论，index为它在原始列表中的位置"""
+        seq = next(self._counter)
+        if index is None:
+            index = seq
+        score = score_opinion(_opinion_text(opinion), _opinion_platform(opinion))
+        heapq.heappush(self._heap, (-score, seq, index, opinion))
+
+    def pop(self):
+        """取出分数最高的舆论，返回 (原始位置, 舆论, 分数)"""
+        neg_score, _, index, opinion = heapq.heappop(self._heap)
+        return index, opinion, -neg_score
+
+    def drain(self):
+        """按优先级依次取出所有舆论"""
+        while self._heap:
+            yield self.pop()
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def prioritize(opinions):
+    """返回按优先级排序的 (原始位置, 舆论, 分数) 列表"""
+    return list(PriorityWorkQueue(opinions).drain())
+
+
+# ============================================================================
+# 风险覆盖统计
+# ============================================================================
+
+class RiskCoverageTracker:
+    """记录高风险舆论的标注进度"""
+
+    def __init__(self, expected_high_risk=None):
+        self.start_time = time.time()
+        self.expected_high_risk = expected_high_risk
+        self.first_critical_at = None
+        self.first_high_risk_at = None
+        self.high_risk_count = 0
+        self.labeled_count = 0
+
+    def record(self, result):
+        """记录一条分析结果"""
+        self.labeled_count += 1
+        risk = result.get("risk_level") if result else None
+        if risk not in HIGH_RISK_LEVELS:
+            return
+        elapsed = time.time() - self.start_time
+        self.high_risk_count += 1
+        if self.first_high_risk_at is None:
+            self.first_high_risk_at = elapsed
+        if risk == "critical" and self.first_critical_at is None:
+            self.first_critical_at = elapsed
+
+    def summary(self):
+        """返回统计摘要dict"""
+        coverage = None
+        if self.expected_high_risk:
+            coverage = self.high_risk_count / self.expected_high_risk
+        return {
+            "labeled": self.labeled_count,
+            "high_risk_found": self.high_risk_count,
+            "time_to_first_high_risk": self.first_high_risk_at,
+            "time_to_first_critical": self.first_critical_at,
+            "high_risk_coverage": coverage,
+        }
+
+
+if __name__ == "__main__":
+    # 离线评估：用已有标注结果对比“文件顺序”和“优先级顺序”的高风险覆盖曲线
+    import json
+    from pathlib import Path
+
+    with open(Path("data/analysis/analysis_results.json"), 'r', encoding='utf-8') as f:
+        records = json.load(f).get("data", [])
+
+    total_high = sum(1 for r in records if r.get("risk_level") in HIGH_RISK_LEVELS)
+    texts = [r.get("source_text", "") for r in records]
+    ordered = prioritize(texts)
+
+    def coverage_at(order, fraction):
+        n = int(len(order) * fraction)
+        hits = sum(1 for i in order[:n] if records[i].get("risk_level") in HIGH_RISK_LEVELS)
+        return hits / total_high if total_high else 0
+
+    file_order = list(range(len(records)))
+    priority_order = [idx for idx, _, _ in ordered]
+    first_critical = next((pos for pos, i in enumerate(priority_order)
+                           if records[i].get("risk_level") == "critical"), None)
+    first_critical_file = next((pos for pos, i in enumerate(file_order)
+                                if records[i].get("risk_level") == "critical"), None)
+
+    print(f"[INFO] Records: {len(records)}, high/critical: {total_high}")
+    print(f"{'labeled':>8} {'file order':>12} {'priority':>10}")
+    for frac in (0.1, 0.2, 0.3, 0.5):
+        print(f"{frac:>8.0%} {coverage_at(file_order, frac):>12.1%} {coverage_at(priority_order, frac):>10.1%}")
+    print(f"[INFO] Items before first critical: file={first_critical_file}, priority={first_critical}")
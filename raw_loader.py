@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+原始数据加载 - 多文件并发解析，大 JSON 数组流式解析，边解析边产出记录
+
+原来每个原始 JSON 文件都是串行 json.load：整个文件读进内存、整体解析完，
+下游才能拿到第一条记录；MediaCrawler 的 xhs/json 等目录文件多、单个文件大时，
+加载时间和峰值内存都由最大的文件决定。这里：
+    - 小文件（< STREAM_THRESHOLD）整体读入，有 orjson 时用 orjson 解析（比 json 快数倍）
+    - 大文件流式解析：按块读入，用 json 的 C 扫描器（raw_decode）逐个解析数组元素，
+      内存只有一个读缓冲和当前元素
+    - 三种格式与原来一致：列表、{"data": [...]}、单个对象（见 json_items）；
+      lists_only=True 时只取列表里的记录（clean_data_simple.py 原来的规则）
+    - JSONL 分片交给 raw_shards.iter_shard
+    - iter_raw_files 用线程池提前解析后面的文件（每个文件最多缓冲 prefetch 批），
+      按文件顺序产出记录，下游从第一批记录起就可以开始处理
+
+在进程池中清洁时（cleaning_engine.CleaningEngine.clean_files），
+每个子进程用 iter_raw_file 流式读取自己的文件，按批清洁。
+
+使用方法：
+    from raw_loader import iter_raw_file, iter_raw_files
+
+    for record in iter_raw_files(paths, workers=4, on_file=lambda path, count, error: ...):
+        ...
+
+    python benchmark_raw_loader.py   # 与串行 json.load 的耗时、首条记录延迟、峰值内存对比
+"""
+
+import json
+import logging
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from queue import Empty, Full, Queue
+
+from parallel_clean import chunked
+from raw_shards import iter_shard
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+logger = logging.getLogger(__name__)
+
+STREAM_THRESHOLD = 16 << 20   # 超过 16MB 的 JSON 文件流式解析
+CHUNK_SIZE = 1 << 20          # 流式解析每次读入的字符数
+BATCH_SIZE = 1000             # iter_raw_files 线程间传递的每批记录数
+
+_DECODER = json.JSONDecoder()
+_WS_RE = re.compile(r'[ \t\n\r]*')
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+# orjson 把超过 64 位的整数解析成浮点数，这样的文件交给 json
+_BIG_INT_RE = re.compile(rb'\d{20}')
+
+
+def json_items(data, lists_only=False):
+    """处理不同的JSON格式：列表、{"data": [...]}、单个对象
+
+    lists_only=True 时跳过 {"data": 非列表} 和没有 data 的单个对象。
+    """
+    if isinstance(data, list):
+        yield from data
+    elif isinstance(data, dict):
+        if "data" in data:
+            items = data["data"]
+            if isinstance(items, list):
+                yield from items
+            elif not lists_only:
+                yield items
+        elif not lists_only:
+            yield data
+
+
+# ============================================================================
+# 流式 JSON 解析
+# ============================================================================
+
+class _JsonStream:
+    """按块读入的文本缓冲，逐个解析 JSON 值"""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size=None):
+        """读入下一块（丢弃已解析的部分）；没有更多数据时返回 False"""
+        if self.eof:
+            return False
+        data = self.f.read(size or self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """跳过空白，返回下一个字符（结尾返回空字符串）"""
+        while True:
+            self.pos = _WS_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                return self.buf[self.pos:self.pos + 1]
+
+    def take(self, expected):
+        """读掉下一个字符，返回它是 expected 中的哪一个"""
+        char = self.peek()
+        if not char or char not in expected:
+            raise json.JSONDecodeError(f"Expecting one of {expected!r}", self.buf, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self):
+        """解析下一个完整的 JSON 值
+
+        值在缓冲末尾结束、或后面紧跟数字字符时可能还没读完（如 0.5 被切成 0. 和 5），
+        读入更多后重新解析；
+        解析失败且还有数据时同样读入更多（按当前缓冲大小加倍，超大元素不会反复重解析）。
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+                if self.eof or (end < len(self.buf) and self.buf[end] not in _NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(max(self.chunk_size, len(self.buf) - self.pos))
+
+    def array(self):
+        """已读掉 [，逐个产出数组元素"""
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.take(",]") == "]":
+                return
+
+
+def _iter_stream_records(stream, lists_only=False):
+    """与 json_items(json.load(f), lists_only) 产出相同的记录，但数组元素边解析边产出"""
+    first = stream.peek()
+    if first == "[":
+        stream.pos += 1
+        yield from stream.array()
+    elif first == "{":
+        # 对象：流式产出 data 数组；没有 data 时产出整个对象
+        stream.pos += 1
+        obj = {}
+        has_data = False
+        if stream.peek() == "}":
+            stream.pos += 1
+        else:
+            while True:
+                key = stream.value()
+                stream.take(":")
+                if key == "data" and stream.peek() == "[":
+                    stream.pos += 1
+                    has_data = True
+                    yield from stream.array()
+                else:
+                    value = stream.value()
+                    if key == "data":
+                        has_data = True
+                        if not lists_only:
+                            yield value
+                    else:
+                        obj[key] = value
+                if stream.take(",}") == "}":
+                    break
+        if not has_data and not lists_only:
+            yield obj
+    else:
+        stream.value()  # 标量：没有记录（非法内容在这里报错）
+    if stream.peek():
+        raise json.JSONDecodeError("Extra data", stream.buf, stream.pos)
+
+
+def iter_json_records(path, stream_threshold=STREAM_THRESHOLD, chunk_size=CHUNK_SIZE, lists_only=False):
+    """一个原始 JSON 文件中的记录（列表 / {"data": [...]} / 单个对象）"""
+    path = Path(path)
+    if path.stat().st_size < stream_threshold:
+        raw = path.read_bytes()
+        if HAS_ORJSON and not _BIG_INT_RE.search(raw):
+            try:
+                yield from json_items(orjson.loads(raw), lists_only)
+                return
+            except orjson.JSONDecodeError:
+                pass  # orjson 更严格（NaN 等），交给 json 按原来的规则解析或报错
+        yield from json_items(json.loads(raw.decode('utf-8')), lists_only)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from _iter_stream_records(_JsonStream(f, chunk_size), lists_only)
+
+
+def iter_raw_file(path, lists_only=False):
+    """原始 JSON 文件或 JSONL 分片中的记录（截断的分片末尾会被跳过）"""
+    path = Path(path)
+    if path.suffix == ".json":
+        return iter_json_records(path, lists_only=lists_only)
+    return iter_shard(path)
+
+
+# ============================================================================
+# 多文件并发加载
+# ============================================================================
+
+class _Stopped(Exception):
+    """消费方提前结束，解析线程退出"""
+
+
+def _put(queue, item, stop):
+    while True:
+        if stop.is_set():
+            raise _Stopped()
+        try:
+            queue.put(item, timeout=0.1)
+            return
+        except Full:
+            pass
+
+
+def _produce(path, queue, stop, batch_size, lists_only):
+    """解析一个文件，按批放进 queue，最后放入 (条数, 错误)"""
+    count = 0
+    try:
+        for batch in chunked(iter_raw_file(path, lists_only), batch_size):
+            count += len(batch)
+            _put(queue, batch, stop)
+        _put(queue, (count, None), stop)
+    except _Stopped:
+        pass
+    except Exception as e:
+        try:
+            _put(queue, (count, e), stop)
+        except _Stopped:
+            pass
+
+
+def iter_raw_files(paths, workers=4, on_file=None, batch_size=BATCH_SIZE, prefetch=8, lists_only=False):
+    """按文件顺序产出多个原始文件中的记录，后面的文件在线程池中提前解析
+
+    同时在解析的文件最多 workers 个，每个文件最多缓冲 prefetch 批，内存与文件大小无关。
+    每个文件读完后调用 on_file(路径, 条数, 错误)；没有 on_file 时出错的文件记录警告后跳过
+    （大文件流式解析到一半出错时，之前产出的记录保留）。
+    """
+    paths = iter(paths)
+    stop = threading.Event()
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        def submit():
+            path = next(paths, None)
+            if path is not None:
+                queue = Queue(maxsize=prefetch)
+                pool.submit(_produce, path, queue, stop, batch_size, lists_only)
+                pending.append((path, queue))
+
+        try:
+            for _ in range(max(1, workers)):
+                submit()
+            while pending:
+                path, queue = pending.popleft()
+                while True:
+                    item = queue.get()
+                    if type(item) is list:
+                        yield from item
+                        continue
+                    count, error = item
+                    break
+                submit()
+                if on_file is not None:
+                    on_file(path, count, None if error is None else str(error))
+                elif error is not None:
+                    logger.warning(f"  ✗ 加载失败 {Path(path).name}: {error}")
+        finally:
+            # 提前结束（或出错）时让解析线程退出，并清空队列解除阻塞
+            stop.set()
+            for _, queue in pending:
+                try:
+                    while True:
+                        queue.get_nowait()
+                except Empty:
+                    pass
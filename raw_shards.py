@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+原始数据分片 - 流式写入/读取 JSONL
+
+爬虫原来把所有帖子放在内存里，运行结束时写一个完整的 JSON 文件：
+中途崩溃整次运行的数据都丢失，内存随目标采集量增长。
+现在每条通过验证的帖子立即写入 data/raw/<平台>/ 下的 JSONL 分片，每页 flush 一次：
+    weibo_20250601_120000_0001.jsonl.gz
+    weibo_20250601_120000_0002.jsonl.gz   （达到 max_records 后轮换）
+
+gzip 分片用 Z_SYNC_FLUSH 刷新，崩溃时已 flush 的部分仍可读取；
+读取时容忍被截断的最后一行。
+
+使用方法：
+    from raw_shards import ShardWriter, iter_shards
+    with ShardWriter("weibo") as writer:
+        writer.write_many(posts)
+        writer.flush()               # 每页一次
+
+    for record in iter_shards(config.WEIBO_RAW_DIR):
+        ...
+"""
+
+import gzip
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+
+import config
+from post_records import RawPost, json_default
+
+logger = logging.getLogger(__name__)
+
+SHARD_PATTERNS = ("*.jsonl", "*.jsonl.gz")
+
+
+class ShardWriter:
+    """按记录数轮换的 JSONL 分片写入器"""
+
+    def __init__(self, platform, out_dir=None, max_records=None, compress=None, run_id=None):
+        self.platform = platform
+        self.out_dir = Path(out_dir or config.RAW_DATA_DIR / platform)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.max_records = max_records or config.SHARD_CONFIG["max_records"]
+        self.compress = config.SHARD_CONFIG["compress"] if compress is None else compress
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.paths = []
+        self.count = 0
+        self._file = None
+        self._in_shard = 0
+
+    def _open_next(self):
+        self.close_shard()
+        suffix = ".jsonl.gz" if self.compress else ".jsonl"
+        path = self.out_dir / f"{self.platform}_{self.run_id}_{len(self.paths) + 1:04d}{suffix}"
+        if self.compress:
+            self._file = gzip.open(path, 'wt', encoding='utf-8')
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+        self.paths.append(path)
+        self._in_shard = 0
+
+    def write(self, record):
+        if self._file is None or self._in_shard >= self.max_records:
+            self._open_next()
+        self._file.write(json.dumps(record, ensure_ascii=False, default=json_default) + "\n")
+        self._in_shard += 1
+        self.count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """把已写入的记录落盘（每页调用一次）"""
+        if self._file is None:
+            return
+        # 文本层 flush 会继续调用 GzipFile.flush()，后者以 Z_SYNC_FLUSH 把压缩流刷到字节边界
+        self._file.flush()
+
+    def close_shard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        self.close_shard()
+        return self.paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_shard(path, compact=False):
+    """逐行读取一个分片；被截断的末尾（崩溃时未写完）会被跳过
+
+    compact 为 True 时产出 post_records.RawPost 而不是 dict。
+    """
+    path = Path(path)
+    opener = gzip.open if path.suffix == ".gz" else open
+    try:
+        with opener(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    yield RawPost.from_dict(record) if compact and type(record) is dict else record
+                except json.JSONDecodeError:
+                    logger.warning(f"  ! 跳过损坏的行：{path.name}")
+    except (EOFError, gzip.BadGzipFile) as e:
+        logger.warning(f"  ! 分片未正常结束（可能是采集中断）：{path.name} ({e})")
+
+
+def shard_files(directory):
+    """目录下的所有分片（按文件名排序）"""
+    directory = Path(directory)
+    files = []
+    for pattern in SHARD_PATTERNS:
+        files.extend(directory.glob(pattern))
+    return sorted(files)
+
+
+def iter_shards(directory, compact=False):
+    """流式读取目录下所有分片中的记录"""
+    for path in shard_files(directory):
+        yield from iter_shard(path, compact)
+
+
+class ShardedPosts:
+    """列表接口的分片存储：append/extend 直接写盘，迭代时从分片流式读回（RawPost）
+
+    爬虫里原来的 self.all_posts / self.posts 换成它，计数和统计代码不用改，
+    内存不再随采集量增长。
+    """
+
+    def __init__(self, platform, out_dir=None, **kwargs):
+        self.writer = ShardWriter(platform, out_dir, **kwargs)
+
+    def append(self, post):
+        self.writer.write(post)
+
+    def extend(self, posts):
+        self.writer.write_many(posts)
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        """关闭当前分片，返回本次运行写出的所有分片路径"""
+        return self.writer.close()
+
+    @property
+    def paths(self):
+        return list(self.writer.paths)
+
+    def __len__(self):
+        return self.writer.count
+
+    def __bool__(self):
+        return self.writer.count > 0
+
+    def __iter__(self):
+        self.writer.flush()
+        for path in self.writer.paths:
+            yield from iter_shard(path, compact=True)
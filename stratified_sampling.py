@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+分层抽样 - 预算有限时的标注模式
+
+语料太大无法全部送LLM时，不再简单地“标到第N条为止”，而是：
+1. 按 平台 × 关键词类别 × 采集日期 分层
+2. 在 config.SAMPLING_CONFIG["budget"] 内按层规模比例分配样本（每层至少 min_per_stratum 条）
+3. 每条样本记录所属层及层规模（stratum / stratum_population），
+   仪表盘据此把分布外推到整个语料并给出置信区间
+
+使用方法：
+    python stratified_sampling.py          # 查看当前语料的分层和样本分配
+    SAMPLING_CONFIG["enabled"] = True      # auto_analyze.py 进入抽样标注模式
+"""
+
+import random
+from collections import defaultdict
+from datetime import datetime
+
+import config
+
+SAMPLING = config.SAMPLING_CONFIG
+
+UNKNOWN = "unknown"
+
+
+def _opinion_text(opinion):
+    if isinstance(opinion, dict):
+        return opinion.get("content") or opinion.get("text") or ""
+    return str(opinion)
+
+
+def keyword_group(opinion):
+    """按 config.KEYWORDS 的类别顺序返回第一个命中的类别"""
+    text = _opinion_text(opinion)
+    if isinstance(opinion, dict):
+        keywords = opinion.get("keywords") or opinion.get("keyword") or ""
+        if isinstance(keywords, list):
+            keywords = ",".join(keywords)
+        text = f"{text} {keywords}"
+    for category, words in config.KEYWORDS.items():
+        if any(w in text for w in words):
+            return category
+    return "other"
+
+
+def date_bucket(opinion, granularity=None):
+    """采集日期分桶"""
+    granularity = granularity or SAMPLING["date_granularity"]
+    if not isinstance(opinion, dict):
+        return UNKNOWN
+    raw = opinion.get("crawl_time") or opinion.get("collected_at") or opinion.get("publish_time") or ""
+    try:
+        dt = datetime.fromisoformat(str(raw)[:19])
+    except ValueError:
+        return UNKNOWN
+    if granularity == "day":
+        return dt.strftime("%Y-%m-%d")
+    if granularity == "month":
+        return dt.strftime("%Y-%m")
+    year, week, _ = dt.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def assign_stratum(opinion):
+    """层标识：平台/关键词类别/日期桶"""
+    platform = opinion.get("platform", UNKNOWN) if isinstance(opinion, dict) else UNKNOWN
+    return f"{platform or UNKNOWN}/{keyword_group(opinion)}/{date_bucket(opinion)}"
+
+
+def allocate(stratum_sizes, budget, min_per_stratum=None):
+    """按层规模比例分配样本量（最大余数法），每层不超过层规模
+
+    stratum_sizes: dict 层 -> 层规模
+    返回 dict 层 -> 样本量
+    """
+    min_per_stratum = SAMPLING["min_per_stratum"] if min_per_stratum is None else min_per_stratum
+    total = sum(stratum_sizes.values())
+    if budget >= total:
+        return dict(stratum_sizes)
+
+    alloc = {h: min(min_per_stratum, n) for h, n in stratum_sizes.items()}
+    remaining = budget - sum(alloc.values())
+    if remaining <= 0:
+        # 预算连每层最小样本都不够：优先保证大层
+        alloc = {h: 0 for h in stratum_sizes}
+        for h in sorted(stratum_sizes, key=lambda h: -stratum_sizes[h]):
+            take = min(min_per_stratum, stratum_sizes[h], budget - sum(alloc.values()))
+            if take <= 0:
+                break
+            alloc[h] = take
+        return alloc
+
+    # 剩余预算在未满的层间按规模比例分配；有层被封顶时重新分配
+    while remaining > 0:
+        open_strata = {h: n for h, n in stratum_sizes.items() if alloc[h] < n}
+        if not open_strata:
+            break
+        open_total = sum(open_strata.values())
+        quotas = {h: remaining * n / open_total for h, n in open_strata.items()}
+        given = 0
+        for h, q in quotas.items():
+            add = min(int(q), stratum_sizes[h] - alloc[h])
+            alloc[h] += add
+            given += add
+        left = remaining - given
+        # 最大余数
+        for h in sorted(quotas, key=lambda h: -(quotas[h] - int(quotas[h]))):
+            if left <= 0:
+                break
+            if alloc[h] < stratum_sizes[h]:
+                alloc[h] += 1
+                left -= 1
+        if given == 0 and left == remaining:
+            break
+        remaining = left
+    return alloc
+
+
+def draw_stratified_sample(opinions, budget=None, seed=None):
+    """从语料中抽取分层样本
+
+    返回样本列表，每条为原舆论dict的副本，附带：
+        stratum             所属层
+        stratum_population  层规模（语料中该层的条数）
+    """
+    budget = SAMPLING["budget"] if budget is None else budget
+    seed = SAMPLING["random_state"] if seed is None else seed
+
+    strata = defaultdict(list)
+    for op in opinions:
+        item = dict(op) if isinstance(op, dict) else {"content": op}
+        strata[assign_stratum(item)].append(item)
+
+    sizes = {h: len(items) for h, items in strata.items()}
+    alloc = allocate(sizes, budget)
+
+    rng = random.Random(seed)
+    sample = []
+    for h in sorted(strata):
+        for item in rng.sample(strata[h], alloc.get(h, 0)):
+            item["stratum"] = h
+            item["stratum_population"] = sizes[h]
+            sample.append(item)
+    return sample
+
+
+def sampling_metadata(sample, population_size):
+    """写入 analysis_results.json 顶层的抽样说明"""
+    return {
+        "mode": "stratified",
+        "budget": SAMPLING["budget"],
+        "population": population_size,
+        "sample_size": len(sample),
+        "strata": len({s["stratum"] for s in sample}),
+        "confidence": SAMPLING["confidence"],
+        "created_at": datetime.now().isoformat(),
+    }
+
+
+if __name__ == "__main__":
+    import json
+
+    with open(config.OUTPUT_CONFIG["clean_json_file"], 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    opinions = data if isinstance(data, list) else data.get("data", [])
+
+    sample = draw_stratified_sample(opinions)
+    counts = defaultdict(int)
+    for s in sample:
+        counts[s["stratum"]] += 1
+
+    print(f"[INFO] Population: {len(opinions)}, budget: {SAMPLING['budget']}, sample: {len(sample)}")
+    print(f"{'stratum':40s} {'N_h':>7} {'n_h':>5}")
+    for s in sorted({s['stratum']: s['stratum_population'] for s in sample}.items(), key=lambda x: -x[1]):
+        print(f"{s[0]:40s} {s[1]:>7} {counts[s[0]]:>5}")
@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+"""
+流式导出 - 逐条写出清洁数据（TXT / JSON / JSONL / CSV / XLSX）
+
+原来的导出先把全部记录放进列表，再整体 json.dump / 交给 pandas DataFrame 写 Excel，
+内存随记录数线性增长，每种格式还要把列表再遍历一遍。
+这里的写入器逐条写出，内存与记录数无关；ExportSet 把同一条记录同时写给多个写入器，
+记录来源（如 CleaningEngine.clean_files）只需要遍历一次：
+
+    TxtWriter     每行一条（取 content 字段，字符串记录原样写出）
+    JsonWriter    {"data": [...], "total": N}，格式与 json.dump(indent=2) 逐字节相同；
+                  计数等放在 data 之后（trailer），所以可以单遍写出
+    JsonlWriter   每行一条 JSON
+    CsvWriter     csv.DictWriter，表头为 fieldnames，多余字段忽略
+    XlsxWriter    直接写 SpreadsheetML（zip 流 + 内联字符串，不需要 pandas/openpyxl），
+                  超过 Excel 行数上限时自动换到下一个工作表
+
+全新写出时先写到 <文件>.tmp，完成后原子替换；出错（with 块内异常）时删除临时文件，
+原有输出保持不变。TxtWriter / JsonWriter 支持 append=True 在已有文件末尾追加，
+出错时把文件恢复到追加前的状态。
+
+使用方法：
+    from streaming_exporters import ExportSet, JsonWriter, TxtWriter, XlsxWriter
+
+    with ExportSet([TxtWriter(txt_path), JsonWriter(json_path), XlsxWriter(xlsx_path, FIELDS)]) as out:
+        for record in records:         # 任意可迭代对象（dict、CleanPost 或字符串）
+            out.write(record)
+    out.count
+
+    python benchmark_exporters.py      # 和原来整体导出的耗时、峰值内存对比
+"""
+
+import csv
+import json
+import math
+import os
+import re
+import zipfile
+from collections.abc import Mapping
+from json.encoder import encode_basestring
+from pathlib import Path
+
+from post_records import json_default
+
+# JsonWriter 的文件结尾：  ...最后一条\n  ],\n  "total": N\n}
+JSON_TAIL_RE = re.compile(rb'(\S)\s*\]\s*,\s*"total":\s*(\d+)\s*\}\s*$')
+
+XLSX_MAX_ROWS = 1048576       # Excel 单个工作表的行数上限（含表头）
+XLSX_MAX_CELL = 32767         # 单元格最多字符数
+# XML 1.0 不允许的字符（控制字符、代理项、U+FFFE/U+FFFF）
+XML_ILLEGAL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+
+def total_trailer(count):
+    return {"total": count}
+
+
+class StreamWriter:
+    """写入器基类：write / write_many / close / abort，可作为上下文管理器"""
+
+    def __init__(self, path, append=False):
+        self.path = Path(path)
+        self.append = append and self.path.exists()
+        self.tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, record):
+        raise NotImplementedError
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def _finish(self):
+        """写完文件结尾并关闭文件"""
+        raise NotImplementedError
+
+    def _discard(self):
+        """关闭文件并撤销本次写入"""
+        raise NotImplementedError
+
+    def close(self):
+        self._finish()
+        if not self.append:
+            os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self._discard()
+        if not self.append and self.tmp_path.exists():
+            self.tmp_path.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class _TextFileWriter(StreamWriter):
+    """文本文件写入器：全新写出到临时文件，追加时记下原长度以便恢复"""
+
+    def __init__(self, path, append=False, newline=None):
+        super().__init__(path, append)
+        if self.append:
+            self._restore_size = self.path.stat().st_size
+            self._file = open(self.path, 'a', encoding='utf-8', newline=newline)
+        else:
+            self._file = open(self.tmp_path, 'w', encoding='utf-8', newline=newline)
+
+    def _finish(self):
+        self._file.close()
+
+    def _discard(self):
+        self._file.close()
+        if self.append:
+            os.truncate(self.path, self._restore_size)
+
+
+class TxtWriter(_TextFileWriter):
+    """每行一条：记录为字符串时原样写出，否则取 field 字段"""
+
+    def __init__(self, path, field="content", append=False):
+        super().__init__(path, append)
+        self.field = field
+
+    def write(self, record):
+        text = record if isinstance(record, str) else record.get(self.field, "")
+        self._file.write(text + "\n")
+        self.count += 1
+
+
+class JsonlWriter(_TextFileWriter):
+    """每行一条 JSON"""
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, default=json_default) + "\n")
+        self.count += 1
+
+
+class CsvWriter(_TextFileWriter):
+    """CSV：表头为 fieldnames，记录为 dict / Mapping，缺少的字段留空"""
+
+    def __init__(self, path, fieldnames, append=False):
+        super().__init__(path, append, newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction='ignore')
+        if not self.append:
+            self._writer.writeheader()
+
+    def write(self, record):
+        self._writer.writerow(record)
+        self.count += 1
+
+
+def dump_item(item):
+    """json.dumps(item, ensure_ascii=False, indent=2)
+
+    带 indent 时 json 模块不用 C 编码器；值都是字符串 / 整数的扁平记录（清洁数据都是）
+    在这里直接拼出同样的文本，其他记录交给 json.dumps。
+    """
+    if isinstance(item, str):
+        return encode_basestring(item)
+    if isinstance(item, Mapping) and item:
+        lines = []
+        for key, value in item.items():
+            if isinstance(value, str):
+                value = encode_basestring(value)
+            elif type(value) is int:
+                value = int.__repr__(value)
+            else:
+                return json.dumps(item, ensure_ascii=False, indent=2, default=json_default)
+            lines.append(f"  {encode_basestring(key)}: {value}")
+        return "{\n" + ",\n".join(lines) + "\n}"
+    return json.dumps(item, ensure_ascii=False, indent=2, default=json_default)
+
+
+class JsonWriter(StreamWriter):
+    """{"<key>": [记录...], <trailer(count)>}，与 json.dump(..., ensure_ascii=False, indent=2) 逐字节相同
+
+    trailer(count) 返回写在数组之后的字段（默认 {"total": N}）。
+    append=True 时只支持默认结尾：定位文件末尾的 ] 和 total，新记录接在最后一条之后，
+    已有记录不重写；无法识别的旧格式会整体读入后重写一次（之后即可原地追加）。
+    """
+
+    def __init__(self, path, key="data", trailer=total_trailer, append=False):
+        super().__init__(path, append)
+        self.key = key
+        self.trailer = trailer
+        self._file = None
+        self._base = 0          # 已有的记录数
+        if self.append:
+            self._open_append()
+        else:
+            self._open_new()
+
+    def _write(self, text):
+        self._file.write(text.encode('utf-8'))
+
+    def _open_new(self):
+        self._file = open(self.tmp_path, 'wb')
+        self._write("{\n  " + encode_basestring(self.key) + ": [")
+
+    def _open_append(self):
+        with open(self.path, 'rb') as f:
+            size = f.seek(0, 2)
+            tail_start = f.seek(max(0, size - 256))
+            tail = f.read()
+        match = JSON_TAIL_RE.search(tail)
+        if match is None:
+            # 旧格式（total 在前）：读入已有记录，改为全新写出
+            with open(self.path, 'r', encoding='utf-8') as f:
+                existing = json.load(f).get(self.key, [])
+            self.append = False
+            self._open_new()
+            self.write_many(existing)
+            self._base, self.count = self.count, 0
+            return
+        # 新记录从最后一条（或 [）之后开始写，覆盖原来的结尾；第一条写入时才打开文件
+        self._base = int(match.group(2))
+        self._tail_offset = tail_start + match.start() + 1
+        self._restore_tail = tail[match.start() + 1:]
+
+    def write(self, record):
+        if self._file is None:
+            self._file = open(self.path, 'r+b')
+            self._file.seek(self._tail_offset)
+        separator = ",\n    " if self._base or self.count else "\n    "
+        self._write(separator + dump_item(record).replace("\n", "\n    "))
+        self.count += 1
+
+    def _finish(self):
+        if self._file is None:
+            return  # 追加模式下没有新记录：文件不变
+        total = self._base + self.count
+        self._write("\n  ]" if total else "]")
+        for key, value in self.trailer(total).items():
+            value = json.dumps(value, ensure_ascii=False, indent=2, default=json_default)
+            self._write(",\n  " + encode_basestring(key) + ": " + value.replace("\n", "\n  "))
+        self._write("\n}")
+        if self.append:
+            self._file.truncate()
+        self._file.close()
+
+    def _discard(self):
+        if self._file is None:
+            return
+        if self.append:
+            self._file.seek(self._tail_offset)
+            self._file.write(self._restore_tail)
+            self._file.truncate()
+        self._file.close()
+
+
+def _column_name(index):
+    """0 → A，25 → Z，26 → AA"""
+    name = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        name = chr(65 + rem) + name
+    return name
+
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}</Types>'
+)
+_XLSX_SHEET_TYPE = ('<Override PartName="/xl/worksheets/sheet{n}.xml" '
+                    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>')
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId0" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>{sheets}</Relationships>'
+)
+_XLSX_SHEET_REL = ('<Relationship Id="rId{n}" '
+                   'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                   'Target="worksheets/sheet{n}.xml"/>')
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+_XLSX_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_XLSX_SHEET_END = '</sheetData></worksheet>'
+
+
+def _xml_text(value):
+    value = XML_ILLEGAL_RE.sub('', value[:XLSX_MAX_CELL])
+    return value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+class XlsxWriter(StreamWriter):
+    """常数内存的 XLSX 写入器
+
+    每行直接编码成 <row> 写进 zip 中的工作表条目（字符串用内联字符串，不建共享字符串表），
+    内存只有一个写缓冲。表头为 fieldnames；数字写为数值，其他值写为文本（列表/字典写成 JSON）。
+    """
+
+    BUFFER_ROWS = 1000
+
+    def __init__(self, path, fieldnames, sheet_name="data", max_rows=XLSX_MAX_ROWS):
+        super().__init__(path)
+        self.fieldnames = list(fieldnames)
+        self.sheet_name = sheet_name
+        self.max_rows = max_rows
+        self._columns = [_column_name(i) for i in range(len(self.fieldnames))]
+        # 压缩级别 1：文件只比默认级别大约 10%，写出快将近一倍（压缩是主要耗时）
+        self._zip = zipfile.ZipFile(self.tmp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+        self._sheets = 0
+        self._sheet = None
+        self._buffer = []
+        self._row = 0
+        self._open_sheet()
+
+    def _open_sheet(self):
+        self._close_sheet()
+        self._sheets += 1
+        self._sheet = self._zip.open(f"xl/worksheets/sheet{self._sheets}.xml", 'w', force_zip64=True)
+        self._sheet.write(_XLSX_SHEET_HEAD.encode('utf-8'))
+        self._row = 0
+        self._add_row(self.fieldnames)
+
+    def _flush(self):
+        if self._buffer:
+            self._sheet.write("".join(self._buffer).encode('utf-8'))
+            self._buffer.clear()
+
+    def _close_sheet(self):
+        if self._sheet is None:
+            return
+        self._flush()
+        self._sheet.write(_XLSX_SHEET_END.encode('utf-8'))
+        self._sheet.close()
+        self._sheet = None
+
+    def _add_row(self, values):
+        self._row += 1
+        row = self._row
+        cells = []
+        for column, value in zip(self._columns, values):
+            if value is None or value == "":
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+                cells.append(f'<c r="{column}{row}"><v>{value!r}</v></c>')
+                continue
+            if not isinstance(value, str):
+                value = json.dumps(value, ensure_ascii=False, default=json_default)
+            cells.append(f'<c r="{column}{row}" t="inlineStr"><is><t xml:space="preserve">'
+                         f'{_xml_text(value)}</t></is></c>')
+        self._buffer.append(f'<row r="{row}">{"".join(cells)}</row>')
+        if len(self._buffer) >= self.BUFFER_ROWS:
+            self._flush()
+
+    def write(self, record):
+        if self._row >= self.max_rows:
+            self._open_sheet()
+        if isinstance(record, str):
+            record = {self.fieldnames[0]: record}
+        self._add_row([record.get(name) for name in self.fieldnames])
+        self.count += 1
+
+    def _sheet_name(self, n):
+        return self.sheet_name if n == 1 else f"{self.sheet_name}_{n}"
+
+    def _finish(self):
+        self._close_sheet()
+        numbers = range(1, self._sheets + 1)
+        sheets = "".join(f'<sheet name="{_xml_text(self._sheet_name(n))}" sheetId="{n}" r:id="rId{n}"/>'
+                         for n in numbers)
+        self._zip.writestr("[Content_Types].xml",
+                           _XLSX_CONTENT_TYPES.format(sheets="".join(_XLSX_SHEET_TYPE.format(n=n) for n in numbers)))
+        self._zip.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        self._zip.writestr("xl/workbook.xml", _XLSX_WORKBOOK.format(sheets=sheets))
+        self._zip.writestr("xl/_rels/workbook.xml.rels",
+                           _XLSX_WORKBOOK_RELS.format(sheets="".join(_XLSX_SHEET_REL.format(n=n) for n in numbers)))
+        self._zip.writestr("xl/styles.xml", _XLSX_STYLES)
+        self._zip.close()
+
+    def _discard(self):
+        if self._sheet is not None:
+            self._sheet.close()
+        self._zip.close()
+
+
+class ExportSet:
+    """把每条记录写给多个写入器；with 块内出错时全部撤销"""
+
+    def __init__(self, writers):
+        self.writers = list(writers)
+
+    @property
+    def count(self):
+        return self.writers[0].count if self.writers else 0
+
+    def write(self, record):
+        for writer in self.writers:
+            writer.write(record)
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+    def abort(self):
+        for writer in self.writers:
+            writer.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -12,12 +12,18 @@ from utils.data_loader import (
     translate_topic,
     translate_actor,
     get_all_distributions,
-    get_top_n_by_count
+    get_top_n_by_count,
+    is_sampled_data,
+    get_stratified_sample,
+    get_population_size,
+    get_extrapolated_distribution,
+    get_extrapolated_share
 )
 from utils.chart_builder import (
     create_distribution_pie,
     create_vertical_bar,
-    create_horizontal_bar
+    create_horizontal_bar,
+    create_estimate_bar
 )
 from utils.components import display_stats_grid
 
@@ -30,27 +36,49 @@ def load_data():
 
 df = load_data()
 
+# 分层抽样标注的数据：所有统计外推到整个语料并给出95%置信区间
+sampled = is_sampled_data(df)
+if sampled:
+    population = get_population_size(df)
+    sample_size = len(get_stratified_sample(df))
+    st.info(f"""
+    📐 **抽样估计模式**：当前数据为分层抽样标注（样本 {sample_size:,} 条 / 语料 {population:,} 条），
+    以下占比均为外推到全部语料的估计值，误差线为95%置信区间。
+    """)
+
 # 全局摘要
 st.subheader("🎯 数据概览")
 
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    st.metric("总分析意见数", len(df))
+    if sampled:
+        st.metric("语料总量（估计基数）", f"{population:,}", f"样本 {sample_size:,} 条")
+    else:
+        st.metric("总分析意见数", len(df))
 
 with col2:
-    # 动态计算覆盖率（假设基准为2313条）
-    coverage_pct = len(df) / 2313 * 100
-    st.metric("数据覆盖率", f"{coverage_pct:.1f}%", f"{len(df):,}/2,313条")
+    if sampled:
+        st.metric("抽样比例", f"{sample_size / population * 100:.1f}%", f"{sample_size:,}/{population:,}条")
+    else:
+        # 动态计算覆盖率（假设基准为2313条）
+        coverage_pct = len(df) / 2313 * 100
+        st.metric("数据覆盖率", f"{coverage_pct:.1f}%", f"{len(df):,}/2,313条")
 
 with col3:
     avg_conf = df['sentiment_confidence'].mean()
     st.metric("平均分析置信度", f"{avg_conf:.2f}", "(0-1)")
 
 with col4:
-    high_risk = len(df[df['risk_level'].isin(['critical', 'high'])])
-    high_risk_pct = high_risk / len(df) * 100
-    st.metric("高风险比例", f"{high_risk_pct:.1f}%", f"{high_risk}条")
+    if sampled:
+        high_risk_est = get_extrapolated_share(df, 'risk_level', ['critical', 'high'])
+        st.metric("高风险比例（估计）", f"{high_risk_est['estimate_pct']:.1f}%",
+                  f"95% CI {high_risk_est['ci_low_pct']:.1f}–{high_risk_est['ci_high_pct']:.1f}%",
+                  delta_color="off")
+    else:
+        high_risk = len(df[df['risk_level'].isin(['critical', 'high'])])
+        high_risk_pct = high_risk / len(df) * 100
+        st.metric("高风险比例", f"{high_risk_pct:.1f}%", f"{high_risk}条")
 
 st.markdown("---")
 
@@ -59,10 +87,15 @@ st.subheader("📈 关键指标")
 
 col1, col2, col3 = st.columns(3)
 
-# 动态计算所有指标
-neutral_pct = len(df[df['sentiment'] == 'neutral']) / len(df) * 100
-high_critical_pct = len(df[df['risk_level'].isin(['critical', 'high'])]) / len(df) * 100
-neg_pct = len(df[df['sentiment'] == 'negative']) / len(df) * 100
+# 动态计算所有指标（抽样模式下为外推估计）
+if sampled:
+    neutral_pct = get_extrapolated_share(df, 'sentiment', ['neutral'])['estimate_pct']
+    high_critical_pct = get_extrapolated_share(df, 'risk_level', ['critical', 'high'])['estimate_pct']
+    neg_pct = get_extrapolated_share(df, 'sentiment', ['negative'])['estimate_pct']
+else:
+    neutral_pct = len(df[df['sentiment'] == 'neutral']) / len(df) * 100
+    high_critical_pct = len(df[df['risk_level'].isin(['critical', 'high'])]) / len(df) * 100
+    neg_pct = len(df[df['sentiment'] == 'negative']) / len(df) * 100
 
 with col1:
     health_level = "⭐⭐⭐⭐" if neutral_pct >= 60 else "⭐⭐⭐" if neutral_pct >= 40 else "⭐⭐"
@@ -97,14 +130,24 @@ col1, col2 = st.columns(2)
 with col1:
     # 情感分布
     st.write("**维度1: 舆论情感倾向**")
-    sentiment_dist = df['sentiment'].value_counts()
-    sentiment_labels = [translate_sentiment(k) for k in sentiment_dist.index]
-    
-    fig = create_distribution_pie(
-        sentiment_dist.values,
-        sentiment_labels,
-        title="情感分布"
-    )
+    if sampled:
+        sentiment_est = get_extrapolated_distribution(df, 'sentiment')
+        fig = create_estimate_bar(
+            [translate_sentiment(k) for k in sentiment_est.index],
+            sentiment_est['estimate_pct'],
+            sentiment_est['ci_low_pct'],
+            sentiment_est['ci_high_pct'],
+            title="情感分布（估计）"
+        )
+    else:
+        sentiment_dist = df['sentiment'].value_counts()
+        sentiment_labels = [translate_sentiment(k) for k in sentiment_dist.index]
+        
+        fig = create_distribution_pie(
+            sentiment_dist.values,
+            sentiment_labels,
+            title="情感分布"
+        )
     st.plotly_chart(fig, use_container_width=True)
     
     st.write("→ 详细分析请访问 **风险分析** 页面")
@@ -112,16 +155,27 @@ with col1:
 with col2:
     # 风险分布
     st.write("**维度2: 风险等级评估**")
-    risk_dist = df['risk_level'].value_counts()
     risk_order = ['critical', 'high', 'medium', 'low']
-    risk_ordered = {k: risk_dist.get(k, 0) for k in risk_order}
-    
-    risk_labels = [translate_risk(k) for k in risk_ordered.keys()]
-    fig = create_vertical_bar(
-        risk_labels,
-        list(risk_ordered.values()),
-        title="风险等级分布"
-    )
+    if sampled:
+        risk_est = get_extrapolated_distribution(df, 'risk_level').reindex(risk_order).dropna()
+        fig = create_estimate_bar(
+            [translate_risk(k) for k in risk_est.index],
+            risk_est['estimate_count'],
+            risk_est['ci_low_count'],
+            risk_est['ci_high_count'],
+            title="风险等级分布（估计条数）",
+            yaxis_title="估计讨论数"
+        )
+    else:
+        risk_dist = df['risk_level'].value_counts()
+        risk_ordered = {k: risk_dist.get(k, 0) for k in risk_order}
+        
+        risk_labels = [translate_risk(k) for k in risk_ordered.keys()]
+        fig = create_vertical_bar(
+            risk_labels,
+            list(risk_ordered.values()),
+            title="风险等级分布"
+        )
     st.plotly_chart(fig, use_container_width=True)
     
     st.write("→ 详细分析请访问 **风险分析** 页面")
@@ -133,15 +187,26 @@ col1, col2 = st.columns(2)
 with col1:
     # 话题分布
     st.write("**维度3: 舆论关注话题**")
-    topic_dist = get_top_n_by_count(df['topic'], n=6)
-    topic_labels = [translate_topic(k) for k in topic_dist.index]
-    
-    fig = create_horizontal_bar(
-        topic_labels,
-        topic_dist.values,
-        title="话题热度（Top 6）",
-        colorscale='Blues'
-    )
+    if sampled:
+        topic_est = get_extrapolated_distribution(df, 'topic').head(6)
+        fig = create_estimate_bar(
+            [translate_topic(k) for k in topic_est.index],
+            topic_est['estimate_count'],
+            topic_est['ci_low_count'],
+            topic_est['ci_high_count'],
+            title="话题热度（Top 6，估计条数）",
+            yaxis_title="估计讨论数"
+        )
+    else:
+        topic_dist = get_top_n_by_count(df['topic'], n=6)
+        topic_labels = [translate_topic(k) for k in topic_dist.index]
+        
+        fig = create_horizontal_bar(
+            topic_labels,
+            topic_dist.values,
+            title="话题热度（Top 6）",
+            colorscale='Blues'
+        )
     st.plotly_chart(fig, use_container_width=True)
     
     st.write("→ 详细分析请访问 **话题热度敏感度分析** 页面")
@@ -149,15 +214,26 @@ with col1:
 with col2:
     # 参与方分布
     st.write("**维度4: 舆论参与方**")
-    actor_dist = get_top_n_by_count(df['actor'], n=6)
-    actor_labels = [translate_actor(k) for k in actor_dist.index]
-    
-    fig = create_horizontal_bar(
-        actor_labels,
-        actor_dist.values,
-        title="参与方热度（Top 6）",
-        colorscale='Blues'
-    )
+    if sampled:
+        actor_est = get_extrapolated_distribution(df, 'actor').head(6)
+        fig = create_estimate_bar(
+            [translate_actor(k) for k in actor_est.index],
+            actor_est['estimate_count'],
+            actor_est['ci_low_count'],
+            actor_est['ci_high_count'],
+            title="参与方热度（Top 6，估计条数）",
+            yaxis_title="估计讨论数"
+        )
+    else:
+        actor_dist = get_top_n_by_count(df['actor'], n=6)
+        actor_labels = [translate_actor(k) for k in actor_dist.index]
+        
+        fig = create_horizontal_bar(
+            actor_labels,
+            actor_dist.values,
+            title="参与方热度（Top 6）",
+            colorscale='Blues'
+        )
     st.plotly_chart(fig, use_container_width=True)
     
     st.write("→ 详细分析请访问 **参与方分析** 页面")
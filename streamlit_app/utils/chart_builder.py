@@ -161,6 +161,46 @@ def create_vertical_bar(labels, values, title="", colorscale='Viridis'):
     return fig
 
 
+def create_estimate_bar(labels, estimates, ci_low, ci_high, title="", yaxis_title="估计占比（%）"):
+    """创建带误差线的估计值柱状图（分层抽样外推结果）
+    
+    参数：
+        labels: 标签列表（中文）
+        estimates: 估计值列表
+        ci_low, ci_high: 置信区间下限/上限列表
+        title: 图表标题
+        yaxis_title: 纵轴标题
+    
+    用法：
+        est = get_extrapolated_distribution(df, 'sentiment')
+        fig = create_estimate_bar(
+            [translate_sentiment(k) for k in est.index],
+            est['estimate_pct'], est['ci_low_pct'], est['ci_high_pct'],
+            title="情感分布（估计）"
+        )
+    """
+    est_list = [float(v) for v in estimates]
+    upper = [float(h) - e for h, e in zip(ci_high, est_list)]
+    lower = [e - float(l) for l, e in zip(ci_low, est_list)]
+    
+    fig = go.Figure(data=[go.Bar(
+        x=[str(label) for label in labels],
+        y=est_list,
+        marker=dict(color='rgba(31, 119, 180, 0.7)'),
+        error_y=dict(type='data', symmetric=False, array=upper, arrayminus=lower),
+        text=[f"{v:.1f}" for v in est_list],
+        textposition='outside'
+    )])
+    fig.update_layout(
+        height=350,
+        title=title if title else "",
+        xaxis_title="",
+        yaxis_title=yaxis_title,
+        xaxis_tickangle=-45
+    )
+    return fig
+
+
 # ============================================================================
 # 2. 交叉分析图表
 # ============================================================================
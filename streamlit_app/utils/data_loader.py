@@ -5,9 +5,13 @@
 import json
 import pandas as pd
 from pathlib import Path
+from statistics import NormalDist
 import streamlit as st
 import os
 
+# 指定数据文件的环境变量（如 benchmark_pages.py 用合成数据压测各页面），优先于默认路径
+ANALYSIS_DATA_ENV = 'ANALYSIS_DATA_FILE'
+
 
 def load_analysis_data(filepath=None):
     """加载分析结果JSON文件（不缓存，每次都读新数据）
@@ -16,7 +20,11 @@ def load_analysis_data(filepath=None):
     - 本地开发（工作目录为项目根）
     - Streamlit Cloud（工作目录为repo根）
     - Docker（工作目录变化）
+    - 环境变量 ANALYSIS_DATA_FILE 指定的文件
     """
+    if filepath is None:
+        filepath = os.environ.get(ANALYSIS_DATA_ENV) or None
+    
     if filepath is None:
         # 方案1：从当前脚本位置往上找项目根（最可靠）
         # 脚本位置：streamlit_app/utils/data_loader.py
@@ -631,3 +639,92 @@ def get_risk_segment_analysis(df):
         'topic_dist': high_risk_df['topic'].value_counts(),
         'actor_dist': high_risk_df['actor'].value_counts()
     }
+
+
+# ============================================================================
+# 分层抽样模式：外推估计与置信区间
+# ============================================================================
+
+def get_stratified_sample(df):
+    """带 stratum / stratum_population 标记的记录（最近一次分层抽样的样本）
+    
+    抽样标注不会删掉其他已有标注，只给样本对应的记录打标记。
+    """
+    if 'stratum' not in df.columns or 'stratum_population' not in df.columns:
+        return df.iloc[0:0]
+    return df[df['stratum'].notna()]
+
+
+def get_population_size(df):
+    """抽样数据对应的语料总量（各层规模之和）"""
+    sample = get_stratified_sample(df)
+    if len(sample) == 0:
+        return len(df)
+    return int(sample.groupby('stratum')['stratum_population'].first().sum())
+
+
+def is_sampled_data(df):
+    """是否应按分层抽样外推：有抽样样本，且已标注的记录还没有覆盖整个语料"""
+    sample = get_stratified_sample(df)
+    return len(sample) > 0 and len(df) < get_population_size(df)
+
+
+def _stratified_estimate(df, indicators, confidence=0.95):
+    """分层估计：indicators 为与df同索引的0/1矩阵，每列一个类别（只用样本记录）
+    
+    占比估计 p = Σ W_h·p_h，方差 Σ W_h²·(1-n_h/N_h)·p_h(1-p_h)/(n_h-1)
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    df = get_stratified_sample(df)
+    indicators = indicators.loc[df.index]
+    
+    strata = df.groupby('stratum').agg(
+        N_h=('stratum_population', 'first'),
+        n_h=('stratum', 'size'),
+    )
+    N = strata['N_h'].sum()
+    weights = strata['N_h'] / N
+    fpc = (1 - strata['n_h'] / strata['N_h']).clip(lower=0)
+    denom = (strata['n_h'] - 1).clip(lower=1)  # 单样本层保守处理
+    
+    p_h = indicators.groupby(df['stratum']).mean().reindex(strata.index, fill_value=0)
+    estimate = p_h.mul(weights, axis=0).sum()
+    variance = (p_h * (1 - p_h)).mul(weights ** 2 * fpc / denom, axis=0).sum()
+    margin = z * variance ** 0.5
+    
+    result = pd.DataFrame({
+        'estimate_pct': estimate * 100,
+        'ci_low_pct': (estimate - margin).clip(lower=0) * 100,
+        'ci_high_pct': (estimate + margin).clip(upper=1) * 100,
+    })
+    result['estimate_count'] = estimate * N
+    result['ci_low_count'] = result['ci_low_pct'] / 100 * N
+    result['ci_high_count'] = result['ci_high_pct'] / 100 * N
+    return result
+
+
+@st.cache_data
+def get_extrapolated_distribution(df, column, confidence=0.95):
+    """把样本中某一维度的分布外推到整个语料
+    
+    返回按估计占比降序的DataFrame（索引为类别）：
+    - estimate_pct, ci_low_pct, ci_high_pct: 占比估计及置信区间（%）
+    - estimate_count, ci_low_count, ci_high_count: 语料中条数估计及置信区间
+    
+    用法：
+    >>> if is_sampled_data(df):
+    ...     est = get_extrapolated_distribution(df, 'sentiment')
+    """
+    indicators = pd.get_dummies(df[column].astype(str)).astype(float)
+    result = _stratified_estimate(df, indicators, confidence)
+    return result.sort_values('estimate_pct', ascending=False)
+
+
+@st.cache_data
+def get_extrapolated_share(df, column, values, confidence=0.95):
+    """外推 column 取值属于 values 的占比（如高风险 = critical + high）
+    
+    返回dict：estimate_pct, ci_low_pct, ci_high_pct, estimate_count, ci_low_count, ci_high_count
+    """
+    indicators = pd.DataFrame({'share': df[column].isin(values).astype(float)})
+    return _stratified_estimate(df, indicators, confidence).loc['share'].to_dict()
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""async_fetcher 回归测试：同一个采集器连续两次采集（每次都是新的事件循环）
+
+使用方法：
+    python -m pytest test_async_fetcher.py -q
+"""
+
+from benchmark_crawler import FixtureStore, start_server
+from data_collection_pipeline import PipelineConfig, WeiboCollector
+from raw_shards import ShardedPosts
+
+
+def test_collect_twice_on_one_collector(tmp_path, monkeypatch):
+    monkeypatch.setattr(PipelineConfig, "FRONTIER", False)
+    monkeypatch.setattr(PipelineConfig, "DELAY_RANGE", (0.01, 0.01))
+    server, url = start_server("weibo", FixtureStore(), latency=0.01)
+    try:
+        collector = WeiboCollector(search_url=url)
+        collector.posts = ShardedPosts("weibo", tmp_path)
+        first = collector.collect("a", 3)
+        second = collector.collect("b", 3)
+        collector.posts.close()
+    finally:
+        server.shutdown()
+    assert first > 0
+    assert second > first
+    assert collector.fetcher.stats["errors"] == 0
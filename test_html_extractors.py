@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""html_extractors 夹具测试：各后端与原来 BeautifulSoup 代码的选择结果一致
+
+使用方法：
+    python -m pytest test_html_extractors.py -q
+"""
+
+import pytest
+
+from html_extractors import available_backends, get_extractor
+
+# 第一个 <p> 是摘要，class 含 content 的 <p> 是正文
+ZHIHU_PAGE = """<html><body>
+<div class="SearchResult-Card"><h2>标题一</h2><p>摘要一</p><p class="RichContent-content">正文一</p></div>
+</body></html>"""
+
+# 条目嵌套：外层和内层各算一条，按开始标签的顺序
+ZHIHU_NESTED = """<html><body>
+<div class="SearchResult-Card"><h2>外层标题</h2>
+  <div class="SearchResult-Item"><h2>内层标题</h2><p>内层正文</p></div>
+  <p>外层正文</p>
+</div>
+</body></html>"""
+
+WEIBO_PAGE = """<html><body>
+<div class="card-wrap" mid="123"><div class="mbrank"><p>作者</p><p class="txt">微博正文</p>
+<span class="like">5</span></div></div>
+</body></html>"""
+
+
+@pytest.fixture(params=available_backends())
+def extractor(request):
+    return get_extractor(request.param)
+
+
+def test_zhihu_prefers_content_paragraph(extractor):
+    # STEP_1_zhihu_spider：先找 class 含 content 的 <p>，没有时取第一个 <p>
+    items = extractor.extract("zhihu", ZHIHU_PAGE)
+    assert [i["text"] for i in items] == ["标题一 正文一"]
+
+
+def test_zhihu_pipeline_takes_first_paragraph(extractor):
+    # data_collection_pipeline：只取第一个 <p>
+    items = extractor.extract("zhihu_pipeline", ZHIHU_PAGE)
+    assert [i["text"] for i in items] == ["标题一 摘要一"]
+
+
+@pytest.mark.parametrize("platform", ["zhihu", "zhihu_pipeline"])
+def test_nested_items_in_document_order(extractor, platform):
+    items = extractor.extract(platform, ZHIHU_NESTED)
+    assert [i["text"] for i in items] == ["外层标题 内层正文", "内层标题 内层正文"]
+
+
+def test_weibo_text_and_mid(extractor):
+    items = extractor.extract("weibo", WEIBO_PAGE)
+    assert [(i["text"], i["likes"], i["id"]) for i in items] == [("微博正文", "5", "123")]